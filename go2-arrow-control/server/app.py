@@ -5,10 +5,23 @@ Teachable Machine model upload and robot control system
 
 import os
 import time
+
+if __name__ == "__main__":
+    # Serve through main.py: spawned worker processes re-run the main script,
+    # and that one has nothing to re-run (see main.py)
+    import runpy
+
+    runpy.run_path(
+        os.path.join(os.path.dirname(os.path.abspath(__file__)), "main.py"), run_name="__main__"
+    )
+    raise SystemExit
+
+STARTUP_BEGAN = time.perf_counter()  # For the startup timings in /status
 import json
 import uuid
 from flask import (
     Flask,
+    g,
     render_template,
     request,
     jsonify,
@@ -16,11 +29,16 @@ from flask import (
     session,
     redirect,
     url_for,
+    send_from_directory,
 )
+from flask.sessions import SecureCookieSessionInterface
 from werkzeug.utils import secure_filename
 import base64
+import socket
 import threading
-from collections import deque, Counter
+import tempfile
+import weakref
+from collections import deque
 from datetime import datetime
 from io import BytesIO
 import numpy as np
@@ -100,11 +118,73 @@ werkzeug_logger.propagate = False
 # Reduce root logger verbosity
 logging.getLogger().setLevel(logging.WARNING)
 
-from inference import ModelInference
+# Control log lines worth showing to students (uploads and commands)
+ACTIVITY_LOG_MARKERS = (
+    "Uploaded model:",
+    "Command:",
+    "Moving",
+    "Turning",
+    "Rotating",
+    "Idle",
+    "Prediction",
+)
+
+
+def is_activity_log_line(line):
+    return any(x in line for x in ACTIVITY_LOG_MARKERS)
+
+
+# Pushes state changes and activity log lines to every open page (see
+# live_channel.py); its log handler is added before logging goes async so it
+# runs on the log listener thread
+from live_channel import LiveChannel, LiveLogHandler, LiveState, stream_headers
+
+live_channel = LiveChannel()
+live_log_handler = LiveLogHandler(live_channel, is_activity_log_line)
+live_log_handler.setLevel(logging.INFO)
+live_log_handler.setFormatter(logging.Formatter("%(asctime)s [CONTROL] %(levelname)s: %(message)s"))
+control_logger.addHandler(live_log_handler)
+
+# Write logs from background threads so request threads never wait on
+# console/disk I/O; repeated control messages are aggregated per window
+from log_pipeline import setup_async_logging
+
+log_pipeline = setup_async_logging(control_logger, (werkzeug_logger, False))
+
+from inference import ModelInference, preload as preload_inference
+from inference_worker import ProcessModelInference
 from robot_controller import GO2Controller
+from control_state import ControlState
+from frame_pacing import FramePacer
+from consensus import decide_command
+from session_recorder import SessionRecorder
+from model_loader import ModelLoader
+from event_store import EventStore, team_name
+from shadow_compare import ShadowComparison
+from latency_trace import LatencyTracer
+from profiler import SamplingProfiler
+from request_limits import LoadShedder, RateLimiter
+from static_assets import StaticAssets
+import model_evaluation
 
 app = Flask(__name__, static_folder="../static", template_folder="../static")
 
+# Static files: no session, no rate limit, no load shedding
+ASSET_ENDPOINTS = frozenset({"static", "asset"})
+ASSET_PATH_PREFIXES = ("/static/", "/assets/")  # Their URLs (sessions open before routing)
+
+
+class AssetSessionInterface(SecureCookieSessionInterface):
+    """Cookie sessions that asset requests skip (no cookie signature check, no Vary: Cookie)."""
+
+    def open_session(self, app, request):
+        if request.path.startswith(ASSET_PATH_PREFIXES):
+            return None  # Flask substitutes a read-only null session
+        return super().open_session(app, request)
+
+
+app.session_interface = AssetSessionInterface()
+
 # Secret for teacher session (override with env var TEACHER_PASSWORD or TEACHER_SECRET)
 app.secret_key = os.environ.get(
     "TEACHER_SECRET", os.environ.get("TEACHER_PASSWORD", "teacher_secret_key")
@@ -115,6 +195,28 @@ TEACHER_PASSWORD = os.environ.get("TEACHER_PASSWORD", "teacher123")
 UPLOAD_FOLDER = "uploads/models"
 ALLOWED_EXTENSIONS = {"tflite"}
 MAX_FILE_SIZE = 50 * 1024 * 1024  # 50MB
+MODEL_FILE_MAX_AGE = 24 * 3600  # Browser cache lifetime for /model_file
+RECORDINGS_FOLDER = "recordings"
+# Record pilot sessions from the start (teacher can also toggle at runtime)
+RECORD_SESSIONS = os.environ.get("GO2_RECORD_SESSIONS", "0") == "1"
+# Structured event history (SQLite, see event_store.py)
+EVENT_DB = os.environ.get("GO2_EVENT_DB", os.path.join(logs_dir, "events.db"))
+EVENT_RETENTION_DAYS = int(os.environ.get("GO2_EVENT_RETENTION_DAYS", "30"))
+EVENT_DB_MAX_MB = int(os.environ.get("GO2_EVENT_DB_MAX_MB", "200"))
+# Run the interpreter in a separate, auto-restarted process
+INFERENCE_WORKER = os.environ.get("GO2_INFERENCE_WORKER", "0") == "1"
+# Per-session rate limits (RATE_LIMITS below); 0 turns them off
+RATE_LIMITING = os.environ.get("GO2_RATE_LIMITS", "1") == "1"
+# Overload thresholds: waiting pilot frames, frame service time, concurrent requests
+SHED_QUEUE_DEPTH = int(os.environ.get("GO2_SHED_QUEUE_DEPTH", "2"))
+SHED_SERVICE_MS = float(os.environ.get("GO2_SHED_SERVICE_MS", "250"))
+SHED_ACTIVE_REQUESTS = int(os.environ.get("GO2_SHED_ACTIVE_REQUESTS", "48"))
+# Rebuild the in-memory pages and assets when a file in static/ changes (front-end work)
+STATIC_RELOAD = os.environ.get("GO2_STATIC_RELOAD", "0") == "1"
+# Last active model and settings, restored when the server restarts
+STATE_FILE = os.environ.get("GO2_STATE_FILE", os.path.join(logs_dir, "last_state.json"))
+# Self-signed certificate, generated once and reused across restarts
+CERT_BASE = os.environ.get("GO2_CERT_BASE", os.path.join(project_root, "certs", "devcert"))
 
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 
@@ -126,31 +228,146 @@ inference_engine = None
 robot_controller = None
 current_model_name = None
 is_running = False
-last_command_time = 0
 COMMAND_TIMEOUT = 2.0  # Stop if no detection for 2 seconds
-last_command_sent_time = 0
 
 # Concurrency & Pilot control
-current_pilot = None  # Stores the session user_id of the person currently in control
-pilot_lock = threading.Lock()
-pilot_last_active = 0  # To detect if a pilot has disconnected
 PILOT_INACTIVITY_TIMEOUT = 90.0  # Auto-release pilot after inactivity
-system_locked = False  # Teacher can lock the system to prevent any control
+PILOT_HEARTBEAT_INTERVAL = 2.0  # An open live channel refreshes the pilot this often
 
 # Prediction buffering for consensus
 PREDICTION_BUFFER = None
 PREDICTION_BUFFER_LOCK = threading.Lock()
-LAST_SENT_COMMAND_NAME = None
-LAST_PILOT_FRAME = None  # Stores the last frame sent by the pilot for others to see
-LAST_PREDICTION_DATA = None  # Stores prediction info for others to see
 
-# Settings
-settings = {"confidence_threshold": 0.65, "max_speed": 0.3, "inference_enabled": False}
+# Only one dataset evaluation at a time (it uses a process pool)
+EVALUATION_LOCK = threading.Lock()
+
+# Opt-in recorder for pilot frames and decisions (see session_recorder.py)
+session_recorder = None
+
+# Measures server frame time and tells clients how fast to send
+frame_pacer = FramePacer()
+
+# Camera-to-robot latency of the pilot's frames, per stage (teacher page)
+latency_tracer = LatencyTracer()
+
+# On-demand stack sampling of the live server (teacher page)
+profiler = SamplingProfiler()
+
+# Fingerprinted, precompressed css/js and the HTML pages, built once here
+static_assets = StaticAssets(app.static_folder, prefix="/assets", reload=STATIC_RELOAD)
+
+# Requests per second and burst, per session and endpoint. The pilot sends at
+# most FramePacer.max_fps frames and spectators poll at the pilot's rate;
+# emergency_stop and stop_inference are never limited.
+RATE_LIMITS = {
+    "predict_frame": (30.0, 30),
+    "predict_result": (30.0, 30),
+    "get_pilot_frame": (20.0, 20),
+    "take_control": (1.0, 5),
+    "relinquish_control": (1.0, 5),
+    "control_status": (5.0, 10),
+    "get_status": (5.0, 10),
+    "get_logs": (2.0, 5),
+    "live_stream": (0.5, 5),
+    "list_models": (2.0, 10),
+    "model_load_status": (10.0, 20),
+    "compare_status": (5.0, 10),
+    "load_model": (0.5, 3),
+    "upload_model": (0.2, 3),
+    "login": (0.2, 5),
+}
+rate_limiter = RateLimiter(RATE_LIMITS if RATE_LIMITING else {})
+
+# Under overload these are rejected (or, for the pilot feed, degraded) for
+# everyone but the pilot and the teacher, so the pilot's control path keeps
+# its capacity. The live channel is never shed: one open stream replaces a
+# page's polling and a rejected EventSource does not reconnect by itself.
+SHEDDABLE_ENDPOINTS = frozenset(
+    {
+        "get_pilot_frame",
+        "control_status",
+        "get_status",
+        "get_logs",
+        "list_models",
+        "model_load_status",
+        "compare_status",
+        "teacher_events",
+        "teacher_event_stats",
+    }
+)
+DEGRADED_SPECTATOR_FPS = 1.0
+load_shedder = LoadShedder(
+    frame_pacer.load,
+    max_queue_depth=SHED_QUEUE_DEPTH,
+    max_service_ms=SHED_SERVICE_MS,
+    max_active=SHED_ACTIVE_REQUESTS,
+)
+
+# Uploads, loads, pilot changes, commands and frame latencies for later review
+event_store = EventStore(
+    EVENT_DB,
+    retention_days=EVENT_RETENTION_DAYS,
+    max_bytes=EVENT_DB_MAX_MB * 1024 * 1024,
+)
+# Team of each browser session: the team of the model it last uploaded or
+# loaded, so its pilot changes count for that team
+session_teams = {}
+
+
+def session_team(user_id):
+    """Team to record for a session's events (the loaded model's team if unknown)."""
+    return session_teams.get(user_id) or team_name(current_model_name)
+
+
+def create_inference_engine():
+    if INFERENCE_WORKER:
+        return ProcessModelInference()
+    return ModelInference()
+
+
+# Builds engines in the background; publish_engine swaps them in
+model_loader = ModelLoader(create_inference_engine)
+# Replaced engines still referenced by in-flight requests
+retired_engines = weakref.WeakSet()
+
+# Optional second model run on the pilot's frames for comparison only
+# (see shadow_compare.py); it never drives the robot
+shadow_loader = ModelLoader(create_inference_engine)
+shadow_comparison = None
+
+# Seconds from process start to each startup milestone
+startup_times = {}
+
+# Pilot, lock, settings and last-frame state, published as immutable snapshots
+# (see control_state.py). Read with control.snapshot(); never mutate in place.
+control = ControlState(
+    {
+        "confidence_threshold": 0.65,
+        "max_speed": 0.3,
+        "inference_enabled": False,
+        # Command rate and consensus settings
+        "command_interval": 0.2,
+        "buffer_size": 3,
+        "consensus_required": 2,
+    }
+)
 
-# Command rate and consensus settings
-settings.setdefault("command_interval", 0.2)
-settings.setdefault("buffer_size", 3)
-settings.setdefault("consensus_required", 2)
+# GET endpoints that neither need a session id nor should pay for the
+# stale-pilot check on every hit (assets and spectator/status polling)
+PASSIVE_ENDPOINTS = frozenset(
+    {
+        "static",
+        "asset",
+        "documentation",
+        "get_pilot_frame",
+        "model_load_status",
+        "compare_status",
+        "get_status",
+        "list_models",
+        "get_logs",
+        "manage_settings",
+    }
+)
 
 # Server-side bounds for runtime safety settings
 SETTINGS_LIMITS = {
@@ -211,7 +428,7 @@ def validate_settings_payload(data):
 
         if consensus is not None:
             target_buffer = validated.get(
-                "buffer_size", int(settings.get("buffer_size", 3))
+                "buffer_size", int(control.snapshot().settings.get("buffer_size", 3))
             )
             if consensus < 1 or consensus > target_buffer:
                 errors.append(
@@ -233,13 +450,12 @@ def reconfigure_prediction_buffer(new_size):
 
 def is_current_pilot():
     """Helper to check if the current user is the pilot"""
-    global current_pilot
     user_id = session.get("user_id")
     if not user_id:
         return False
 
-    with pilot_lock:
-        return current_pilot is not None and current_pilot == user_id
+    current_pilot = control.snapshot().current_pilot
+    return current_pilot is not None and current_pilot == user_id
 
 
 def is_teacher():
@@ -249,45 +465,348 @@ def is_teacher():
 
 def expire_stale_pilot():
     """Auto-release pilot if their session appears disconnected/inactive."""
-    global current_pilot, pilot_last_active
-
-    stale_pilot = None
-    idle_for = 0.0
     now = time.time()
 
-    with pilot_lock:
-        if current_pilot is None or pilot_last_active <= 0:
-            return
+    def is_stale(snap):
+        return (
+            snap.current_pilot is not None
+            and snap.pilot_last_active > 0
+            and now - snap.pilot_last_active > PILOT_INACTIVITY_TIMEOUT
+        )
 
-        idle_for = now - pilot_last_active
-        if idle_for <= PILOT_INACTIVITY_TIMEOUT:
-            return
+    # Lock-free fast path: the common case is an active (or absent) pilot
+    if not is_stale(control.snapshot()):
+        return
 
-        stale_pilot = current_pilot
-        current_pilot = None
-        pilot_last_active = 0
+    previous, current = control.modify(
+        lambda snap: snap.release_pilot() if is_stale(snap) else snap
+    )
+    if previous is current:
+        return
 
     stop_robot_and_inference()
     control_logger.warning(
-        "Released stale pilot %s after %.1fs of inactivity", stale_pilot, idle_for
+        "Released stale pilot %s after %.1fs of inactivity",
+        previous.current_pilot,
+        now - previous.pilot_last_active,
+    )
+    event_store.record(
+        "pilot_change", session=previous.current_pilot, model=current_model_name,
+        team=session_team(previous.current_pilot), action="expired",
     )
 
 
 def stop_robot_and_inference():
     """Helper to stop both inference and the robot movement"""
-    global robot_controller
-    settings["inference_enabled"] = False
+    control.update_settings(inference_enabled=False)
     if robot_controller and robot_controller.connected:
         robot_controller.stop()
     control_logger.info("Inference stopped and robot idling.")
 
 
+def start_recording():
+    """Start a new recording session for the loaded model (replaces any open one)."""
+    global session_recorder
+    stop_recording()
+    classes = inference_engine.get_classes() if inference_engine else []
+    session_recorder = SessionRecorder(
+        RECORDINGS_FOLDER,
+        classes,
+        model_name=current_model_name,
+        settings=control.snapshot().settings_dict(),
+    )
+    return session_recorder
+
+
+def retire_engine(engine, name):
+    """Track a replaced engine until the last in-flight request drops it."""
+    retired_engines.add(engine)
+    weakref.finalize(engine, control_logger.info, "Released model: %s", name)
+
+
+def publish_engine(engine, filename):
+    """Make a fully loaded engine the active one (called by model_loader)."""
+    global inference_engine, current_model_name
+    previous, previous_name = inference_engine, current_model_name
+
+    # Single reference swap: requests that already read inference_engine
+    # finish on the old model, new ones get the new model
+    inference_engine = engine
+    current_model_name = filename
+    if previous is not None:
+        retire_engine(previous, previous_name)
+
+    # Old predictions may use another model's class names
+    with PREDICTION_BUFFER_LOCK:
+        if PREDICTION_BUFFER is not None:
+            PREDICTION_BUFFER.clear()
+
+    comparison = shadow_comparison
+    if comparison:
+        comparison.reset(filename)
+
+    control_logger.info("Loaded model: %s", filename)
+    pilot = control.snapshot().current_pilot
+    if pilot:
+        session_teams[pilot] = team_name(filename)
+    event_store.record(
+        "model_load", session=pilot, model=filename, team=team_name(filename),
+        classes=len(engine.get_classes()),
+    )
+
+    # Recordings are per model (command codes index its class list)
+    if RECORD_SESSIONS or session_recorder:
+        start_recording()
+
+    save_last_state()
+    return {"classes": engine.get_classes(), "model_input": engine.input_spec()}
+
+
+def publish_shadow(engine, filename):
+    """Start comparing a loaded shadow engine (called by shadow_loader)."""
+    global shadow_comparison
+    previous = shadow_comparison
+    shadow_comparison = ShadowComparison(engine, filename, current_model_name)
+    if previous:
+        previous.close()
+    control_logger.info("Comparing %s against shadow model %s", current_model_name, filename)
+    return {"model_input": engine.input_spec()}
+
+
+def stop_shadow():
+    """End the comparison; returns its final summary (None if none was running)."""
+    global shadow_comparison
+    comparison, shadow_comparison = shadow_comparison, None
+    if not comparison:
+        return None
+    summary = comparison.summary()
+    comparison.close()
+    control_logger.info(
+        "Stopped shadow comparison with %s (%d frames, agreement %s)",
+        comparison.name, summary["compared"], summary["agreement"],
+    )
+    event_store.record(
+        "shadow_compare", session=control.snapshot().current_pilot,
+        model=summary["active_model"], team=team_name(summary["active_model"]),
+        value=summary["agreement"],
+        shadow=comparison.name, frames=summary["compared"],
+    )
+    return summary
+
+
+def check_command_timeout():
+    """Safety check: stop the robot if no command arrived for a while.
+
+    Returns:
+        The current control snapshot
+    """
+    now = time.time()
+    snap = control.snapshot()
+    if snap.last_command_time > 0 and (now - snap.last_command_time > COMMAND_TIMEOUT):
+        if robot_controller and robot_controller.connected:
+            if (
+                snap.last_sent_command_name is not None
+                and snap.last_sent_command_name.lower() != "idle"
+            ):
+                robot_controller.stop()
+                snap = control.update(last_sent_command_name="Idle")
+                control_logger.info("Safety timeout: Robot stopped due to inactivity")
+                event_store.record(
+                    "safety_stop", session=snap.current_pilot, model=current_model_name,
+                    team=team_name(current_model_name),
+                    reason="timeout",
+                )
+    return snap
+
+
+def live_checks():
+    """Periodic checks formerly triggered by every client's status polling."""
+    expire_stale_pilot()
+    check_command_timeout()
+
+    # An open live channel is the pilot's heartbeat while the control page is open
+    now = time.time()
+    pilot = control.snapshot().current_pilot
+    if pilot and live_channel.connected(pilot):
+        control.modify(
+            lambda s: s._replace(pilot_last_active=now)
+            if s.current_pilot == pilot and now - s.pilot_last_active > PILOT_HEARTBEAT_INTERVAL
+            else s
+        )
+
+
+def live_state():
+    """Everything the pages show that is not per-request (diffed by live_channel)."""
+    snap = control.snapshot()
+    engine = inference_engine
+    robot = robot_controller
+    load = model_loader.status()
+    return {
+        "current_pilot": snap.current_pilot,
+        "system_locked": snap.system_locked,
+        "inference_enabled": snap.settings["inference_enabled"],
+        "settings": snap.settings_dict(),
+        "current_model": current_model_name,
+        "model_loaded": engine is not None and engine.model_loaded,
+        "model_input": engine.input_spec() if engine else None,
+        "model_load": {k: load.get(k) for k in ("state", "model", "progress")},
+        "robot_connected": robot is not None and robot.connected,
+        "mock_mode": bool(robot and getattr(robot, "mock_mode", False)),
+        "compare": compare_state(live=True),
+    }
+
+
+def compare_state(live=False):
+    """
+    Shadow model load progress and comparison statistics
+
+    Args:
+        live: For the live channel: without the running time, which would
+            make every sample a change even with no new frames
+    """
+    load = shadow_loader.status()
+    comparison = shadow_comparison
+    summary = comparison.summary() if comparison else None
+    if live:
+        load = {k: load.get(k) for k in ("state", "model", "progress", "error")}
+        if summary:
+            summary.pop("running_s")
+    return {"load": load, "comparison": summary}
+
+
+def save_last_state():
+    """Remember the active model and settings for the next start."""
+    settings = control.snapshot().settings_dict()
+    settings.pop("inference_enabled", None)  # Driving always needs a fresh start
+    tmp = STATE_FILE + ".tmp"
+    try:
+        with open(tmp, "w") as f:
+            json.dump({"model": current_model_name, "settings": settings}, f)
+        os.replace(tmp, STATE_FILE)
+    except OSError as e:
+        control_logger.warning("Could not save server state: %s", e)
+
+
+def restore_last_state():
+    """Re-apply saved settings and start loading the last model in the background."""
+    try:
+        with open(STATE_FILE) as f:
+            state = json.load(f)
+    except FileNotFoundError:
+        return
+    except (OSError, ValueError) as e:
+        control_logger.warning("Ignoring saved server state: %s", e)
+        return
+
+    validated, errors = validate_settings_payload(state.get("settings") or {})
+    if errors:
+        control_logger.warning("Ignoring saved settings: %s", "; ".join(errors))
+    elif validated:
+        if "buffer_size" in validated:
+            reconfigure_prediction_buffer(validated["buffer_size"])
+        control.update_settings(**validated)
+
+    filename = state.get("model")
+    if not filename:
+        return
+    filepath = os.path.join(app.config["UPLOAD_FOLDER"], secure_filename(filename))
+    if not os.path.exists(filepath):
+        control_logger.info("Last model %s no longer exists; not restoring it", filename)
+        return
+
+    def publish_restored(engine, name):
+        result = publish_engine(engine, name)
+        startup_times["model_ready"] = round(time.perf_counter() - STARTUP_BEGAN, 3)
+        control_logger.info(
+            "Restored model %s (ready %.2fs after start)", name, startup_times["model_ready"]
+        )
+        return result
+
+    model_loader.start(filepath, filename, publish_restored)
+
+
+def background_startup():
+    """Heavy imports and state restore, while the server already accepts requests."""
+    def run():
+        preload_inference(interpreter=not INFERENCE_WORKER)
+        startup_times["backends"] = round(time.perf_counter() - STARTUP_BEGAN, 3)
+        control_logger.info("Inference backends ready %.2fs after start", startup_times["backends"])
+        restore_last_state()
+
+    threading.Thread(target=run, name="startup", daemon=True).start()
+
+
+def dev_ssl_context():
+    """(cert, key) paths for HTTPS, creating the self-signed pair on first use."""
+    from werkzeug.serving import make_ssl_devcert
+
+    cert, key = CERT_BASE + ".crt", CERT_BASE + ".key"
+    if not (os.path.exists(cert) and os.path.exists(key)):
+        os.makedirs(os.path.dirname(CERT_BASE), exist_ok=True)
+        make_ssl_devcert(CERT_BASE, host="go2-arrow-control")
+        control_logger.info("Created self-signed certificate %s", cert)
+    return cert, key
+
+
+def stop_recording():
+    """Close the current recording session, if any."""
+    global session_recorder
+    recorder, session_recorder = session_recorder, None
+    if recorder:
+        recorder.close()
+
+
 def allowed_file(filename):
     return "." in filename and filename.rsplit(".", 1)[1].lower() in ALLOWED_EXTENSIONS
 
 
+@app.before_request
+def admit_request():
+    """
+    Rate limits and overload shedding, before any session or pilot work
+
+    Runs first, so a rejected request costs a bucket lookup, not a session
+    update, a pilot check or a view. Assets are neither limited nor shed and
+    return before the session cookie is even read.
+    """
+    if request.endpoint in ASSET_ENDPOINTS:
+        return
+    load_shedder.enter()
+    g.admitted = True
+    endpoint = request.endpoint
+    client = session.get("user_id") or request.remote_addr
+
+    retry_after = rate_limiter.check(client, endpoint)
+    if retry_after:
+        return reject("Too many requests", 429, retry_after)
+
+    if endpoint in SHEDDABLE_ENDPOINTS:
+        reason = load_shedder.overload()
+        if reason and client != control.snapshot().current_pilot and not is_teacher():
+            load_shedder.count(endpoint)
+            if endpoint == "get_pilot_frame":
+                g.degraded = True  # Served without the image, at a lower rate
+            else:
+                return reject(f"Server overloaded ({reason})", 503, 2.0)
+
+
+@app.teardown_request
+def release_request(_exc):
+    if g.pop("admitted", False):
+        load_shedder.leave()
+
+
+def reject(message, status, retry_after):
+    response = jsonify({"error": message, "retry_after": round(retry_after, 2)})
+    response.status_code = status
+    response.headers["Retry-After"] = str(max(1, int(retry_after + 0.999)))
+    return response
+
+
 @app.before_request
 def ensure_user_id():
+    if request.method == "GET" and request.endpoint in PASSIVE_ENDPOINTS:
+        return
     if "user_id" not in session:
         session["user_id"] = str(uuid.uuid4())
     expire_stale_pilot()
@@ -296,7 +815,7 @@ def ensure_user_id():
 @app.route("/")
 def index():
     """Serve control page as the landing page"""
-    return render_template("control.html")
+    return static_assets.page_response(request, "control.html") or render_template("control.html")
 
 
 @app.route("/control")
@@ -308,7 +827,9 @@ def control_page():
 @app.route("/docs")
 def documentation():
     """Serve documentation page"""
-    return render_template("documentation.html")
+    return static_assets.page_response(request, "documentation.html") or render_template(
+        "documentation.html"
+    )
 
 
 @app.route("/login", methods=["GET", "POST"])
@@ -337,39 +858,52 @@ def teacher_page():
     """Teacher management page"""
     if not session.get("is_teacher"):
         return redirect(url_for("login"))
-    return render_template("teacher.html")
+    return static_assets.page_response(request, "teacher.html") or render_template("teacher.html")
+
+
+@app.route("/assets/<path:filename>")
+def asset(filename):
+    """Serve a fingerprinted css/js file (cached by browsers for a year)"""
+    response = static_assets.asset_response(request, filename)
+    if response is None:
+        return jsonify({"error": "Unknown asset"}), 404
+    return response
 
 
 @app.route("/api/control_status", methods=["GET"])
 def control_status():
     """Get current pilot status"""
-    global current_pilot, system_locked, pilot_last_active
     user_id = session.get("user_id")
 
-    with pilot_lock:
-        is_pilot = user_id == current_pilot
-        if is_pilot:
-            pilot_last_active = time.time()  # Heartbeat while control page is open
-        pilot = current_pilot
-        locked = system_locked
+    snap = control.snapshot()
+    is_pilot = user_id == snap.current_pilot
+    if is_pilot:
+        # Heartbeat while control page is open
+        snap = control.update(pilot_last_active=time.time())
 
     return jsonify(
         {
-            "current_pilot": pilot,
+            "current_pilot": snap.current_pilot,
             "is_pilot": is_pilot,
             "user_id": user_id,
-            "system_locked": locked,
+            "system_locked": snap.system_locked,
             "mock_mode": getattr(robot_controller, 'mock_mode', False) if robot_controller else False
         }
     )
 
 
+@app.route("/api/stream")
+def live_stream():
+    """Server-sent events: state changes and activity log lines for this page"""
+    return Response(live_channel.stream(session.get("user_id")), headers=stream_headers())
+
+
 @app.route("/api/take_control", methods=["POST"])
 def take_control():
     """Attempt to take control of the robot"""
-    global current_pilot, system_locked, pilot_last_active
+    teacher = session.get("is_teacher")
 
-    if system_locked and not session.get("is_teacher"):
+    if control.snapshot().system_locked and not teacher:
         return (
             jsonify(
                 {"success": False, "message": "System is currently locked by teacher"}
@@ -381,38 +915,56 @@ def take_control():
     if not user_id:
         return jsonify({"error": "No session ID"}), 400
 
-    with pilot_lock:
-        # Check if already controlled by someone else
-        if current_pilot and current_pilot != user_id:
+    def claim(snap):
+        # Re-check under the writer lock: the teacher may have locked, or
+        # someone else may have claimed control, since the fast-path read
+        if snap.system_locked and not teacher:
+            return snap
+        if snap.current_pilot and snap.current_pilot != user_id:
+            return snap
+        return snap._replace(current_pilot=user_id, pilot_last_active=time.time())
+
+    _, current = control.modify(claim)
+    if current.current_pilot != user_id:
+        if current.system_locked and not teacher:
             return (
                 jsonify(
-                    {
-                        "success": False,
-                        "message": "Robot is currently controlled by another student",
-                    }
+                    {"success": False, "message": "System is currently locked by teacher"}
                 ),
-                409,
+                403,
             )
+        return (
+            jsonify(
+                {
+                    "success": False,
+                    "message": "Robot is currently controlled by another student",
+                }
+            ),
+            409,
+        )
 
-        current_pilot = user_id
-        pilot_last_active = time.time()
-        control_logger.info(f"User {user_id} took control")
-
+    control_logger.info(f"User {user_id} took control")
+    event_store.record(
+        "pilot_change", session=user_id, model=current_model_name,
+        team=session_team(user_id), action="take",
+    )
     return jsonify({"success": True, "message": "You now have control"})
 
 
 @app.route("/api/relinquish_control", methods=["POST"])
 def relinquish_control():
     """Release control of the robot"""
-    global current_pilot, pilot_last_active
-
     user_id = session.get("user_id")
-    with pilot_lock:
-        if current_pilot == user_id:
-            current_pilot = None
-            pilot_last_active = 0
-            stop_robot_and_inference()
-            control_logger.info(f"User {user_id} relinquished control")
+    previous, current = control.modify(
+        lambda snap: snap.release_pilot() if snap.current_pilot == user_id else snap
+    )
+    if previous is not current:
+        stop_robot_and_inference()
+        control_logger.info(f"User {user_id} relinquished control")
+        event_store.record(
+            "pilot_change", session=user_id, model=current_model_name,
+            team=session_team(user_id), action="relinquish",
+        )
 
     return jsonify({"success": True})
 
@@ -420,45 +972,255 @@ def relinquish_control():
 @app.route("/api/teacher/reset_control", methods=["POST"])
 def teacher_reset_control():
     """Teacher force-resets control"""
-    global current_pilot, pilot_last_active
     if not session.get("is_teacher"):
         return jsonify({"error": "Unauthorized"}), 403
 
-    with pilot_lock:
-        current_pilot = None
-        pilot_last_active = 0
-        stop_robot_and_inference()
-        control_logger.info("Teacher reset control")
+    previous, _ = control.modify(lambda snap: snap.release_pilot())
+    stop_robot_and_inference()
+    control_logger.info("Teacher reset control")
+    event_store.record(
+        "pilot_change", session=previous.current_pilot, model=current_model_name,
+        team=session_team(previous.current_pilot), action="teacher_reset",
+    )
 
     return jsonify({"success": True})
 
 
+@app.route("/api/teacher/reset_latency", methods=["POST"])
+def teacher_reset_latency():
+    """Teacher clears the latency statistics (e.g. after changing settings)"""
+    if not session.get("is_teacher"):
+        return jsonify({"error": "Unauthorized"}), 403
+
+    latency_tracer.reset()
+    return jsonify({"success": True})
+
+
+@app.route("/api/teacher/profile", methods=["POST"])
+def teacher_start_profile():
+    """Teacher samples all server threads for a few seconds"""
+    if not session.get("is_teacher"):
+        return jsonify({"error": "Unauthorized"}), 403
+
+    data = request.get_json(silent=True) or {}
+    try:
+        seconds = float(data.get("seconds", 10))
+        interval_ms = float(data.get("interval_ms", 10))
+    except (TypeError, ValueError):
+        return jsonify({"error": "seconds and interval_ms must be numbers"}), 400
+
+    if not profiler.start(seconds, interval_ms, allocations=bool(data.get("allocations"))):
+        return jsonify({"error": "A profile is already running", **profiler.status()}), 409
+
+    control_logger.info("Teacher started a profile")
+    return (
+        jsonify({"success": True, "status_url": url_for("teacher_profile_status")}),
+        202,
+    )
+
+
+@app.route("/api/teacher/profile", methods=["GET"])
+def teacher_profile_status():
+    """Profile progress and summary (top functions, threads, allocations)"""
+    if not session.get("is_teacher"):
+        return jsonify({"error": "Unauthorized"}), 403
+    return jsonify(profiler.status())
+
+
+@app.route("/api/teacher/profile/collapsed", methods=["GET"])
+def teacher_profile_collapsed():
+    """Last profile as collapsed stacks (flamegraph.pl, speedscope)"""
+    if not session.get("is_teacher"):
+        return jsonify({"error": "Unauthorized"}), 403
+
+    collapsed = profiler.collapsed()
+    if collapsed is None:
+        return jsonify({"error": "No profile captured yet"}), 404
+
+    started = profiler.status().get("started", time.time())
+    name = datetime.fromtimestamp(started).strftime("profile_%Y%m%d_%H%M%S.collapsed")
+    return Response(
+        collapsed,
+        mimetype="text/plain",
+        headers={"Content-Disposition": f"attachment; filename={name}"},
+    )
+
+
 @app.route("/api/teacher/lock_system", methods=["POST"])
 def teacher_lock_system():
     """Teacher locks the system"""
-    global system_locked, current_pilot, pilot_last_active
     if not session.get("is_teacher"):
         return jsonify({"error": "Unauthorized"}), 403
 
     data = request.get_json()
-    system_locked = data.get("locked", True)
+    locked = data.get("locked", True)
 
-    if system_locked:
-        with pilot_lock:
-            current_pilot = None  # Boot current pilot
-            pilot_last_active = 0
-            stop_robot_and_inference()
+    if locked:
+        # Lock and boot the current pilot in one step
+        previous, _ = control.modify(
+            lambda snap: snap.release_pilot()._replace(system_locked=True)
+        )
+        stop_robot_and_inference()
         control_logger.info("Teacher LOCKED the system")
+        event_store.record(
+            "pilot_change", session=previous.current_pilot, model=current_model_name,
+            team=session_team(previous.current_pilot), action="lock",
+        )
     else:
+        control.update(system_locked=False)
         control_logger.info("Teacher UNLOCKED the system")
 
-    return jsonify({"success": True, "locked": system_locked})
+    return jsonify({"success": True, "locked": locked})
+
+
+@app.route("/api/teacher/recording", methods=["GET", "POST"])
+def teacher_recording():
+    """Start/stop recording pilot sessions, or get recording status"""
+    if not session.get("is_teacher"):
+        return jsonify({"error": "Unauthorized"}), 403
+
+    if request.method == "POST":
+        data = request.get_json(silent=True) or {}
+        if data.get("enabled"):
+            if not (inference_engine and inference_engine.model_loaded):
+                return jsonify({"error": "Load a model before recording"}), 400
+            start_recording()
+        else:
+            stop_recording()
+
+    recorder = session_recorder
+    return jsonify(
+        {"recording": recorder is not None, **(recorder.status() if recorder else {})}
+    )
+
+
+def parse_time_arg(name):
+    """Query arg as epoch seconds; accepts numbers or ISO 8601 datetimes."""
+    value = request.args.get(name)
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        return datetime.fromisoformat(value).timestamp()
+
+
+def event_filters():
+    return {
+        "start": parse_time_arg("start"),
+        "end": parse_time_arg("end"),
+        **{k: request.args.get(k) for k in ("type", "session", "model", "team")},
+    }
+
+
+@app.route("/api/teacher/events", methods=["GET"])
+def teacher_events():
+    """Workshop events filtered by time range, type, session, model or team"""
+    if not session.get("is_teacher"):
+        return jsonify({"error": "Unauthorized"}), 403
+    try:
+        filters = event_filters()
+        limit = min(int(request.args.get("limit", 500)), 5000)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify({"events": event_store.query(limit=limit, **filters)})
+
+
+@app.route("/api/teacher/events/stats", methods=["GET"])
+def teacher_event_stats():
+    """Aggregate workshop stats (per team) for a time range"""
+    if not session.get("is_teacher"):
+        return jsonify({"error": "Unauthorized"}), 403
+    try:
+        filters = event_filters()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify({**event_store.stats(**filters), "store": event_store.status()})
+
+
+@app.route("/api/teacher/evaluate", methods=["POST"])
+def teacher_evaluate():
+    """
+    Evaluate an uploaded model on a labelled image set
+    Expects: form with filename (a model in uploads/models) and either a
+             dataset .zip upload or dataset_path (directory/zip on the server),
+             one folder per class; optional workers
+    Returns: newline-delimited JSON progress events, then the result
+    """
+    if not session.get("is_teacher"):
+        return jsonify({"error": "Unauthorized"}), 403
+
+    filename = os.path.basename(request.form.get("filename", ""))
+    model_path = os.path.join(app.config["UPLOAD_FOLDER"], filename)
+    if not filename or not os.path.exists(model_path):
+        return jsonify({"error": "Model file not found"}), 404
+
+    try:
+        workers = int(request.form.get("workers", model_evaluation.DEFAULT_WORKERS))
+    except ValueError:
+        return jsonify({"error": "workers must be an integer"}), 400
+    workers = max(1, min(workers, os.cpu_count() or 1))
+
+    if not EVALUATION_LOCK.acquire(blocking=False):
+        return jsonify({"error": "An evaluation is already running"}), 409
+
+    temp_path = None
+    try:
+        if "dataset" in request.files and request.files["dataset"].filename:
+            fd, temp_path = tempfile.mkstemp(suffix=".zip")
+            os.close(fd)
+            request.files["dataset"].save(temp_path)
+            source = temp_path
+        else:
+            source = request.form.get("dataset_path", "")
+            if not source or not os.path.exists(source):
+                raise FileNotFoundError("Dataset not found")
+    except Exception as e:
+        EVALUATION_LOCK.release()
+        if temp_path:
+            os.remove(temp_path)
+        return jsonify({"error": str(e)}), 400
+
+    def generate():
+        try:
+            for event in model_evaluation.evaluate(model_path, source, workers=workers):
+                yield json.dumps(event) + "\n"
+        except Exception as e:
+            yield json.dumps({"type": "error", "error": str(e)}) + "\n"
+
+    def cleanup():
+        if temp_path and os.path.exists(temp_path):
+            os.remove(temp_path)
+        EVALUATION_LOCK.release()
+
+    control_logger.info("Evaluating model %s on %s", filename, os.path.basename(source))
+    response = Response(generate(), mimetype="application/x-ndjson")
+    response.call_on_close(cleanup)
+    return response
 
 
 @app.route("/api/pilot_frame", methods=["GET"])
 def get_pilot_frame():
     """Get the last frame and prediction sent by the current pilot"""
-    return jsonify({"image": LAST_PILOT_FRAME, "prediction": LAST_PREDICTION_DATA})
+    snap = control.snapshot()
+    if g.get("degraded"):
+        # Overloaded: spectators keep their last image and poll slower
+        return jsonify(
+            {
+                "image": None,
+                "prediction": snap.last_prediction_data,
+                "fps": DEGRADED_SPECTATOR_FPS,
+                "degraded": True,
+            }
+        )
+    return jsonify(
+        {
+            "image": snap.last_pilot_frame,
+            "prediction": snap.last_prediction_data,
+            # Spectators poll at the pilot's current frame rate
+            "fps": pacing_hints(snap)["fps"],
+        }
+    )
 
 
 @app.route("/logs")
@@ -469,31 +1231,175 @@ def get_logs():
         if not os.path.exists(control_log_path):
             return jsonify({"logs": []})
 
-        # Read file and filter
-        filtered_logs = []
-        with open(control_log_path, "r") as f:
-            for line in f:
-                # Filter for useful events
-                if any(
-                    x in line
-                    for x in [
-                        "Uploaded model:",
-                        "Command:",
-                        "Moving",
-                        "Turning",
-                        "Rotating",
-                        "Idle",
-                        "Prediction",
-                    ]
-                ):
-                    filtered_logs.append(line)
-
         # Return last 50 matches
-        return jsonify({"logs": filtered_logs[-50:]})
+        return jsonify({"logs": read_activity_log(control_log_path)})
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 
+def read_activity_log(path, limit=50):
+    """Last `limit` activity lines of a control log file."""
+    with open(path, "r") as f:
+        return list(deque((line for line in f if is_activity_log_line(line)), maxlen=limit))
+
+
+def pacing_hints(snap):
+    """Backpressure hints for the pilot's browser (see frame_pacing.py)."""
+    return frame_pacer.hints(
+        float(snap.settings.get("command_interval", 0.2)),
+        int(snap.settings.get("buffer_size", 3)),
+    )
+
+
+def run_command_pipeline(prediction, confidence, snap, trace=None):
+    """
+    Feed one prediction through consensus, threshold and rate-limiting
+
+    Shared by /predict_frame (server-side inference) and /predict_result
+    (probabilities computed in the pilot's browser).
+
+    Args:
+        trace: Optional dict; receives "consensus" (ms), "decided"
+            (perf_counter) and, if the robot's command changed, "target_seq"
+
+    Returns: dict with prediction, consensus state and command info
+    """
+    started = time.perf_counter()
+    target_seq = robot_controller.target_seq if robot_controller else None
+    cfg = snap.settings
+    buffer_size = int(cfg.get("buffer_size", 5))
+    consensus_required = int(cfg.get("consensus_required", 3))
+
+    # Ensure prediction buffer initialized
+    global PREDICTION_BUFFER
+    if PREDICTION_BUFFER is None:
+        with PREDICTION_BUFFER_LOCK:
+            if PREDICTION_BUFFER is None:
+                PREDICTION_BUFFER = deque(maxlen=buffer_size)
+
+    # Append prediction to buffer
+    with PREDICTION_BUFFER_LOCK:
+        PREDICTION_BUFFER.append(prediction)
+        buffer_snapshot = list(PREDICTION_BUFFER)
+
+    command_to_execute, most_common, consensus_count = decide_command(
+        buffer_snapshot, buffer_size, consensus_required
+    )
+
+    # Enforce confidence threshold for the latest frame before counting it as valid
+    frame_valid = confidence >= cfg.get("confidence_threshold", 0.65)
+    decided = time.perf_counter()
+
+    # Rate-control: only send commands at most once per command_interval
+    last_command_time = snap.last_command_time
+    last_command_sent_time = snap.last_command_sent_time
+    last_sent_command_name = snap.last_sent_command_name
+    now = time.time()
+    command_executed = False
+
+    time_since_last = now - last_command_time if last_command_time > 0 else 0
+
+    if command_to_execute != "Idle" and frame_valid:
+        # Enough consensus to move — check rate limit
+        interval = float(cfg.get("command_interval", 0.1))
+        if now - last_command_sent_time >= interval:
+            if robot_controller and robot_controller.connected:
+                robot_controller.execute_command(command_to_execute, cfg["max_speed"])
+                command_executed = True
+                event_store.record(
+                    "command", session=snap.current_pilot, model=current_model_name,
+                    team=team_name(current_model_name),
+                    command=command_to_execute, confidence=round(float(confidence), 3),
+                )
+                last_command_sent_time = now
+                last_command_time = now
+                # record last sent command name to avoid repeated idle stops
+                last_sent_command_name = command_to_execute
+    else:
+        # Not enough consensus — ensure robot is stopped
+        if robot_controller and robot_controller.connected:
+            # Only send stop/idle if last sent command was a movement (not already idle)
+            if (
+                last_sent_command_name is not None
+                and last_sent_command_name.lower() != "idle"
+            ):
+                robot_controller.stop()
+                last_sent_command_name = "Idle"
+                event_store.record(
+                    "command", session=snap.current_pilot, model=current_model_name,
+                    team=team_name(current_model_name),
+                    command="Idle",
+                )
+            last_command_time = now
+
+    # Check for timeout (existing behavior)
+    time_since_last = time.time() - last_command_time if last_command_time > 0 else 0
+    if time_since_last > COMMAND_TIMEOUT and last_command_time > 0:
+        if robot_controller and robot_controller.connected:
+            # Only send stop if we previously sent a movement command
+            if (
+                last_sent_command_name is not None
+                and last_sent_command_name.lower() != "idle"
+            ):
+                robot_controller.stop()
+                last_sent_command_name = "Idle"
+                event_store.record(
+                    "safety_stop", session=snap.current_pilot, model=current_model_name,
+                    team=team_name(current_model_name),
+                    reason="timeout",
+                )
+
+    # Publish command bookkeeping and prediction data for pilot view streamers
+    control.update(
+        last_command_time=last_command_time,
+        last_command_sent_time=last_command_sent_time,
+        last_sent_command_name=last_sent_command_name,
+        last_prediction_data={
+            "prediction": prediction,
+            "confidence": float(confidence),
+            "command_to_execute": command_to_execute,
+        },
+    )
+
+    result = {
+        "prediction": prediction,
+        "confidence": float(confidence),
+        "threshold": cfg["confidence_threshold"],
+        "buffer_size": buffer_size,
+        "consensus_required": consensus_required,
+        "buffer_snapshot": buffer_snapshot,
+        "most_common": most_common if len(buffer_snapshot) > 0 else None,
+        "consensus_count": consensus_count,
+        "command_to_execute": command_to_execute,
+        "command_executed": command_executed,
+        "time_since_last": time_since_last,
+    }
+    if trace is not None:
+        trace["consensus"] = (decided - started) * 1000
+        trace["decided"] = decided
+        if robot_controller and robot_controller.target_seq != target_seq:
+            trace["target_seq"] = robot_controller.target_seq
+    return result
+
+
+def record_frame_trace(data, arrival_ts, arrived, stages, trace):
+    """Hand one pilot frame's timings to the latency tracer."""
+    controller = robot_controller
+    ack = None
+    if controller and "target_seq" in trace:
+        seq = trace["target_seq"]
+        ack = lambda: controller.ack_time(seq)  # noqa: E731
+    latency_tracer.record_frame(
+        session.get("user_id"), data, arrival_ts, arrived, trace["decided"],
+        {**stages, "consensus": trace["consensus"]}, ack=ack,
+    )
+
+
+def clock_stamp(arrival_ts):
+    """Server receive and reply times (ms), echoed by the browser for the clock offset."""
+    return {"t1": arrival_ts * 1000, "t2": time.time() * 1000}
+
+
 @app.route("/predict_frame", methods=["POST"])
 def predict_frame():
     """
@@ -501,22 +1407,28 @@ def predict_frame():
     Expects: JSON with base64 encoded image
     Returns: JSON with prediction, confidence, and command
     """
-    global last_command_time, pilot_last_active, LAST_PILOT_FRAME, LAST_PREDICTION_DATA
-
     # Check if this user is the current pilot
     if not is_current_pilot():
         return jsonify({"error": "Not the current pilot"}), 403
 
+    arrival_ts = time.time()
+    arrived = time.perf_counter()
+    started = frame_pacer.start_frame()
+    processed = False
     try:
         data = request.get_json()
+        parsed = time.perf_counter()
+        stages = {"upload": (parsed - arrived) * 1000}
 
         if not data or "image" not in data:
             return jsonify({"error": "No image provided"}), 400
 
-        # Store as last pilot frame
-        global LAST_PILOT_FRAME, pilot_last_active
-        LAST_PILOT_FRAME = data["image"]  # Already base64 encoded
-        pilot_last_active = time.time()
+        # Store as last pilot frame (already base64 encoded)
+        control.update(last_pilot_frame=data["image"], pilot_last_active=time.time())
+
+        # One consistent view of the settings for the whole request
+        snap = control.snapshot()
+        cfg = snap.settings
 
         # Decode base64 image
         image_data = data["image"].split(",")[
@@ -529,133 +1441,175 @@ def predict_frame():
         # Teachable Machine image models.
         image = Image.open(BytesIO(image_bytes))
         image_np = np.array(image)
+        stages["decode"] = (time.perf_counter() - parsed) * 1000
 
-        # Ensure prediction buffer initialized
-        global PREDICTION_BUFFER
-        if PREDICTION_BUFFER is None:
-            with PREDICTION_BUFFER_LOCK:
-                if PREDICTION_BUFFER is None:
-                    PREDICTION_BUFFER = deque(
-                        maxlen=int(settings.get("buffer_size", 5))
-                    )
-
-        # Run inference if model is loaded and inference is enabled
-        if not (
-            inference_engine
-            and inference_engine.model_loaded
-            and settings["inference_enabled"]
-        ):
+        # Run inference if model is loaded and inference is enabled.
+        # Hold one reference so a model swap cannot change it mid-frame.
+        engine = inference_engine
+        if not (engine and engine.model_loaded and cfg["inference_enabled"]):
             return (
                 jsonify(
                     {
                         "error": "Inference not enabled or no model loaded",
-                        "model_loaded": inference_engine is not None
-                        and inference_engine.model_loaded,
-                        "inference_enabled": settings["inference_enabled"],
+                        "model_loaded": engine is not None and engine.model_loaded,
+                        "inference_enabled": cfg["inference_enabled"],
                     }
                 ),
                 400,
             )
 
-        prediction, confidence = inference_engine.predict(image_np)
+        # Preprocess once; a shadow model with the same input reuses it
+        infer_started = time.perf_counter()
+        timing = {}
+        prepared = engine.prepare(image_np)
+        scores = engine.predict_scores(image_np, prepared=prepared, timing=timing)
+        infer_ms = (time.perf_counter() - infer_started) * 1000
+        prediction, confidence = engine.classify(scores)
+        processed = True
+        stages["queue"] = timing.get("queue_ms", 0.0)
+        stages["inference"] = infer_ms - stages["queue"]
+
+        comparison = shadow_comparison
+        if comparison:
+            comparison.submit(
+                image_np, prepared, engine.input_spec(), prediction, confidence, infer_ms
+            )
 
-        # Append prediction to buffer
-        with PREDICTION_BUFFER_LOCK:
-            PREDICTION_BUFFER.append(prediction)
-            buffer_snapshot = list(PREDICTION_BUFFER)
-
-        # Decide consensus only when buffer is full
-        command_to_execute = "Idle"
-        consensus_count = 0
-        most_common = None
-        if len(buffer_snapshot) >= int(settings.get("buffer_size", 5)):
-            counts = Counter(buffer_snapshot)
-            most_common, count = counts.most_common(1)[0]
-            consensus_count = int(count)
-            # Require that most_common is not 'Idle' and meets consensus_required
-            if most_common.lower() != "idle" and count >= int(
-                settings.get("consensus_required", 3)
-            ):
-                command_to_execute = most_common
-            else:
-                command_to_execute = "Idle"
+        trace = {}
+        result = run_command_pipeline(prediction, confidence, snap, trace)
+        result["hints"] = pacing_hints(snap)
+        record_frame_trace(data, arrival_ts, arrived, stages, trace)
+
+        recorder = session_recorder
+        if recorder:
+            capture_ts = data.get("timestamp")
+            recorder.record(
+                image_bytes,
+                arrival_ts,
+                float(capture_ts) / 1000.0 if capture_ts else 0.0,
+                scores,
+                result["command_to_execute"],
+                result["command_executed"],
+                robot_controller.last_command if robot_controller else None,
+            )
+
+        result["clock"] = clock_stamp(arrival_ts)
+        return jsonify(result)
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+    finally:
+        frame_pacer.finish_frame(started, record=processed)
+        if processed:
+            event_store.record(
+                "frame", session=session.get("user_id"), model=current_model_name,
+                team=team_name(current_model_name),
+                value=round((time.time() - arrival_ts) * 1000, 2),
+            )
 
-        # Enforce confidence threshold for the latest frame before counting it as valid
-        frame_valid = confidence >= settings.get("confidence_threshold", 0.65)
 
-        # Rate-control: only send commands at most once per command_interval
-        global last_command_sent_time, last_command_time, LAST_SENT_COMMAND_NAME
-        now = time.time()
-        command_executed = False
+@app.route("/predict_result", methods=["POST"])
+def predict_result():
+    """
+    Accept class probabilities computed by the model in the pilot's browser
+    Expects: JSON with probabilities, seq, timestamp and an optional
+             base64 thumbnail for spectators
+    Returns: JSON with prediction, confidence, and command
+    """
+    if not is_current_pilot():
+        return jsonify({"error": "Not the current pilot"}), 403
 
-        time_since_last = now - last_command_time if last_command_time > 0 else 0
+    arrival_ts = time.time()
+    arrived = time.perf_counter()
+    data = request.get_json(silent=True)
+    stages = {"upload": (time.perf_counter() - arrived) * 1000}
+    if not data or "probabilities" not in data:
+        return jsonify({"error": "No probabilities provided"}), 400
 
-        if command_to_execute != "Idle" and frame_valid:
-            # Enough consensus to move — check rate limit
-            interval = float(settings.get("command_interval", 0.1))
-            if now - last_command_sent_time >= interval:
-                if robot_controller and robot_controller.connected:
-                    robot_controller.execute_command(
-                        command_to_execute, settings["max_speed"]
-                    )
-                    command_executed = True
-                    last_command_sent_time = now
-                    last_command_time = now
-                    # record last sent command name to avoid repeated idle stops
-                    LAST_SENT_COMMAND_NAME = command_to_execute
-        else:
-            # Not enough consensus — ensure robot is stopped
-            if robot_controller and robot_controller.connected:
-                # Only send stop/idle if last sent command was a movement (not already idle)
-                if (
-                    LAST_SENT_COMMAND_NAME is not None
-                    and LAST_SENT_COMMAND_NAME.lower() != "idle"
-                ):
-                    robot_controller.stop()
-                    LAST_SENT_COMMAND_NAME = "Idle"
-                last_command_time = now
+    try:
+        seq = int(data["seq"])
+        timestamp = float(data.get("timestamp", 0))
+        probabilities = np.asarray(data["probabilities"], dtype=np.float32)
+    except (KeyError, TypeError, ValueError):
+        return jsonify({"error": "seq and a numeric probabilities list are required"}), 400
+
+    snap = control.snapshot()
+    engine = inference_engine
+    if not (engine and engine.model_loaded and snap.settings["inference_enabled"]):
+        return (
+            jsonify(
+                {
+                    "error": "Inference not enabled or no model loaded",
+                    "model_loaded": engine is not None and engine.model_loaded,
+                    "inference_enabled": snap.settings["inference_enabled"],
+                }
+            ),
+            400,
+        )
 
-        # Check for timeout (existing behavior)
-        time_since_last = (
-            time.time() - last_command_time if last_command_time > 0 else 0
+    classes = engine.get_classes()
+    if (
+        probabilities.ndim != 1
+        or len(probabilities) != len(classes)
+        or not np.all(np.isfinite(probabilities))
+    ):
+        return (
+            jsonify({"error": f"Expected {len(classes)} finite class probabilities"}),
+            400,
         )
-        if time_since_last > COMMAND_TIMEOUT and last_command_time > 0:
-            if robot_controller and robot_controller.connected:
-                # Only send stop if we previously sent a movement command
-                if (
-                    LAST_SENT_COMMAND_NAME is not None
-                    and LAST_SENT_COMMAND_NAME.lower() != "idle"
-                ):
-                    robot_controller.stop()
-                    LAST_SENT_COMMAND_NAME = "Idle"
-
-        # Update global prediction data for pilot view streamers
-        LAST_PREDICTION_DATA = {
-            "prediction": prediction,
-            "confidence": float(confidence),
-            "command_to_execute": command_to_execute,
-        }
 
-        return jsonify(
-            {
-                "prediction": prediction,
-                "confidence": float(confidence),
-                "threshold": settings["confidence_threshold"],
-                "buffer_size": int(settings.get("buffer_size", 5)),
-                "consensus_required": int(settings.get("consensus_required", 3)),
-                "buffer_snapshot": buffer_snapshot,
-                "most_common": most_common if len(buffer_snapshot) > 0 else None,
-                "consensus_count": consensus_count,
-                "command_to_execute": command_to_execute,
-                "command_executed": command_executed,
-                "time_since_last": time_since_last,
-            }
+    # Drop out-of-order results (a slow request overtaken by a newer one)
+    now = time.time()
+
+    def accept(s):
+        if s.last_result_seq is not None and seq <= s.last_result_seq:
+            return s
+        changes = {"last_result_seq": seq, "pilot_last_active": now}
+        if data.get("thumbnail"):
+            changes["last_pilot_frame"] = data["thumbnail"]
+        return s._replace(**changes)
+
+    previous, snap = control.modify(accept)
+    if previous is snap:
+        return (
+            jsonify({"error": "Stale frame", "seq": seq, "last_seq": snap.last_result_seq}),
+            409,
         )
 
+    try:
+        prediction, confidence = engine.classify(probabilities)
+        trace = {}
+        result = run_command_pipeline(prediction, confidence, snap, trace)
+        record_frame_trace(data, arrival_ts, arrived, stages, trace)
+        result.update({"seq": seq, "timestamp": timestamp, "hints": pacing_hints(snap)})
+        result["clock"] = clock_stamp(arrival_ts)
+        return jsonify(result)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 
+@app.route("/model_file/<path:filename>", methods=["GET"])
+def get_model_file(filename):
+    """Serve the loaded model to the pilot's browser for in-browser inference"""
+    if not is_current_pilot():
+        return jsonify({"error": "Not the current pilot"}), 403
+
+    if filename != current_model_name:
+        return jsonify({"error": "Only the loaded model can be downloaded"}), 404
+
+    # Uploaded filenames carry a timestamp, so their content never changes
+    response = send_from_directory(
+        os.path.abspath(app.config["UPLOAD_FOLDER"]),
+        filename,
+        mimetype="application/octet-stream",
+        max_age=MODEL_FILE_MAX_AGE,
+    )
+    response.headers["Cache-Control"] = (
+        f"private, max-age={MODEL_FILE_MAX_AGE}, immutable"
+    )
+    return response
+
+
 @app.route("/upload_model", methods=["POST"])
 def upload_model():
     """Upload a new TFLite model"""
@@ -684,6 +1638,11 @@ def upload_model():
         file.save(filepath)
 
         control_logger.info("Uploaded model: %s (%s)", model_name, filename)
+        session_teams[session.get("user_id")] = team_name(filename)
+        event_store.record(
+            "upload", session=session.get("user_id"), model=filename, team=team_name(filename),
+            size=os.path.getsize(filepath),
+        )
 
         # Create a default labels file if none provided by the user.
         labels_path = filepath.replace(".tflite", "_labels.txt")
@@ -748,9 +1707,7 @@ def list_models():
 
 @app.route("/load_model", methods=["POST"])
 def load_model():
-    """Load a specific model for inference"""
-    global inference_engine, current_model_name
-
+    """Start loading a model in the background; poll /api/model_load for progress"""
     if not is_current_pilot():
         return jsonify({"error": "Not the current pilot"}), 403
 
@@ -762,19 +1719,76 @@ def load_model():
     if not os.path.exists(filepath):
         return jsonify({"error": "Model file not found"}), 404
 
-    try:
-        if inference_engine is None:
-            inference_engine = ModelInference()
+    if not model_loader.start(filepath, filename, publish_engine):
+        return (
+            jsonify({"error": "Another model is still loading", **model_loader.status()}),
+            409,
+        )
 
-        inference_engine.load_model(filepath)
-        current_model_name = filename
+    control_logger.info("Loading model in background: %s", filename)
+    return (
+        jsonify(
+            {
+                "success": True,
+                "loading": True,
+                "message": f"Loading model: {filename}",
+                "status_url": url_for("model_load_status"),
+            }
+        ),
+        202,
+    )
 
-        control_logger.info("Loaded model: %s", filename)
 
-        return jsonify({"success": True, "message": f"Loaded model: {filename}"})
-    except Exception as e:
-        control_logger.error("Failed to load model: %s", e)
-        return jsonify({"error": str(e)}), 500
+@app.route("/api/model_load", methods=["GET"])
+def model_load_status():
+    """Progress of the current/last background model load"""
+    status = model_loader.status()
+    if status["state"] == "ready":
+        status["model_url"] = url_for("get_model_file", filename=status["model"])
+    status["retired_models"] = len(retired_engines)
+    return jsonify(status)
+
+
+@app.route("/api/compare", methods=["POST"])
+def start_compare():
+    """Load a shadow model to compare against the active one on the pilot's frames"""
+    if not (is_current_pilot() or session.get("is_teacher")):
+        return jsonify({"error": "Only the pilot or teacher can compare models"}), 403
+
+    data = request.get_json(silent=True) or {}
+    filename = secure_filename(data.get("model") or "")
+    if not filename:
+        return jsonify({"error": "model is required"}), 400
+
+    filepath = os.path.join(app.config["UPLOAD_FOLDER"], filename)
+    if not os.path.exists(filepath):
+        return jsonify({"error": "Model file not found"}), 404
+
+    if not shadow_loader.start(filepath, filename, publish_shadow):
+        return (
+            jsonify({"error": "Another shadow model is still loading", **shadow_loader.status()}),
+            409,
+        )
+
+    control_logger.info("Loading shadow model in background: %s", filename)
+    return (
+        jsonify({"success": True, "loading": True, "status_url": url_for("compare_status")}),
+        202,
+    )
+
+
+@app.route("/api/compare", methods=["GET"])
+def compare_status():
+    """Shadow model load progress and live comparison statistics (also on /api/stream)"""
+    return jsonify(compare_state())
+
+
+@app.route("/api/compare/stop", methods=["POST"])
+def stop_compare():
+    """Stop the shadow comparison and release the shadow model"""
+    if not (is_current_pilot() or session.get("is_teacher")):
+        return jsonify({"error": "Only the pilot or teacher can compare models"}), 403
+    return jsonify({"success": True, "summary": stop_shadow()})
 
 
 @app.route("/delete_model", methods=["POST"])
@@ -794,11 +1808,15 @@ def delete_model():
         return jsonify({"error": "Model file not found"}), 404
 
     try:
-        # Unload if it's the current model
+        # Unload if it's the current model (requests in flight keep their reference)
         if current_model_name == filename:
             if inference_engine:
-                inference_engine.unload_model()
+                retire_engine(inference_engine, filename)
+            inference_engine = None
             current_model_name = None
+            save_last_state()
+        if shadow_comparison and shadow_comparison.name == filename:
+            stop_shadow()
 
         os.remove(filepath)
 
@@ -852,7 +1870,12 @@ def start_inference():
         if not robot_controller.connected:
             robot_controller.connect()
 
-        settings["inference_enabled"] = True
+        # New run: browser-side frame sequence numbers restart at 1
+        control.modify(
+            lambda s: s._replace(last_result_seq=None).with_settings(
+                inference_enabled=True
+            )
+        )
 
         return jsonify(
             {
@@ -872,7 +1895,7 @@ def stop_inference():
     if not is_current_pilot():
         return jsonify({"error": "Not the current pilot"}), 403
 
-    settings["inference_enabled"] = False
+    control.update_settings(inference_enabled=False)
 
     if robot_controller and robot_controller.connected:
         robot_controller.stop()
@@ -886,10 +1909,15 @@ def emergency_stop():
     if not is_current_pilot():
         return jsonify({"error": "Not the current pilot"}), 403
 
-    settings["inference_enabled"] = False
+    control.update_settings(inference_enabled=False)
 
     if robot_controller and robot_controller.connected:
         robot_controller.emergency_stop()
+    event_store.record(
+        "safety_stop", session=session.get("user_id"), model=current_model_name,
+        team=team_name(current_model_name),
+        reason="emergency",
+    )
 
     return jsonify({"success": True, "message": "Emergency stop activated"})
 
@@ -912,44 +1940,62 @@ def manage_settings():
         if "buffer_size" in validated:
             reconfigure_prediction_buffer(validated["buffer_size"])
 
-        settings.update(validated)
+        snap = control.update_settings(**validated)
+        save_last_state()
 
-        return jsonify({"success": True, "settings": settings})
+        return jsonify({"success": True, "settings": snap.settings_dict()})
 
-    return jsonify(settings)
+    return jsonify(control.snapshot().settings_dict())
 
 
 @app.route("/status", methods=["GET"])
 def get_status():
     """Get system status"""
-    global last_command_time, robot_controller, LAST_SENT_COMMAND_NAME
-
-    # Background safety check: if no command for a while, stop robot
-    now = time.time()
-    if last_command_time > 0 and (now - last_command_time > COMMAND_TIMEOUT):
-        if robot_controller and robot_controller.connected:
-            if (
-                LAST_SENT_COMMAND_NAME is not None
-                and LAST_SENT_COMMAND_NAME.lower() != "idle"
-            ):
-                robot_controller.stop()
-                LAST_SENT_COMMAND_NAME = "Idle"
-                control_logger.info("Safety timeout: Robot stopped due to inactivity")
+    snap = check_command_timeout()
 
+    engine = inference_engine
     return jsonify(
         {
-            "inference_enabled": settings["inference_enabled"],
-            "model_loaded": inference_engine is not None
-            and inference_engine.model_loaded,
+            "inference_enabled": snap.settings["inference_enabled"],
+            "model_loaded": engine is not None and engine.model_loaded,
             "current_model": current_model_name,
+            "model_input": engine.input_spec() if engine else None,
+            "inference_stats": engine.get_stats() if engine else None,
+            "model_load": model_loader.status(),
             "robot_connected": robot_controller is not None
             and robot_controller.connected,
-            "settings": settings,
+            "robot_commands": robot_controller.get_stats() if robot_controller else None,
+            "robot_telemetry": robot_controller.telemetry() if robot_controller else None,
+            "logging": log_pipeline.stats(),
+            "startup": startup_times,
+            "live_channel": live_channel.status(),
+            "latency": latency_tracer.summary(snap.current_pilot),
+            "static_assets": static_assets.status(),
+            "request_limits": {
+                "rate": rate_limiter.status(),
+                "load": load_shedder.status(),
+            },
+            "settings": snap.settings_dict(),
         }
     )
 
 
-if __name__ == "__main__":
+# New pages get recent activity from before this start, too
+if os.path.exists(control_log_path):
+    for line in read_activity_log(control_log_path):
+        live_channel.log(line.rstrip("\n"))
+
+# Publish live_state() diffs and run live_checks() a few times per second
+live_publisher = LiveState(live_channel, live_state, on_tick=live_checks).start()
+
+
+def main():
+    """Start the background work and serve over HTTPS (see main.py)"""
+    startup_times["imports"] = round(time.perf_counter() - STARTUP_BEGAN, 3)
+    background_startup()
+    ssl_context = dev_ssl_context()
+    startup_times["serving"] = round(time.perf_counter() - STARTUP_BEGAN, 3)
+
     control_logger.info("%s", "=" * 60)
     control_logger.info("GO2 Arrow Control System Starting...")
     control_logger.info("%s", "=" * 60)
@@ -957,8 +2003,6 @@ if __name__ == "__main__":
     control_logger.info("Models will be saved to: %s", os.path.abspath(UPLOAD_FOLDER))
     # Log detected network addresses
     try:
-        import socket
-
         ips = get_network_info()
         for ip in ips:
             control_logger.info("Accessible at: https://%s:5000", ip)
@@ -971,5 +2015,10 @@ if __name__ == "__main__":
         "Accept the security warning in your browser (Advanced -> Proceed)."
     )
 
-    # Run with ad-hoc SSL context to allow camera access over network
-    app.run(host="0.0.0.0", port=5000, debug=False, threaded=True, ssl_context="adhoc")
+    control_logger.info(
+        "Startup: imports %.2fs, serving after %.2fs (model and backends load in the background)",
+        startup_times["imports"], startup_times["serving"],
+    )
+
+    # HTTPS (self-signed) to allow camera access over network
+    app.run(host="0.0.0.0", port=5000, debug=False, threaded=True, ssl_context=ssl_context)
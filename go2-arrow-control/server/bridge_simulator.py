@@ -0,0 +1,331 @@
+"""
+Go2 Bridge Simulator
+Local stand-in for go2_bridge: answers status/move/stop on GO2_ZMQ_CMD_PORT
+with configurable latency, drops and disconnects, integrates the commanded
+velocities into a simulated pose and optionally publishes telemetry
+"""
+
+import heapq
+import json
+import logging
+import math
+import os
+import random
+import threading
+import time
+
+import zmq
+
+DEFAULT_PORT = int(os.getenv("GO2_ZMQ_CMD_PORT", "5555"))
+TELEMETRY_PORT = int(os.getenv("GO2_ZMQ_TELEMETRY_PORT", "0"))
+DEADMAN_TIMEOUT = 1.0  # Seconds without a move before the robot stops by itself
+BATTERY_DRAIN = (0.002, 0.05)  # Percent per second standing, extra percent per metre
+
+
+def latency_sampler(spec, rng=random):
+    """
+    Build a latency sampler from a spec string (all values in milliseconds)
+
+        fixed:5             always 5 ms
+        uniform:2,20        uniform between 2 and 20 ms
+        normal:10,3         mean 10 ms, std 3 ms (clipped at 0)
+        lognormal:8,0.5     median 8 ms, sigma 0.5 (long tail)
+
+    Returns:
+        callable returning a delay in seconds
+    """
+    kind, _, params = spec.partition(":")
+    values = [float(v) for v in params.split(",") if v.strip()]
+    if kind == "fixed" and len(values) == 1:
+        return lambda: values[0] / 1000
+    if kind == "uniform" and len(values) == 2:
+        return lambda: rng.uniform(*values) / 1000
+    if kind == "normal" and len(values) == 2:
+        return lambda: max(0.0, rng.gauss(*values)) / 1000
+    if kind == "lognormal" and len(values) == 2:
+        median, sigma = values
+        return lambda: rng.lognormvariate(math.log(median), sigma) / 1000
+    raise ValueError(f"Bad latency spec: {spec!r}")
+
+
+class SimulatedRobot:
+    """Integrates body-frame velocity commands into a 2D pose.
+
+    Like the real bridge, a movement only lasts deadman_timeout seconds
+    unless it is repeated.
+    """
+
+    def __init__(self, deadman_timeout=DEADMAN_TIMEOUT):
+        self.deadman_timeout = deadman_timeout
+        self.x = self.y = self.yaw = 0.0
+        self.velocity = (0.0, 0.0, 0.0)
+        self.distance = 0.0
+        self.battery = 100.0
+        self.deadman_stops = 0
+        self._last_move = 0.0
+        self._t = time.monotonic()
+
+    def _integrate(self, until):
+        dt = until - self._t
+        if dt <= 0:
+            return
+        vx, vy, vyaw = self.velocity
+        heading = self.yaw + vyaw * dt / 2  # Midpoint heading for the step
+        self.x += (vx * math.cos(heading) - vy * math.sin(heading)) * dt
+        self.y += (vx * math.sin(heading) + vy * math.cos(heading)) * dt
+        self.yaw = math.remainder(self.yaw + vyaw * dt, math.tau)
+        moved = math.hypot(vx, vy) * dt
+        self.distance += moved
+        self.battery = max(0.0, self.battery - BATTERY_DRAIN[0] * dt - BATTERY_DRAIN[1] * moved)
+        self._t = until
+
+    def step(self, now=None):
+        """Advance the pose to `now` (monotonic seconds)."""
+        now = time.monotonic() if now is None else now
+        if any(self.velocity):
+            deadline = self._last_move + self.deadman_timeout
+            if deadline < now:
+                self._integrate(deadline)
+                self.velocity = (0.0, 0.0, 0.0)
+                self.deadman_stops += 1
+        self._integrate(now)
+        self._t = now
+
+    def command(self, vx=0.0, vy=0.0, vyaw=0.0):
+        now = time.monotonic()
+        self.step(now)
+        self.velocity = (float(vx), float(vy), float(vyaw))
+        self._last_move = now
+
+    def state(self):
+        self.step()
+        return {
+            "x": round(self.x, 4),
+            "y": round(self.y, 4),
+            "yaw": round(self.yaw, 4),
+            "velocity": list(self.velocity),
+            "distance": round(self.distance, 4),
+            "battery": round(self.battery, 2),
+            "deadman_stops": self.deadman_stops,
+        }
+
+
+class BridgeSimulator:
+    """ZMQ stand-in for go2_bridge.
+
+    Uses a ROUTER socket so requests can be answered late (latency) or not
+    at all (drops) without blocking the loop; GO2Controller's REQ socket
+    cannot tell the difference. Requests from different sockets (commands
+    and the e-stop channel) are handled as they arrive, even while another
+    one awaits its reply; `serial` instead handles one request at a time,
+    like a bridge on a REP socket.
+
+    Args:
+        port: TCP port (default GO2_ZMQ_CMD_PORT)
+        bind: Interface to bind
+        latency: Latency spec, see latency_sampler()
+        drop_rate: Fraction of requests that never get a reply
+        disconnect_every: Mean seconds between simulated outages (0: never)
+        disconnect_for: Length of each outage in seconds
+        deadman_timeout: Seconds a move lasts without being repeated
+        serial: Read the next request only after replying to the last one
+        telemetry_port: PUB port for telemetry samples (0: off)
+        telemetry_hz: Telemetry publish rate
+        seed: Random seed for reproducible runs
+    """
+
+    def __init__(self, port=DEFAULT_PORT, bind="127.0.0.1", latency="fixed:0",
+                 drop_rate=0.0, disconnect_every=0.0, disconnect_for=2.0,
+                 deadman_timeout=DEADMAN_TIMEOUT, telemetry_port=TELEMETRY_PORT,
+                 telemetry_hz=10.0, serial=False, seed=None):
+        self.address = f"tcp://{bind}:{port}"
+        self.telemetry_address = f"tcp://{bind}:{telemetry_port}" if telemetry_port else None
+        self.telemetry_period = 1.0 / telemetry_hz
+        self.rng = random.Random(seed)
+        self.latency = latency_sampler(latency, self.rng)
+        self.drop_rate = drop_rate
+        self.disconnect_every = disconnect_every
+        self.disconnect_for = disconnect_for
+        self.robot = SimulatedRobot(deadman_timeout)
+        self.serial = serial
+        self.logger = logging.getLogger("control")
+        self.stats = {"requests": 0, "replies": 0, "dropped": 0, "disconnects": 0,
+                      "commands": {}}
+        self._ctx = zmq.Context.instance()
+        self._running = False
+        self._thread = None
+        self._seq = 0
+        self._last_ack = None
+
+    def start(self):
+        """Run the simulator on a background thread; returns self."""
+        self._running = True
+        self._thread = threading.Thread(target=self.run, name="bridge-simulator", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._running = False
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+    def _bind(self, kind=zmq.ROUTER, address=None):
+        address = address or self.address
+        sock = self._ctx.socket(kind)
+        sock.setsockopt(zmq.LINGER, 0)
+        for _ in range(50):
+            try:
+                sock.bind(address)
+                return sock
+            except zmq.ZMQError:
+                time.sleep(0.05)  # Previous socket still releasing the port
+        sock.close()
+        raise RuntimeError(f"Could not bind {address}")
+
+    def _telemetry_sample(self):
+        state = self.robot.state()
+        return {
+            "ts": time.time(),
+            "battery": state["battery"],
+            "velocity": state["velocity"],
+            "mode": "moving" if any(state["velocity"]) else "standing",
+            "last_ack": self._last_ack,
+            "pose": {k: state[k] for k in ("x", "y", "yaw")},
+        }
+
+    def _next_outage(self, now):
+        if self.disconnect_every <= 0:
+            return None
+        return now + self.rng.expovariate(1.0 / self.disconnect_every)
+
+    def _handle(self, msg):
+        cmd = msg.get("cmd")
+        params = msg.get("params") or {}
+        commands = self.stats["commands"]
+        commands[cmd] = commands.get(cmd, 0) + 1
+        if cmd in ("move", "stop"):
+            self._last_ack = {"cmd": cmd, "ts": time.time()}
+
+        if cmd == "status":
+            return {"ok": True, "simulated": True, "pose": self.robot.state()}
+        if cmd == "move":
+            self.robot.command(params.get("vx", 0.0), params.get("vy", 0.0), params.get("vyaw", 0.0))
+            return {"ok": True}
+        if cmd == "stop":
+            self.robot.command()
+            return {"ok": True}
+        return {"ok": False, "error": f"unknown command {cmd!r}"}
+
+    def run(self):
+        """Serve requests until stop() (blocking)."""
+        self._running = True
+        sock = self._bind()
+        self.logger.info("Bridge simulator listening on %s", self.address)
+        pending = []  # heap of (due, seq, frames)
+        next_outage = self._next_outage(time.monotonic())
+        pub = None
+        next_publish = None
+        if self.telemetry_address:
+            pub = self._bind(zmq.PUB, self.telemetry_address)
+            next_publish = time.monotonic()
+
+        try:
+            while self._running:
+                now = time.monotonic()
+
+                if next_outage and now >= next_outage:
+                    # Drop everything in flight and go away for a while
+                    sock.close()
+                    pending.clear()
+                    self.stats["disconnects"] += 1
+                    self.logger.info("Bridge simulator offline for %.1fs", self.disconnect_for)
+                    back = now + self.disconnect_for
+                    while self._running and time.monotonic() < back:
+                        time.sleep(0.05)
+                    sock = self._bind()
+                    next_outage = self._next_outage(time.monotonic())
+                    continue
+
+                while pending and pending[0][0] <= now:
+                    _, _, frames = heapq.heappop(pending)
+                    sock.send_multipart(frames)
+                    self.stats["replies"] += 1
+
+                if pub and now >= next_publish:
+                    pub.send_json(self._telemetry_sample())
+                    next_publish = max(next_publish + self.telemetry_period, now)
+
+                wait = 0.05 if not pending else max(0.0, pending[0][0] - now)
+                for deadline in (next_outage, next_publish):
+                    if deadline:
+                        wait = min(wait, max(0.0, deadline - now))
+                if self.serial and pending:
+                    time.sleep(wait)  # A REP socket reads nothing until it has replied
+                    continue
+                if not sock.poll(int(wait * 1000) or 1):
+                    continue
+
+                # REQ sends [b"", payload]; ROUTER prepends the peer identity
+                frames = sock.recv_multipart()
+                self.stats["requests"] += 1
+                if self.rng.random() < self.drop_rate:
+                    self.stats["dropped"] += 1
+                    continue
+                try:
+                    reply = self._handle(json.loads(frames[-1]))
+                except ValueError:
+                    reply = {"ok": False, "error": "invalid JSON"}
+                self._seq += 1
+                heapq.heappush(
+                    pending,
+                    (time.monotonic() + self.latency(), self._seq,
+                     frames[:-1] + [json.dumps(reply).encode()]),
+                )
+        finally:
+            sock.close()
+            if pub:
+                pub.close()
+
+
+# Command line: python bridge_simulator.py [--latency lognormal:8,0.5] [--drop 0.01] ...
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Local Go2 bridge simulator")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--bind", default="127.0.0.1")
+    parser.add_argument("--latency", default="fixed:0",
+                        help="fixed:MS | uniform:MIN,MAX | normal:MEAN,STD | lognormal:MEDIAN,SIGMA")
+    parser.add_argument("--drop", type=float, default=0.0, help="Fraction of requests left unanswered")
+    parser.add_argument("--disconnect-every", type=float, default=0.0,
+                        help="Mean seconds between outages (0: never)")
+    parser.add_argument("--disconnect-for", type=float, default=2.0, help="Outage length in seconds")
+    parser.add_argument("--deadman", type=float, default=DEADMAN_TIMEOUT)
+    parser.add_argument("--telemetry-port", type=int, default=TELEMETRY_PORT,
+                        help="Publish telemetry on this port (0: off)")
+    parser.add_argument("--telemetry-hz", type=float, default=10.0)
+    parser.add_argument("--serial", action="store_true",
+                        help="Handle one request at a time, like a REP socket")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [SIM] %(message)s")
+    simulator = BridgeSimulator(
+        port=args.port,
+        bind=args.bind,
+        latency=args.latency,
+        drop_rate=args.drop,
+        disconnect_every=args.disconnect_every,
+        disconnect_for=args.disconnect_for,
+        deadman_timeout=args.deadman,
+        telemetry_port=args.telemetry_port,
+        telemetry_hz=args.telemetry_hz,
+        serial=args.serial,
+        seed=args.seed,
+    )
+    try:
+        simulator.run()
+    except KeyboardInterrupt:
+        pass
+    print(json.dumps({**simulator.stats, "pose": simulator.robot.state()}, indent=2))
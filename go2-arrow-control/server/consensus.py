@@ -0,0 +1,34 @@
+"""
+Consensus Logic
+Turns a buffer of recent predictions into a robot command
+"""
+
+from collections import Counter
+
+
+def decide_command(buffer_snapshot, buffer_size, consensus_required):
+    """
+    Decide which command the prediction buffer agrees on
+
+    Args:
+        buffer_snapshot: List of recent predicted class names (oldest first)
+        buffer_size: Number of predictions needed before deciding
+        consensus_required: Minimum votes for the most common class
+
+    Returns:
+        tuple: (command_to_execute, most_common, consensus_count)
+    """
+    command_to_execute = "Idle"
+    consensus_count = 0
+    most_common = None
+
+    # Decide consensus only when buffer is full
+    if len(buffer_snapshot) >= buffer_size:
+        counts = Counter(buffer_snapshot)
+        most_common, count = counts.most_common(1)[0]
+        consensus_count = int(count)
+        # Require that most_common is not 'Idle' and meets consensus_required
+        if most_common.lower() != "idle" and count >= consensus_required:
+            command_to_execute = most_common
+
+    return command_to_execute, most_common, consensus_count
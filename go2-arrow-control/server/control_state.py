@@ -0,0 +1,150 @@
+"""
+Control State
+Copy-on-write holder for pilot, lock, settings and last-frame state
+"""
+
+import threading
+from collections import namedtuple
+from types import MappingProxyType
+
+_SNAPSHOT_FIELDS = (
+    "current_pilot",
+    "pilot_last_active",
+    "system_locked",
+    "settings",
+    "last_command_time",
+    "last_command_sent_time",
+    "last_sent_command_name",
+    "last_pilot_frame",
+    "last_prediction_data",
+    "last_result_seq",
+)
+
+
+class ControlSnapshot(
+    namedtuple(
+        "ControlSnapshot",
+        _SNAPSHOT_FIELDS,
+        defaults=(
+            None, 0.0, False, MappingProxyType({}), 0.0, 0.0, None, None, None, None
+        ),
+    )
+):
+    """Immutable view of the control state.
+
+    ``settings`` is a read-only mapping; use ``with_settings`` to derive a
+    snapshot with changed values.
+    """
+
+    __slots__ = ()
+
+    def with_settings(self, **changes):
+        merged = dict(self.settings)
+        merged.update(changes)
+        return self._replace(settings=MappingProxyType(merged))
+
+    def release_pilot(self):
+        """Snapshot with no pilot and inference disabled."""
+        return self._replace(
+            current_pilot=None, pilot_last_active=0, last_result_seq=None
+        ).with_settings(inference_enabled=False)
+
+    def settings_dict(self):
+        """Plain dict copy of the settings (for jsonify)."""
+        return dict(self.settings)
+
+
+class ControlState:
+    """Publishes immutable snapshots; readers never lock.
+
+    Writers serialize on a private lock and swap in a new snapshot with a
+    single reference assignment, so a reader always sees one consistent
+    version of every field.
+    """
+
+    def __init__(self, settings=None):
+        self._write_lock = threading.Lock()
+        self._snapshot = ControlSnapshot(settings=MappingProxyType(dict(settings or {})))
+
+    def snapshot(self):
+        """Return the current snapshot without blocking."""
+        return self._snapshot
+
+    def modify(self, fn):
+        """Atomically replace the snapshot with ``fn(snapshot)``.
+
+        Returns ``(previous, current)``. If ``fn`` returns the snapshot it
+        was given, nothing is published and both values are the same object.
+        """
+        with self._write_lock:
+            previous = self._snapshot
+            current = fn(previous)
+            if current is None:
+                current = previous
+            self._snapshot = current
+            return previous, current
+
+    def update(self, **changes):
+        """Publish a snapshot with the given fields replaced."""
+        return self.modify(lambda s: s._replace(**changes))[1]
+
+    def update_settings(self, **changes):
+        """Publish a snapshot with the given settings replaced."""
+        return self.modify(lambda s: s.with_settings(**changes))[1]
+
+
+# Micro-benchmark: locked reads vs. snapshot reads under thread contention.
+# For the effect on real requests, see the load test numbers in DEV_README.md
+if __name__ == "__main__":
+    import sys
+    import time
+
+    threads = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    reads = int(sys.argv[2]) if len(sys.argv) > 2 else 200000
+
+    lock = threading.Lock()
+    legacy = {"current_pilot": "abc", "settings": {"confidence_threshold": 0.65}}
+    state = ControlState({"confidence_threshold": 0.65})
+    state.update(current_pilot="abc")
+
+    def locked_reader():
+        for _ in range(reads):
+            with lock:
+                legacy["current_pilot"] == "abc"
+                legacy["settings"]["confidence_threshold"]
+
+    def snapshot_reader():
+        for _ in range(reads):
+            snap = state.snapshot()
+            snap.current_pilot == "abc"
+            snap.settings["confidence_threshold"]
+
+    def writer(stop, fn):
+        while not stop.is_set():
+            fn()
+            time.sleep(0.001)
+
+    def legacy_write():
+        with lock:
+            legacy["pilot_last_active"] = time.time()
+
+    def snapshot_write():
+        state.update(pilot_last_active=time.time())
+
+    for label, reader, write in (
+        ("locked", locked_reader, legacy_write),
+        ("snapshot", snapshot_reader, snapshot_write),
+    ):
+        stop = threading.Event()
+        w = threading.Thread(target=writer, args=(stop, write))
+        w.start()
+        workers = [threading.Thread(target=reader) for _ in range(threads)]
+        start = time.perf_counter()
+        for t in workers:
+            t.start()
+        for t in workers:
+            t.join()
+        elapsed = time.perf_counter() - start
+        stop.set()
+        w.join()
+        print(f"{label:>8}: {threads * reads / elapsed:,.0f} reads/s ({threads} threads)")
@@ -0,0 +1,309 @@
+"""
+Event Store
+Structured workshop events (uploads, model loads, pilot changes, commands,
+safety stops, frame latencies) in a local SQLite database (WAL mode),
+written in batches from a background thread
+"""
+
+import glob
+import json
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+from contextlib import closing
+
+BATCH_SIZE = 500  # Max events per transaction
+FLUSH_INTERVAL = 1.0  # Seconds an event may wait before being written
+MAINTENANCE_INTERVAL = 3600.0  # Seconds between retention/rotation checks
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY,
+    ts REAL NOT NULL,
+    type TEXT NOT NULL,
+    session TEXT,
+    model TEXT,
+    team TEXT,
+    value REAL,
+    data TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_events_ts ON events(ts);
+CREATE INDEX IF NOT EXISTS idx_events_type_ts ON events(type, ts);
+CREATE INDEX IF NOT EXISTS idx_events_session_ts ON events(session, ts);
+CREATE INDEX IF NOT EXISTS idx_events_model_ts ON events(model, ts);
+CREATE INDEX IF NOT EXISTS idx_events_team_ts ON events(team, ts);
+"""
+
+FILTER_COLUMNS = ("type", "session", "model", "team")
+
+
+def team_name(model_filename):
+    """Team/model name from an upload filename (name_YYYYMMDD_HHMMSS.tflite)."""
+    if not model_filename:
+        return None
+    parts = model_filename.replace(".tflite", "").rsplit("_", 2)
+    if len(parts) >= 3:
+        return parts[0].replace("_", " ")
+    return model_filename.split("_")[0]
+
+
+class EventStore:
+    """Batched, non-blocking event log with time-range queries and aggregates.
+
+    record() only enqueues; a writer thread commits events in batches.
+    Readers open their own connections, which WAL lets run alongside the
+    writer.
+
+    Args:
+        path: SQLite database file
+        retention_days: Events older than this are deleted (0: keep all)
+        max_bytes: Rotate the database file once it grows past this (0: never)
+        keep_rotated: Rotated files to keep next to the live one
+        max_queue: Events buffered before new ones are dropped
+    """
+
+    def __init__(self, path, retention_days=30, max_bytes=200 * 1024 * 1024,
+                 keep_rotated=3, max_queue=10000):
+        self.path = path
+        self.retention_days = retention_days
+        self.max_bytes = max_bytes
+        self.keep_rotated = keep_rotated
+        self.logger = logging.getLogger("control")
+        self.written = 0
+        self.dropped = 0
+        self._queue = queue.Queue(maxsize=max_queue)
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = self._connect()
+        self._thread = threading.Thread(target=self._run, name="event-store", daemon=True)
+        self._thread.start()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(SCHEMA)
+        return conn
+
+    # --- Writing ---
+
+    def record(self, event_type, session=None, model=None, team=None, value=None, ts=None, **data):
+        """
+        Queue one event; never blocks (drops it if the writer is far behind)
+
+        Args:
+            team: Team the event counts for in stats(); taken from the model
+                filename if not given, so events without a model (pilot
+                changes) need it passed explicitly
+        """
+        if team is None:
+            team = team_name(model)
+        try:
+            self._queue.put_nowait(
+                (ts or time.time(), event_type, session, model, team, value,
+                 json.dumps(data) if data else None)
+            )
+        except queue.Full:
+            self.dropped += 1
+
+    def close(self):
+        """Write pending events and close the database."""
+        self._queue.put(None)
+        self._thread.join()
+
+    def _run(self):
+        next_maintenance = time.monotonic()
+        running = True
+        while running:
+            batch = []
+            try:
+                item = self._queue.get(timeout=FLUSH_INTERVAL)
+                deadline = time.monotonic() + FLUSH_INTERVAL
+                while item is not None:
+                    batch.append(item)
+                    if len(batch) >= BATCH_SIZE:
+                        break
+                    item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                running = item is not None
+            except queue.Empty:
+                pass
+
+            if batch:
+                try:
+                    with self._conn:
+                        self._conn.executemany(
+                            "INSERT INTO events (ts, type, session, model, team, value, data)"
+                            " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                            batch,
+                        )
+                    self.written += len(batch)
+                except sqlite3.Error as e:
+                    self.logger.error("Event store write failed (%d events): %s", len(batch), e)
+
+            if time.monotonic() >= next_maintenance:
+                next_maintenance = time.monotonic() + MAINTENANCE_INTERVAL
+                self._maintain()
+
+        self._conn.close()
+
+    def _maintain(self):
+        """Apply retention and rotate the file if it is too large."""
+        try:
+            if self.retention_days > 0:
+                cutoff = time.time() - self.retention_days * 86400
+                with self._conn:
+                    deleted = self._conn.execute("DELETE FROM events WHERE ts < ?", (cutoff,)).rowcount
+                if deleted:
+                    self.logger.info("Event store: removed %d events older than %d days",
+                                     deleted, self.retention_days)
+            if self.max_bytes and self._size() > self.max_bytes:
+                self._rotate()
+        except (sqlite3.Error, OSError) as e:
+            self.logger.error("Event store maintenance failed: %s", e)
+
+    def _size(self):
+        wal = self.path + "-wal"
+        return os.path.getsize(self.path) + (os.path.getsize(wal) if os.path.exists(wal) else 0)
+
+    def _rotate(self):
+        self._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        self._conn.close()
+        base, ext = os.path.splitext(self.path)
+        rotated = f"{base}-{time.strftime('%Y%m%d_%H%M%S')}{ext}"
+        os.replace(self.path, rotated)
+        for suffix in ("-wal", "-shm"):
+            if os.path.exists(self.path + suffix):
+                os.remove(self.path + suffix)
+        for old in sorted(glob.glob(f"{base}-*{ext}"))[:-self.keep_rotated or None]:
+            os.remove(old)
+        self._conn = self._connect()
+        self.logger.info("Event store rotated to %s", rotated)
+
+    # --- Reading ---
+
+    def _reader(self):
+        conn = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    @staticmethod
+    def _where(start=None, end=None, **filters):
+        clauses, params = [], []
+        if start is not None:
+            clauses.append("ts >= ?")
+            params.append(start)
+        if end is not None:
+            clauses.append("ts < ?")
+            params.append(end)
+        for column in FILTER_COLUMNS:
+            if filters.get(column):
+                clauses.append(f"{column} = ?")
+                params.append(filters[column])
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def query(self, start=None, end=None, limit=500, **filters):
+        """
+        Events in a time range, newest first
+
+        Args:
+            start, end: Epoch seconds (end exclusive), None for open ends
+            limit: Maximum number of events
+            filters: Any of type, session, model, team
+
+        Returns:
+            list of event dicts
+        """
+        where, params = self._where(start, end, **filters)
+        with closing(self._reader()) as conn:
+            rows = conn.execute(
+                "SELECT ts, type, session, model, team, value, data FROM events"
+                f"{where} ORDER BY ts DESC LIMIT ?",
+                params + [int(limit)],
+            ).fetchall()
+        events = []
+        for row in rows:
+            event = dict(row)
+            event["data"] = json.loads(event["data"]) if event["data"] else {}
+            events.append(event)
+        return events
+
+    def stats(self, start=None, end=None, **filters):
+        """
+        Aggregates for a time range: event counts by type and, per team,
+        sessions, loads, commands, safety stops and frame latency
+
+        Args:
+            start, end: Epoch seconds (end exclusive)
+            filters: Any of type, session, model, team
+        """
+        where, params = self._where(start, end, **filters)
+        with closing(self._reader()) as conn:
+            by_type = {
+                row["type"]: row["n"]
+                for row in conn.execute(
+                    f"SELECT type, COUNT(*) AS n FROM events{where} GROUP BY type", params
+                )
+            }
+            teams = {}
+            for row in conn.execute(
+                "SELECT team,"
+                " COUNT(DISTINCT session) AS sessions,"
+                " SUM(type = 'model_load') AS model_loads,"
+                " SUM(type = 'command') AS commands,"
+                " SUM(type = 'safety_stop') AS safety_stops,"
+                " SUM(type = 'frame') AS frames,"
+                " AVG(CASE WHEN type = 'frame' THEN value END) AS mean_frame_ms,"
+                " MAX(CASE WHEN type = 'frame' THEN value END) AS max_frame_ms,"
+                " MIN(ts) AS first_ts, MAX(ts) AS last_ts"
+                f" FROM events{where}{' AND' if where else ' WHERE'} team IS NOT NULL"
+                " GROUP BY team ORDER BY team",
+                params,
+            ):
+                team = dict(row)
+                if team["mean_frame_ms"] is not None:
+                    team["mean_frame_ms"] = round(team["mean_frame_ms"], 2)
+                teams[team.pop("team")] = team
+
+            frame_where, frame_params = self._where(start, end, **{**filters, "type": "frame"})
+            frames = conn.execute(
+                f"SELECT COUNT(*) FROM events{frame_where}", frame_params
+            ).fetchone()[0]
+            percentiles = {}
+            for p in (50, 95, 99):
+                if not frames:
+                    break
+                row = conn.execute(
+                    f"SELECT value FROM events{frame_where} ORDER BY value LIMIT 1 OFFSET ?",
+                    frame_params + [min(frames - 1, frames * p // 100)],
+                ).fetchone()
+                percentiles[f"p{p}"] = round(row[0], 2) if row and row[0] is not None else None
+
+        return {
+            "events": sum(by_type.values()),
+            "by_type": by_type,
+            "teams": teams,
+            "frame_ms": percentiles,
+        }
+
+    def status(self):
+        return {
+            "path": self.path,
+            "written": self.written,
+            "dropped": self.dropped,
+            "queued": self._queue.qsize(),
+        }
+
+
+# Command line: python event_store.py <events.db> [team]  -- print aggregate stats
+if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) < 2:
+        print("Usage: python event_store.py <events.db> [team]")
+        sys.exit(1)
+    store = EventStore(sys.argv[1], retention_days=0, max_bytes=0)
+    print(json.dumps(store.stats(team=sys.argv[2] if len(sys.argv) > 2 else None), indent=2))
+    store.close()
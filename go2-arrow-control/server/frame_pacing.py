@@ -0,0 +1,114 @@
+"""
+Frame Pacing
+Backpressure hints (frame rate, JPEG quality, capture width) for browser clients
+"""
+
+import threading
+import time
+
+# Quality/size steps, from "plenty of headroom" down to "saturated"
+QUALITY_STEPS = (
+    # (min capacity/demand ratio, jpeg_quality, capture_width)
+    (1.0, 0.8, 640),
+    (0.6, 0.7, 480),
+    (0.0, 0.6, 320),
+)
+# Seconds without a finished frame after which the service time no longer
+# counts as current load (the pilot stopped sending)
+LOAD_STALE_AFTER = 1.0
+
+
+class FramePacer:
+    """Tracks how fast the server finishes frames and recommends a send rate.
+
+    The pilot's browser should send just fewer frames than the server can
+    finish, so requests never queue up behind the inference lock.
+    """
+
+    def __init__(self, default_fps=10.0, min_fps=2.0, max_fps=15.0,
+                 target_utilization=0.85, smoothing=0.2):
+        self.default_fps = default_fps
+        self.min_fps = min_fps
+        self.max_fps = max_fps
+        self.target_utilization = target_utilization
+        self.smoothing = smoothing
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.service_time = None  # EWMA of per-frame server time (seconds)
+        self.last_finished = None  # time.monotonic() of the last finished frame
+
+    def start_frame(self):
+        """Mark a frame as in flight; returns a token for finish_frame."""
+        with self.lock:
+            self.in_flight += 1
+        return time.perf_counter()
+
+    def finish_frame(self, started, record=True):
+        """Mark a frame as done; record its service time if it was processed."""
+        elapsed = time.perf_counter() - started
+        with self.lock:
+            self.in_flight = max(0, self.in_flight - 1)
+            self.last_finished = time.monotonic()
+            if record:
+                if self.service_time is None:
+                    self.service_time = elapsed
+                else:
+                    self.service_time += self.smoothing * (elapsed - self.service_time)
+
+    def load(self):
+        """
+        (frames waiting behind the one being processed, smoothed service time
+        in seconds); the service time is None once no frame has finished for
+        LOAD_STALE_AFTER seconds, so one slow frame is not overload forever
+        """
+        last = self.last_finished
+        if last is None or time.monotonic() - last > LOAD_STALE_AFTER:
+            return max(0, self.in_flight - 1), None
+        return max(0, self.in_flight - 1), self.service_time
+
+    def hints(self, command_interval, buffer_size=1):
+        """
+        Recommend client pacing
+
+        Args:
+            command_interval: Minimum seconds between robot commands
+            buffer_size: Frames the consensus buffer needs per decision
+
+        Returns:
+            dict: fps, jpeg_quality, capture_width plus the measurements used
+        """
+        service_time = self.service_time
+        queue_depth = max(0, self.in_flight - 1)
+
+        # More frames than the consensus buffer can use per command are wasted
+        useful_fps = max(self.min_fps, min(self.max_fps, buffer_size / command_interval))
+
+        if not service_time:
+            # Nothing measured yet: start from the classic client defaults
+            _, quality, width = QUALITY_STEPS[0]
+            return {
+                "fps": min(self.default_fps, useful_fps),
+                "jpeg_quality": quality,
+                "capture_width": width,
+                "server_ms": None,
+                "queue_depth": queue_depth,
+            }
+
+        capacity = self.target_utilization / service_time
+        # Frames already waiting mean the server is behind: back off further
+        capacity /= 1 + queue_depth
+
+        fps = max(self.min_fps, min(useful_fps, capacity))
+
+        ratio = capacity / useful_fps
+        for min_ratio, quality, width in QUALITY_STEPS:
+            if ratio >= min_ratio:
+                break
+
+        return {
+            "fps": round(fps, 1),
+            "jpeg_quality": quality,
+            "capture_width": width,
+            "server_ms": round(service_time * 1000, 1),
+            "queue_depth": queue_depth,
+        }
@@ -4,23 +4,89 @@ Handles model loading and prediction
 """
 
 import numpy as np
-import cv2
-"""
-TensorFlow Lite Inference Engine
-Handles model loading and prediction
-"""
-
-import numpy as np
-import cv2
 import json
 import os
 import logging
 import threading
-
-try:
-    import tflite_runtime.interpreter as tflite
-except ImportError:
-    import tensorflow.lite as tflite
+import time
+
+# OpenCV and the TFLite runtime are slow to import (full TensorFlow when
+# tflite_runtime is missing): they are loaded on first use or by preload()
+cv2 = None
+tflite = None
+_import_lock = threading.Lock()
+
+
+def _load_cv2():
+    global cv2
+    if cv2 is None:
+        with _import_lock:
+            if cv2 is None:
+                import cv2 as _cv2
+                cv2 = _cv2
+    return cv2
+
+
+def _load_tflite():
+    global tflite
+    if tflite is None:
+        with _import_lock:
+            if tflite is None:
+                try:
+                    import tflite_runtime.interpreter as _tflite
+                except ImportError:
+                    import tensorflow.lite as _tflite
+                tflite = _tflite
+    return tflite
+
+
+def preload(interpreter=True):
+    """Import the heavy dependencies now (e.g. from a background thread at startup)."""
+    _load_cv2()
+    if interpreter:
+        _load_tflite()
+
+
+def process_memory(pid="self"):
+    """
+    Resident memory of a process, from /proc/<pid>/smaps_rollup (Linux)
+
+    Returns:
+        dict: rss_kb, pss_kb (shared pages split between their users),
+        anon_kb (private heap: tensor arena, packed weights) and file_kb
+        (mapped files, e.g. a model mapped from the page cache), or None
+        where unavailable
+    """
+    fields = {}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for line in f:
+                key, _, value = line.partition(":")
+                if value.strip().endswith("kB"):
+                    fields[key] = int(value.split()[0])
+    except (OSError, ValueError):
+        return None
+    rss = fields.get("Rss", 0)
+    anon = fields.get("Anonymous", 0)
+    return {"rss_kb": rss, "pss_kb": fields.get("Pss", 0), "anon_kb": anon, "file_kb": rss - anon}
+
+
+def memory_change(before, after):
+    """Process memory before and after loading a model, and the difference (kB)."""
+    if not before or not after:
+        return None
+    return {
+        "before": before,
+        "after": after,
+        "delta": {key: after[key] - before[key] for key in after},
+    }
+
+# Near-duplicate frame detection: mean absolute difference (0-255 scale) of a
+# tiny thumbnail below which the previous output vector is reused. 0 disables.
+DUPLICATE_THRESHOLD = float(os.getenv("GO2_DUPLICATE_THRESHOLD", "3.0"))
+# Force a real inference after this many consecutive reuses
+MAX_DUPLICATE_REUSE = int(os.getenv("GO2_MAX_DUPLICATE_REUSE", "20"))
+FINGERPRINT_SIZE = 16  # Thumbnail edge length used for the fingerprint
 
 
 class ModelInference:
@@ -36,19 +102,34 @@ class ModelInference:
         self.mismatch_message = None
         self.logger = logging.getLogger('control')
         self.lock = threading.Lock()
+        self.memory = None  # Process memory around the last model load
 
-    def load_model(self, model_path):
-        """Load a TFLite model"""
+        # Near-duplicate cache (guarded by self.lock)
+        self.duplicate_threshold = DUPLICATE_THRESHOLD
+        self._reset_duplicate_cache()
+
+    def _reset_duplicate_cache(self):
+        self._last_fingerprint = None
+        self._last_output = None
+        self._reuse_count = 0
+        self.stats = {"frames": 0, "cache_hits": 0, "invoke_ms": None}
+
+    def load_model(self, model_path, progress=None):
+        """
+        Load a TFLite model
+
+        Args:
+            model_path: .tflite file
+            progress: Optional callback(stage, fraction) for load progress
+        """
+        report = progress or (lambda stage, fraction: None)
         try:
             self.logger.info("Loading model from: %s", model_path)
 
-            # Load the TFLite model
-            self.interpreter = tflite.Interpreter(model_path=model_path)
-            self.interpreter.allocate_tensors()
-
-            # Get input and output details
-            self.input_details = self.interpreter.get_input_details()
-            self.output_details = self.interpreter.get_output_details()
+            # Load the TFLite model and get input and output details
+            _load_cv2()
+            report("interpreter", 0.1)
+            self._create_interpreter(model_path)
 
             # Get input shape
             self.input_shape = self.input_details[0]['shape'][1:3]  # [height, width]
@@ -70,8 +151,15 @@ class ModelInference:
             self.logger.info("Input shape: %s", self.input_shape)
             self.logger.info("Input dtype: %s", self.input_details[0]['dtype'])
             self.logger.info("Output shape: %s", self.output_details[0]['shape'])
+            if self.memory:
+                delta = self.memory["delta"]
+                self.logger.info(
+                    "Model memory: %+.1f MB private, %+.1f MB mapped from the model file",
+                    delta["anon_kb"] / 1024, delta["file_kb"] / 1024,
+                )
 
             # Try to load labels from metadata or use defaults
+            report("labels", 0.6)
             self._load_labels(model_path)
 
             # Validate class count vs model output
@@ -89,6 +177,8 @@ class ModelInference:
                     elif len(self.classes) > self.num_classes:
                         self.classes = self.classes[:self.num_classes]
 
+            with self.lock:
+                self._reset_duplicate_cache()
             self.model_loaded = True
 
         except Exception as e:
@@ -96,6 +186,33 @@ class ModelInference:
             self.model_loaded = False
             raise
 
+    def _create_interpreter(self, model_path):
+        """Create the interpreter and set input_details/output_details.
+
+        Loads by path on purpose: the runtime maps the file read-only, so
+        all interpreters and processes using a model share its page-cache
+        pages. model_content would copy it into private memory (and only
+        accepts bytes, not an mmap).
+        """
+        before = process_memory()
+        self.interpreter = _load_tflite().Interpreter(model_path=model_path)
+        self.interpreter.allocate_tensors()
+        self.memory = memory_change(before, process_memory())
+        self.input_details = self.interpreter.get_input_details()
+        self.output_details = self.interpreter.get_output_details()
+
+    def warm_up(self):
+        """Run one inference on a blank input so the first real frame is not slow."""
+        blank = np.zeros(self.input_details[0]['shape'], dtype=self.input_details[0]['dtype'])
+        with self.lock:
+            self._invoke(blank)
+
+    def _invoke(self, input_data):
+        """Run the interpreter on one preprocessed batch (hold self.lock)."""
+        self.interpreter.set_tensor(self.input_details[0]['index'], input_data)
+        self.interpreter.invoke()
+        return self.interpreter.get_tensor(self.output_details[0]['index']).copy()
+
     def _load_labels(self, model_path):
         """Try to load class labels from a labels file or metadata"""
         labels_path = model_path.replace('.tflite', '_labels.txt')
@@ -117,12 +234,36 @@ class ModelInference:
         Args:
             image: RGB numpy array from browser frame capture.
         """
-        # Resize to model input size
-        img = cv2.resize(image, (self.input_shape[1], self.input_shape[0]))
+        return self._prepare(image)[0]
+
+    def prepare(self, image):
+        """Preprocess an image once for predict_scores(prepared=...).
+
+        Returns:
+            tuple: (input_data, fingerprint)
+        """
+        return self._prepare(image)
+
+    def _prepare(self, image):
+        """Preprocess an image; returns (input_data, fingerprint)."""
+        # Resize to model input size (browsers that read input_spec() already
+        # send frames at this size, so skip the resize for those)
+        height, width = int(self.input_shape[0]), int(self.input_shape[1])
+        if image.shape[0] == height and image.shape[1] == width:
+            img = image
+        else:
+            img = cv2.resize(image, (width, height))
 
         # Assume image is already in correct color format (handled by endpoint)
         img_rgb = img
 
+        # Cheap fingerprint for near-duplicate detection
+        fingerprint = None
+        if self.duplicate_threshold > 0:
+            fingerprint = cv2.resize(
+                img_rgb, (FINGERPRINT_SIZE, FINGERPRINT_SIZE), interpolation=cv2.INTER_AREA
+            ).astype(np.int16)
+
         # Normalize based on dtype
         if self.input_details[0]['dtype'] == np.uint8:
             input_data = img_rgb.astype(np.uint8)
@@ -133,7 +274,16 @@ class ModelInference:
         # Add batch dimension
         input_data = np.expand_dims(input_data, axis=0)
 
-        return input_data
+        return input_data, fingerprint
+
+    def _is_duplicate(self, fingerprint):
+        """True if fingerprint is close to the last inferred frame (hold self.lock)."""
+        if fingerprint is None or self._last_fingerprint is None:
+            return False
+        if self._reuse_count >= MAX_DUPLICATE_REUSE:
+            return False
+        distance = float(np.mean(np.abs(fingerprint - self._last_fingerprint)))
+        return distance < self.duplicate_threshold
 
     def predict(self, image):
         """
@@ -145,31 +295,114 @@ class ModelInference:
         Returns:
             tuple: (predicted_class_name, confidence)
         """
+        return self.classify(self.predict_scores(image))
+
+    def predict_scores(self, image, prepared=None, timing=None):
+        """
+        Run inference on an image and return the raw output vector
+
+        Args:
+            image: RGB numpy array
+            prepared: Optional result of prepare(image) (from this engine or
+                one with the same input_spec()) to skip preprocessing
+            timing: Optional dict; receives "queue_ms", the time spent waiting
+                for the interpreter (other frames ahead of this one)
+
+        Returns:
+            numpy array: per-class scores
+        """
         if not self.model_loaded:
             raise ValueError("No model loaded")
 
         try:
-            input_data = self.preprocess_image(image)
+            input_data, fingerprint = prepared or self._prepare(image)
+            waiting = time.perf_counter()
             with self.lock:
-                self.interpreter.set_tensor(self.input_details[0]['index'], input_data)
-                self.interpreter.invoke()
-                output_data = self.interpreter.get_tensor(self.output_details[0]['index']).copy()
-
-            predictions = output_data[0]
-            predicted_index = int(np.argmax(predictions))
-            confidence = float(predictions[predicted_index])
-
-            if predicted_index < len(self.classes):
-                predicted_class = self.classes[predicted_index]
-            else:
-                predicted_class = f"Class_{predicted_index}"
-
-            return predicted_class, confidence
+                if timing is not None:
+                    timing["queue_ms"] = (time.perf_counter() - waiting) * 1000
+                self.stats["frames"] += 1
+                if self._is_duplicate(fingerprint):
+                    # Same scene as the last inferred frame: reuse its output.
+                    # Callers still treat it as a fresh observation.
+                    self.stats["cache_hits"] += 1
+                    self._reuse_count += 1
+                    return self._last_output
+
+                started = time.perf_counter()
+                output_data = self._invoke(input_data)
+                invoke_ms = (time.perf_counter() - started) * 1000
+
+                prev_ms = self.stats["invoke_ms"]
+                self.stats["invoke_ms"] = invoke_ms if prev_ms is None else prev_ms + 0.1 * (invoke_ms - prev_ms)
+                self._last_fingerprint = fingerprint
+                self._last_output = output_data[0]
+                self._reuse_count = 0
+
+            return output_data[0]
 
         except Exception as e:
             self.logger.error("Error during prediction: %s", e)
             raise
 
+    def classify(self, predictions):
+        """
+        Map a model output vector to a class name
+
+        Args:
+            predictions: 1-D array of per-class scores
+
+        Returns:
+            tuple: (predicted_class_name, confidence)
+        """
+        predicted_index = int(np.argmax(predictions))
+        confidence = float(predictions[predicted_index])
+
+        if predicted_index < len(self.classes):
+            predicted_class = self.classes[predicted_index]
+        else:
+            predicted_class = f"Class_{predicted_index}"
+
+        return predicted_class, confidence
+
+    def input_spec(self):
+        """Describe the expected input so clients can capture at model size.
+
+        Returns:
+            dict with height, width, channels, dtype and normalization, or
+            None if no model is loaded
+        """
+        if not self.model_loaded:
+            return None
+
+        shape = self.input_details[0]['shape']
+        is_uint8 = self.input_details[0]['dtype'] == np.uint8
+        return {
+            "height": int(shape[1]),
+            "width": int(shape[2]),
+            "channels": int(shape[3]) if len(shape) > 3 else 3,
+            "dtype": "uint8" if is_uint8 else "float32",
+            "color": "RGB",
+            # uint8 models take raw pixels; float models take pixels / 255
+            "normalization": "none" if is_uint8 else "divide_255",
+            "resize": "stretch",
+        }
+
+    def get_stats(self):
+        """Near-duplicate cache statistics for /status."""
+        frames = self.stats["frames"]
+        hits = self.stats["cache_hits"]
+        invoke_ms = self.stats["invoke_ms"] or 0.0
+        return {
+            "frames": frames,
+            "cache_hits": hits,
+            "hit_rate": round(hits / frames, 3) if frames else 0.0,
+            "avg_invoke_ms": round(invoke_ms, 2),
+            # Interpreter time not spent thanks to reused outputs (estimate)
+            "invoke_ms_saved": round(hits * invoke_ms, 1),
+            "duplicate_threshold": self.duplicate_threshold,
+            "memory": self.memory,
+        }
+
     def get_classes(self):
         """Get list of class names"""
         return self.classes
@@ -180,6 +413,9 @@ class ModelInference:
         self.input_details = None
         self.output_details = None
         self.model_loaded = False
+        self.memory = None
+        with self.lock:
+            self._reset_duplicate_cache()
         self.logger.info("Model unloaded")
 
 
@@ -198,7 +434,7 @@ if __name__ == "__main__":
     inference = ModelInference()
     inference.load_model(model_path)
 
-    image = cv2.imread(image_path)
+    image = _load_cv2().imread(image_path)
     if image is None:
         logger.error("Could not load image: %s", image_path)
         sys.exit(1)
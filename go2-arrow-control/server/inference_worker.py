@@ -0,0 +1,237 @@
+"""
+Inference Worker
+Runs the TFLite interpreter in a separate process. Frames are written into a
+shared-memory ring buffer (not pickled); only small control messages and the
+output vector travel over the pipe.
+"""
+
+import multiprocessing
+import os
+import signal
+import time
+import weakref
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from inference import ModelInference
+
+RING_SLOTS = 4  # Frame slots in the shared-memory ring buffer
+INVOKE_TIMEOUT = float(os.getenv("GO2_WORKER_INVOKE_TIMEOUT", "2.0"))
+LOAD_TIMEOUT = float(os.getenv("GO2_WORKER_LOAD_TIMEOUT", "60.0"))
+
+
+def _worker_main(conn):
+    """Worker process loop: load a model, then invoke it on frames in shared memory."""
+    from inference import _load_tflite, memory_change, process_memory
+
+    tflite = _load_tflite()
+
+    # Ctrl-C is handled by the server, which stops us
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    interpreter = None
+    input_index = output_index = None
+    shm = None
+
+    while True:
+        try:
+            msg = conn.recv()
+        except (EOFError, OSError):
+            break
+
+        op = msg[0]
+        try:
+            if op == "invoke":
+                _, seq, offset, shape, dtype = msg
+                frame = np.ndarray(shape, dtype=dtype, buffer=shm.buf, offset=offset)
+                interpreter.set_tensor(input_index, frame)
+                interpreter.invoke()
+                conn.send(("ok", seq, interpreter.get_tensor(output_index).copy()))
+            elif op == "load":
+                # By path: the model's pages are shared with the server and other workers
+                before = process_memory()
+                interpreter = tflite.Interpreter(model_path=msg[1])
+                interpreter.allocate_tensors()
+                memory = memory_change(before, process_memory())
+                input_details = interpreter.get_input_details()
+                output_details = interpreter.get_output_details()
+                input_index = input_details[0]["index"]
+                output_index = output_details[0]["index"]
+                conn.send(("ok", input_details, output_details, memory))
+            elif op == "attach":
+                if shm:
+                    shm.close()
+                shm = shared_memory.SharedMemory(name=msg[1])
+                conn.send(("ok",))
+            elif op == "stop":
+                break
+        except Exception as e:
+            conn.send(("error", msg[1] if op == "invoke" else None, str(e)))
+
+    if shm:
+        shm.close()
+
+
+class _WorkerHandle:
+    """The worker process, its pipe and the ring buffer.
+
+    Kept apart from the engine so a finalizer can clean them up without
+    holding a reference to the engine itself.
+    """
+
+    def __init__(self):
+        self.process = None
+        self.conn = None
+        self.shm = None
+        self.slot_bytes = 0
+
+    def start(self, ctx):
+        parent_conn, child_conn = ctx.Pipe()
+        process = ctx.Process(
+            target=_worker_main, args=(child_conn,), name="inference-worker", daemon=True
+        )
+        process.start()
+        child_conn.close()
+        self.process, self.conn = process, parent_conn
+
+    def stop(self):
+        process, conn = self.process, self.conn
+        self.process = self.conn = None
+        if conn:
+            try:
+                conn.send(("stop",))
+            except (OSError, ValueError):
+                pass
+        if process:
+            process.join(timeout=1.0)
+            if process.is_alive():
+                process.kill()
+                process.join(timeout=1.0)
+        if conn:
+            conn.close()
+
+    def ensure_shm(self, size):
+        """Make sure the ring buffer has at least `size` bytes."""
+        if self.shm is None or size > self.shm.size:
+            self.release_shm()
+            self.shm = shared_memory.SharedMemory(create=True, size=size)
+
+    def release_shm(self):
+        if self.shm:
+            self.shm.close()
+            self.shm.unlink()
+            self.shm = None
+
+    def close(self):
+        self.stop()
+        self.release_shm()
+
+
+class ProcessModelInference(ModelInference):
+    """ModelInference whose interpreter runs in a restartable worker process.
+
+    Preprocessing, the near-duplicate cache and labels stay in the server
+    process; only invoke() crosses the process boundary. A crashed or hung
+    worker is replaced and the frame retried once. The worker is stopped
+    when the engine is closed or garbage collected.
+    """
+
+    def __init__(self, ring_slots=RING_SLOTS):
+        super().__init__()
+        # The worker re-runs only the tiny main script (server/main.py), not app.py's setup
+        self._ctx = multiprocessing.get_context("spawn")
+        self._worker = _WorkerHandle()
+        self._finalizer = weakref.finalize(self, self._worker.close)
+        self._ring_slots = ring_slots
+        self._slot_bytes = 0
+        self._next_slot = 0
+        self._seq = 0
+        self._model_path = None
+        self.restarts = 0
+
+    # --- Worker lifecycle ---
+
+    def _request(self, msg, timeout):
+        """Send a message to the worker and wait for its reply."""
+        conn = self._worker.conn
+        conn.send(msg)
+        deadline = time.monotonic() + timeout
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or not conn.poll(remaining):
+                raise TimeoutError(f"Inference worker did not answer '{msg[0]}' in {timeout:.1f}s")
+            reply = conn.recv()
+            # Skip a late answer to an earlier, timed-out frame
+            if msg[0] == "invoke" and reply[1] not in (msg[1], None):
+                continue
+            if reply[0] == "error":
+                raise RuntimeError(reply[-1])
+            return reply
+
+    def _boot_worker(self, model_path):
+        """Start a worker and load model_path into it; returns its tensor details."""
+        self._worker.stop()
+        self._worker.start(self._ctx)
+        _, input_details, output_details, self.memory = self._request(
+            ("load", model_path), LOAD_TIMEOUT
+        )
+
+        # Size the ring buffer for this model's input
+        self._slot_bytes = int(np.prod(input_details[0]["shape"])) * np.dtype(
+            input_details[0]["dtype"]
+        ).itemsize
+        self._worker.ensure_shm(self._slot_bytes * self._ring_slots)
+        self._request(("attach", self._worker.shm.name), LOAD_TIMEOUT)
+        return input_details, output_details
+
+    # --- ModelInference hooks ---
+
+    def _create_interpreter(self, model_path):
+        with self.lock:
+            self.input_details, self.output_details = self._boot_worker(model_path)
+            self.interpreter = None  # Lives in the worker process
+            self._model_path = model_path
+
+    def _invoke(self, input_data):
+        try:
+            return self._remote_invoke(input_data)
+        except (TimeoutError, EOFError, OSError) as e:
+            self.restarts += 1
+            self.logger.warning("Inference worker failed (%s); restarting", e)
+            self._boot_worker(self._model_path)
+            return self._remote_invoke(input_data)
+
+    def _remote_invoke(self, input_data):
+        slot = self._next_slot
+        self._next_slot = (slot + 1) % self._ring_slots
+        offset = slot * self._slot_bytes
+        frame = np.ndarray(
+            input_data.shape, dtype=input_data.dtype, buffer=self._worker.shm.buf, offset=offset
+        )
+        frame[...] = input_data
+
+        self._seq += 1
+        reply = self._request(
+            ("invoke", self._seq, offset, input_data.shape, input_data.dtype.str),
+            INVOKE_TIMEOUT,
+        )
+        return reply[2]
+
+    def get_stats(self):
+        stats = super().get_stats()
+        process = self._worker.process
+        stats["worker_pid"] = process.pid if process else None
+        stats["worker_restarts"] = self.restarts
+        return stats
+
+    def unload_model(self):
+        super().unload_model()
+        with self.lock:
+            self._worker.stop()
+            self._model_path = None
+
+    def close(self):
+        """Stop the worker and free the shared memory."""
+        with self.lock:
+            self._finalizer()
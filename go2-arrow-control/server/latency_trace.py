@@ -0,0 +1,236 @@
+"""
+Latency Tracing
+How long it takes from a card appearing on the pilot's webcam to the robot
+moving: browser clock offset (NTP-style), per-stage breakdowns and
+end-to-end histograms
+"""
+
+import math
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+# Stages of one frame, in order. "client" is capture to send in the browser
+# (JPEG encoding, or the whole model with in-browser inference)
+STAGES = ("client", "upload", "decode", "queue", "inference", "consensus", "bridge_ack")
+STAGE_WINDOW = 500  # Frames kept per stage for percentiles
+HISTOGRAM_EDGES = (0, 25, 50, 75, 100, 150, 200, 300, 500, 750, 1000)  # ms; the last bin is open
+CLOCK_SAMPLES = 16  # Round trips the clock offset is chosen from
+ACK_TIMEOUT = 2.0  # Seconds a frame waits for the bridge's ack before it is counted as unacked
+RECENT_TRACES = 10
+MAX_CLOCKS = 8  # Browser sessions whose clock offsets are remembered
+
+
+class ClockOffset:
+    """Offset between a browser's clock and the server's.
+
+    Every round trip gives t0 (browser sends), t1 (server receives), t2
+    (server replies) and t3 (browser receives), in ms. As in NTP,
+    offset = ((t1 - t0) + (t2 - t3)) / 2 is exact if both network legs took
+    equally long and is off by at most half the round-trip delay
+    (t3 - t0) - (t2 - t1), so the recent sample with the least delay wins.
+    """
+
+    def __init__(self, samples=CLOCK_SAMPLES):
+        self._samples = deque(maxlen=samples)  # (delay, offset)
+        self._best = None
+
+    def add(self, t0, t1, t2, t3):
+        delay = (t3 - t0) - (t2 - t1)
+        if delay < 0:  # Inconsistent echo
+            return
+        self._samples.append((delay, ((t1 - t0) + (t2 - t3)) / 2))
+        self._best = min(self._samples)
+
+    @property
+    def offset(self):
+        """Server clock minus browser clock in ms (None before the first round trip)."""
+        return self._best[1] if self._best else None
+
+    def status(self):
+        if not self._best:
+            return None
+        return {
+            "offset_ms": round(self._best[1], 2),
+            "uncertainty_ms": round(self._best[0] / 2, 2),
+            "samples": len(self._samples),
+        }
+
+
+class LatencyHistogram:
+    """Fixed-bin histogram (ms) plus a window of recent values for percentiles."""
+
+    def __init__(self, edges=HISTOGRAM_EDGES, window=STAGE_WINDOW):
+        self.edges = edges
+        self.counts = [0] * len(edges)
+        self.recent = deque(maxlen=window)
+
+    def add(self, ms):
+        self.recent.append(ms)
+        self.counts[max(0, int(np.searchsorted(self.edges, ms, side="right")) - 1)] += 1
+
+    def summary(self):
+        summary = {"edges_ms": list(self.edges), "counts": list(self.counts), "frames": sum(self.counts)}
+        if self.recent:
+            ms = np.asarray(self.recent)
+            summary.update(
+                p50=round(float(np.percentile(ms, 50)), 1),
+                p95=round(float(np.percentile(ms, 95)), 1),
+                max=round(float(ms.max()), 1),
+            )
+        return summary
+
+
+class LatencyTracer:
+    """Collects per-frame latency traces of the pilot's frames.
+
+    Frames that changed the robot's command stay pending until the robot
+    controller reports the bridge's ack for it (or ACK_TIMEOUT passes) and
+    then also count towards "camera_to_robot"; every frame counts towards
+    "camera_to_decision".
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._clocks = {}  # session id -> ClockOffset
+        self.reset()
+
+    def reset(self):
+        """Forget all traces (clock offsets are kept)."""
+        with self._lock:
+            self._stages = {stage: deque(maxlen=STAGE_WINDOW) for stage in STAGES}
+            self._decision = LatencyHistogram()
+            self._robot = LatencyHistogram()
+            self._pending = []  # (trace, ack, decided)
+            self._recent = deque(maxlen=RECENT_TRACES)
+            self.frames = 0
+            self.unacked = 0
+            self.started = time.time()
+
+    def _clock(self, session):
+        # Caller holds self._lock
+        clock = self._clocks.get(session)
+        if clock is None:
+            if len(self._clocks) >= MAX_CLOCKS:
+                self._clocks.pop(next(iter(self._clocks)))
+            clock = self._clocks[session] = ClockOffset()
+        return clock
+
+    def record_frame(self, session, data, arrived_ts, arrived, decided, stages, ack=None):
+        """
+        Add one frame's trace
+
+        Args:
+            session: Pilot's session id (each browser has its own clock)
+            data: Frame request with "seq", "timestamp" (capture) and
+                "sent_ts" in browser ms, and "clock": the previous round
+                trip's t0..t3, echoed back by the browser
+            arrived_ts: time.time() when the request arrived
+            arrived: time.perf_counter() when the request arrived
+            decided: time.perf_counter() when the command was decided
+            stages: Server-side stage durations in ms ("upload" is the part
+                spent reading the request body)
+            ack: Optional callable returning the perf_counter() time of the
+                bridge's ack, or None while it is outstanding; given when the
+                frame changed the robot's command
+        """
+        trace = {"seq": data.get("seq"), **stages}
+        capture_ts = _number(data.get("timestamp"))
+        sent_ts = _number(data.get("sent_ts"))
+        if capture_ts is not None and sent_ts is not None:
+            trace["client"] = sent_ts - capture_ts
+
+        with self._lock:
+            clock = self._clock(session)
+            echo = data.get("clock")
+            if isinstance(echo, dict):
+                times = [_number(echo.get(k)) for k in ("t0", "t1", "t2", "t3")]
+                if None not in times:
+                    clock.add(*times)
+
+            offset = clock.offset
+            if offset is not None:
+                arrived_ms = arrived_ts * 1000 - offset  # In browser time
+                if sent_ts is not None:
+                    trace["upload"] = arrived_ms - sent_ts + stages.get("upload", 0.0)
+                if capture_ts is not None:
+                    trace["camera_ms"] = arrived_ms + (decided - arrived) * 1000 - capture_ts
+
+            if ack is None:
+                self._finish(trace)
+            else:
+                self._pending.append((trace, ack, decided))
+            self._resolve()
+
+    def _resolve(self):
+        # Caller holds self._lock
+        now = time.perf_counter()
+        pending = []
+        for trace, ack, decided in self._pending:
+            acked = ack()
+            if acked is not None:
+                trace["bridge_ack"] = (acked - decided) * 1000
+                self._finish(trace)
+            elif now - decided > ACK_TIMEOUT:
+                self.unacked += 1
+                self._finish(trace)
+            else:
+                pending.append((trace, ack, decided))
+        self._pending = pending
+
+    def _finish(self, trace):
+        # Caller holds self._lock
+        self.frames += 1
+        for stage in STAGES:
+            if trace.get(stage) is not None:
+                self._stages[stage].append(trace[stage])
+        camera = trace.get("camera_ms")
+        if camera is not None:
+            self._decision.add(camera)
+            if trace.get("bridge_ack") is not None:
+                trace["robot_ms"] = camera + trace["bridge_ack"]
+                self._robot.add(trace["robot_ms"])
+        self._recent.append(
+            {k: round(v, 1) if isinstance(v, float) else v for k, v in trace.items()}
+        )
+
+    def summary(self, session=None):
+        """
+        Latency statistics for the teacher page
+
+        Args:
+            session: Session whose clock offset to include (the pilot)
+        """
+        with self._lock:
+            self._resolve()
+            stages = {}
+            for stage, values in self._stages.items():
+                if values:
+                    ms = np.asarray(values)
+                    stages[stage] = {
+                        "mean": round(float(ms.mean()), 1),
+                        "p50": round(float(np.percentile(ms, 50)), 1),
+                        "p95": round(float(np.percentile(ms, 95)), 1),
+                    }
+            clock = self._clocks.get(session)
+            return {
+                "since": self.started,
+                "frames": self.frames,
+                "pending": len(self._pending),
+                "unacked": self.unacked,
+                "clock": clock.status() if clock else None,
+                "stages": stages,
+                "camera_to_decision": self._decision.summary(),
+                "camera_to_robot": self._robot.summary(),
+                "recent": list(self._recent),
+            }
+
+
+def _number(value):
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return None
+    return value if math.isfinite(value) else None
@@ -0,0 +1,193 @@
+"""
+Live Channel
+Server-sent events for every open page: state changes are diffed, serialized
+once and the same bytes are written to all connected clients
+"""
+
+import json
+import logging
+import threading
+from collections import deque
+
+HISTORY = 256  # Messages kept for clients that are briefly behind
+LOG_BACKLOG = 50  # Log lines included in the snapshot for new clients
+HEARTBEAT_INTERVAL = 15.0  # Seconds between keepalive comments (detects closed tabs)
+
+_MISSING = object()
+
+
+def _message(event, data, seq=None):
+    head = f"id: {seq}\n" if seq is not None else ""
+    return f"{head}event: {event}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n".encode()
+
+
+class LiveChannel:
+    """Publishes state diffs and log lines to any number of SSE streams.
+
+    Publishers call update()/log(); each change becomes one pre-encoded
+    message in a short history. Client streams (one thread each) sleep on a
+    condition and write whatever messages are newer than the last one they
+    sent, so an idle client costs one blocked thread and nothing else.
+    """
+
+    def __init__(self, history=HISTORY, heartbeat=HEARTBEAT_INTERVAL):
+        self.heartbeat = heartbeat
+        self._cond = threading.Condition()
+        self._messages = deque(maxlen=history)  # (seq, bytes)
+        self._seq = 0
+        self._state = {}
+        self._logs = deque(maxlen=LOG_BACKLOG)
+        self._snapshot = None  # (seq, bytes), rebuilt after a change
+        self._clients = {}  # stream id -> user id
+        self._next_client = 0
+        self.stats = {"messages": 0, "snapshots": 0, "connections": 0}
+
+    # --- Publishing ---
+
+    def update(self, **state):
+        """
+        Publish the changed keys of `state` (unchanged ones are ignored)
+
+        Returns:
+            dict of the keys that changed
+        """
+        with self._cond:
+            changes = {k: v for k, v in state.items() if self._state.get(k, _MISSING) != v}
+            if changes:
+                self._state.update(changes)
+                self._publish("state", changes)
+        return changes
+
+    def log(self, line):
+        """Publish one log line."""
+        with self._cond:
+            self._logs.append(line)
+            self._publish("log", {"line": line})
+
+    def _publish(self, event, data):
+        # Caller holds self._cond
+        self._seq += 1
+        self._messages.append((self._seq, _message(event, data, self._seq)))
+        self._snapshot = None
+        self.stats["messages"] += 1
+        self._cond.notify_all()
+
+    def _snapshot_message(self):
+        # Caller holds self._cond
+        if self._snapshot is None:
+            self._snapshot = (
+                self._seq,
+                _message("snapshot", {"state": self._state, "logs": list(self._logs)}, self._seq),
+            )
+            self.stats["snapshots"] += 1
+        return self._snapshot[1]
+
+    # --- Clients ---
+
+    def stream(self, user_id=None):
+        """
+        Generator of SSE bytes for one client: its own hello, the current
+        snapshot, then every later message (a fresh snapshot if it fell
+        further behind than the history)
+        """
+        with self._cond:
+            client = self._next_client
+            self._next_client += 1
+            self._clients[client] = user_id
+            self.stats["connections"] += 1
+            seq = self._seq
+            first = _message("hello", {"user_id": user_id}) + self._snapshot_message()
+        try:
+            yield first
+            while True:
+                with self._cond:
+                    self._cond.wait_for(lambda: self._seq > seq, timeout=self.heartbeat)
+                    if self._seq == seq:
+                        chunk = b": keepalive\n\n"
+                    elif self._messages and self._messages[0][0] <= seq + 1:
+                        chunk = b"".join(m for s, m in self._messages if s > seq)
+                    else:
+                        chunk = self._snapshot_message()
+                    seq = self._seq
+                yield chunk
+        finally:
+            with self._cond:
+                self._clients.pop(client, None)
+
+    def connected(self, user_id):
+        """True if `user_id` has at least one open stream."""
+        with self._cond:
+            return user_id in self._clients.values()
+
+    def status(self):
+        return {"clients": len(self._clients), "seq": self._seq, **self.stats}
+
+
+def stream_headers():
+    """Response headers for an SSE stream."""
+    return {
+        "Content-Type": "text/event-stream",
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no",  # Stop proxies from buffering events
+    }
+
+
+class LiveLogHandler(logging.Handler):
+    """Publishes formatted log records that pass `match(line)` to a channel.
+
+    Attach it before the logger is made asynchronous so it runs on the log
+    listener thread, not on request threads.
+    """
+
+    def __init__(self, channel, match=None):
+        super().__init__()
+        self.channel = channel
+        self.match = match
+
+    def emit(self, record):
+        try:
+            line = self.format(record)
+            if self.match is None or self.match(line):
+                self.channel.log(line)
+        except Exception:
+            self.handleError(record)
+
+
+class LiveState:
+    """Samples application state on a background thread and publishes the diffs.
+
+    Args:
+        channel: LiveChannel to publish to
+        collect: Callable returning the current state as a flat dict
+        interval: Seconds between samples
+        on_tick: Optional callable run before every sample (periodic checks)
+    """
+
+    def __init__(self, channel, collect, interval=0.25, on_tick=None):
+        self.channel = channel
+        self.collect = collect
+        self.interval = interval
+        self.on_tick = on_tick
+        self.logger = logging.getLogger("control")
+        self._last_error = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="live-state", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                if self.on_tick:
+                    self.on_tick()
+                self.channel.update(**self.collect())
+                self._last_error = None
+            except Exception as e:  # Keep publishing; the next tick may succeed
+                if str(e) != self._last_error:
+                    self.logger.error("Live state update failed: %s", e)
+                self._last_error = str(e)
@@ -0,0 +1,425 @@
+"""
+Classroom Load Generator
+Simulates one pilot posting frames to /predict_frame and N spectators behaving
+like open control pages, each browser with its own session cookie, and
+reports throughput, error rate and latency percentiles per endpoint while N
+is stepped up to find the saturation point
+"""
+
+import base64
+import http.client
+import io
+import json
+import random
+import ssl
+import threading
+import time
+from urllib.parse import urlencode, urlsplit
+
+import numpy as np
+from PIL import Image
+
+# Polling intervals of the browser pages before the live channel (seconds),
+# used with --legacy-polling
+CONTROL_STATUS_INTERVAL = 2.0  # control.js pollPilotStatus
+STATUS_INTERVAL = 2.0  # control.js startStatusPolling
+LOGS_INTERVAL = 2.0  # upload_page.js startLogPolling
+STREAM_RETRY = 3.0  # EventSource's default reconnect delay
+DEFAULT_FPS = 10  # control.js INFERENCE_FPS, until the server's hints say otherwise
+FRAME_VARIANTS = 8  # Distinct synthetic camera frames the pilot cycles through
+
+
+class Recorder:
+    """Thread-safe per-endpoint latency and error counts for one measurement window."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self.started = time.perf_counter()
+        self._endpoints = {}
+
+    def record(self, name, ms, ok, status):
+        with self._lock:
+            entry = self._endpoints.setdefault(name, {"ms": [], "errors": 0, "status": {}})
+            entry["ms"].append(ms)
+            entry["errors"] += not ok
+            entry["status"][status] = entry["status"].get(status, 0) + 1
+
+    def take(self):
+        """Summary of the window so far; starts a new window."""
+        with self._lock:
+            endpoints, seconds = self._endpoints, time.perf_counter() - self.started
+            self._reset()
+        report = {"seconds": round(seconds, 2), "endpoints": {}}
+        total = 0
+        for name, entry in sorted(endpoints.items()):
+            ms = np.asarray(entry["ms"])
+            total += len(ms)
+            report["endpoints"][name] = {
+                "requests": len(ms),
+                "rps": round(len(ms) / seconds, 2),
+                "error_rate": round(entry["errors"] / len(ms), 4),
+                "p50": round(float(np.percentile(ms, 50)), 1),
+                "p95": round(float(np.percentile(ms, 95)), 1),
+                "p99": round(float(np.percentile(ms, 99)), 1),
+                "max": round(float(ms.max()), 1),
+                "status": entry["status"],
+            }
+        report["rps"] = round(total / seconds, 2)
+        return report
+
+
+class Browser:
+    """One simulated browser: its own session cookie and keep-alive connections.
+
+    Like a browser, it uses a separate connection for each polling loop
+    (one per thread), all sharing the cookie.
+    """
+
+    def __init__(self, base_url, recorder, timeout=10.0):
+        url = urlsplit(base_url)
+        self.https = url.scheme == "https"
+        self.host = url.hostname
+        self.port = url.port or (443 if self.https else 80)
+        self.recorder = recorder
+        self.timeout = timeout
+        self.cookie = None
+        self._local = threading.local()
+        self._ssl = ssl._create_unverified_context() if self.https else None  # Self-signed cert
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            if self.https:
+                conn = http.client.HTTPSConnection(
+                    self.host, self.port, timeout=self.timeout, context=self._ssl
+                )
+            else:
+                conn = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+            self._local.conn = conn
+        return conn
+
+    def request(self, method, path, body=None, form=None, name=None):
+        """
+        Send one request and record its latency under `name` (default: path;
+        False: not recorded)
+
+        Args:
+            body: JSON body
+            form: Form fields (instead of a JSON body)
+
+        Returns:
+            (status, parsed JSON or None); status 0 for connection errors
+        """
+        headers = {}
+        if self.cookie:
+            headers["Cookie"] = self.cookie
+        if body is not None:
+            body = json.dumps(body).encode()
+            headers["Content-Type"] = "application/json"
+        elif form is not None:
+            body = urlencode(form).encode()
+            headers["Content-Type"] = "application/x-www-form-urlencoded"
+        started = time.perf_counter()
+        status, data = 0, None
+        try:
+            conn = self._connection()
+            conn.request(method, path, body=body, headers=headers)
+            response = conn.getresponse()
+            raw = response.read()
+            status = response.status
+            cookie = response.getheader("Set-Cookie")
+            if cookie:
+                self.cookie = cookie.split(";", 1)[0]
+            if response.getheader("Content-Type", "").startswith("application/json"):
+                data = json.loads(raw)
+        except (OSError, http.client.HTTPException, ValueError):
+            self.close()
+        ms = (time.perf_counter() - started) * 1000
+        if name is not False:
+            self.recorder.record(name or path, ms, 200 <= status < 400, status)
+        return status, data
+
+    def stream(self, path, stopped):
+        """
+        Hold an event stream open until `stopped` is set or it drops; the
+        time to the response headers is recorded under `path`
+
+        Returns:
+            Number of events received
+        """
+        if self.https:
+            conn = http.client.HTTPSConnection(self.host, self.port, timeout=60, context=self._ssl)
+        else:
+            conn = http.client.HTTPConnection(self.host, self.port, timeout=60)
+        headers = {"Accept": "text/event-stream"}
+        if self.cookie:
+            headers["Cookie"] = self.cookie
+        started = time.perf_counter()
+        status, events = 0, 0
+        try:
+            conn.request("GET", path, headers=headers)
+            response = conn.getresponse()
+            status = response.status
+            self.recorder.record(path, (time.perf_counter() - started) * 1000, status == 200, status)
+            while status == 200 and not stopped.is_set():
+                line = response.fp.readline()
+                if not line:
+                    break
+                events += line.startswith(b"event:")
+        except (OSError, http.client.HTTPException):
+            if not status:
+                self.recorder.record(path, (time.perf_counter() - started) * 1000, False, 0)
+        finally:
+            conn.close()
+        return events
+
+    def close(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+class LoadTest:
+    """Pilot plus a growing number of spectators against one server.
+
+    Args:
+        base_url: e.g. https://127.0.0.1:5000
+        model: Model filename to load before driving (None: use the loaded one)
+        slo_ms: p95 /predict_frame latency treated as saturated
+        seed: Random seed for the frame images and start offsets
+        legacy_polling: Spectators poll /api/control_status, /status and /logs
+            every 2 s instead of holding /api/stream open (pages before the
+            live channel), for before/after comparisons
+    """
+
+    def __init__(self, base_url, model=None, slo_ms=200.0, seed=None, legacy_polling=False):
+        self.base_url = base_url
+        self.legacy_polling = legacy_polling
+        self.model = model
+        self.slo_ms = slo_ms
+        self.rng = random.Random(seed)
+        self.recorder = Recorder()
+        self.stopped = threading.Event()
+        self.threads = []
+        self.spectators = []
+        self.pilot = None
+
+    # --- Scenario setup ---
+
+    def _frames(self, width, height, quality=80):
+        """Smooth random images (compress roughly like camera frames)."""
+        np_rng = np.random.default_rng(self.rng.randrange(2**32))
+        frames = []
+        for _ in range(FRAME_VARIANTS):
+            small = (np_rng.random((12, 16, 3)) * 255).astype(np.uint8)
+            image = Image.fromarray(small).resize((width, height), Image.BILINEAR)
+            buf = io.BytesIO()
+            image.save(buf, "JPEG", quality=quality)
+            frames.append("data:image/jpeg;base64," + base64.b64encode(buf.getvalue()).decode())
+        return frames
+
+    def start_pilot(self):
+        """Open a browser session, take control, load the model and start driving."""
+        pilot = Browser(self.base_url, self.recorder)
+        pilot.request("GET", "/control", name=False)
+        status, data = pilot.request("POST", "/api/take_control", name=False)
+        if status != 200:
+            raise RuntimeError(f"Could not take control: {data}")
+
+        if self.model:
+            self._load_model(pilot)
+        status, data = pilot.request("POST", "/start_inference", name=False)
+        if status != 200:
+            raise RuntimeError(f"Could not start inference: {data}")
+
+        _, info = pilot.request("GET", "/status", name=False)
+        spec = (info or {}).get("model_input") or {}
+        frames = self._frames(spec.get("width", 640), spec.get("height", 480))
+        self.pilot = pilot
+        self._spawn(self._pilot_loop, pilot, frames)
+
+    def _load_model(self, pilot):
+        status, data = pilot.request("POST", "/load_model", form={"filename": self.model}, name=False)
+        if status != 202:
+            raise RuntimeError(f"Could not load {self.model}: {data}")
+        state = {"state": "loading"}
+        while state["state"] == "loading":
+            time.sleep(0.25)
+            _, state = pilot.request("GET", "/api/model_load", name=False)
+        if state["state"] != "ready":
+            raise RuntimeError(f"Model load failed: {state}")
+
+    def add_spectators(self, count):
+        """Open `count` more spectator browsers (start times spread over 2 s)."""
+        for _ in range(count):
+            browser = Browser(self.base_url, self.recorder)
+            self.spectators.append(browser)
+            delay = self.rng.uniform(0, 2.0)
+            self._spawn(self._spectator_start, browser, delay)
+
+    def _spawn(self, target, *args):
+        thread = threading.Thread(target=target, args=args, daemon=True)
+        thread.start()
+        self.threads.append(thread)
+
+    # --- Client behaviour ---
+
+    def _every(self, interval, action):
+        """Call action() at a fixed rate (late calls run at once, never overlap).
+
+        action may return a new interval.
+        """
+        next_due = time.perf_counter()
+        while not self.stopped.is_set():
+            interval = action() or interval
+            next_due = max(next_due + interval, time.perf_counter())
+            self.stopped.wait(max(0.0, next_due - time.perf_counter()))
+
+    def _pilot_loop(self, pilot, frames):
+        fps = [DEFAULT_FPS]
+        index = [0]
+
+        def send():
+            frame = frames[index[0] % len(frames)]
+            index[0] += 1
+            _, data = pilot.request(
+                "POST", "/predict_frame", {"image": frame, "timestamp": time.time() * 1000}
+            )
+            hints = (data or {}).get("hints") or {}
+            if hints.get("fps"):
+                fps[0] = hints["fps"]
+            return 1.0 / fps[0]
+
+        self._every(1.0 / DEFAULT_FPS, send)
+
+    def _spectator_start(self, browser, delay):
+        if self.stopped.wait(delay):
+            return
+        # Page load: the session cookie comes with the page itself
+        browser.request("GET", "/control")
+        browser.request("GET", "/models")
+        browser.request("GET", "/settings")
+
+        def pilot_frame():
+            _, data = browser.request("GET", "/api/pilot_frame")
+            fps = (data or {}).get("fps")
+            return 1.0 / fps if fps else None
+
+        if self.legacy_polling:
+            for interval, path in (
+                (CONTROL_STATUS_INTERVAL, "/api/control_status"),
+                (STATUS_INTERVAL, "/status"),
+                (LOGS_INTERVAL, "/logs"),
+            ):
+                self._spawn(self._every, interval, lambda path=path: browser.request("GET", path) and None)
+        else:
+            self._spawn(self._live_stream, browser)
+        self._every(1.0 / DEFAULT_FPS, pilot_frame)
+        browser.close()
+
+    def _live_stream(self, browser):
+        """Keep the page's live channel open, reconnecting like EventSource."""
+        while not self.stopped.is_set():
+            browser.stream("/api/stream", self.stopped)
+            self.stopped.wait(STREAM_RETRY)
+
+    # --- Running ---
+
+    def run(self, steps, duration, warmup=3.0, report=print):
+        """
+        Step the spectator count through `steps`, measuring each for `duration` s
+
+        Returns:
+            list of per-step reports
+        """
+        self.stopped.clear()
+        results = []
+        try:
+            self.start_pilot()
+            for n in steps:
+                self.add_spectators(max(0, n - len(self.spectators)))
+                time.sleep(warmup)
+                self.recorder.take()
+                time.sleep(duration)
+                result = {"spectators": n, **self.recorder.take()}
+                result["saturated"] = self._saturated(result, results)
+                results.append(result)
+                report(format_step(result))
+        finally:
+            self.stopped.set()
+            if self.pilot:
+                self.pilot.request("POST", "/stop_inference", name=False)
+                self.pilot.request("POST", "/api/relinquish_control", name=False)
+        return results
+
+    def _saturated(self, result, previous):
+        """Reasons this step looks saturated (empty list if it does not)."""
+        reasons = []
+        frames = result["endpoints"].get("/predict_frame")
+        if frames:
+            if frames["p95"] > self.slo_ms:
+                reasons.append(f"/predict_frame p95 {frames['p95']} ms > {self.slo_ms} ms")
+            if previous and previous[0]["endpoints"].get("/predict_frame"):
+                baseline = previous[0]["endpoints"]["/predict_frame"]["rps"]
+                if frames["rps"] < 0.9 * baseline:
+                    reasons.append(f"pilot frame rate fell to {frames['rps']}/s from {baseline}/s")
+        for name, stats in result["endpoints"].items():
+            if stats["error_rate"] > 0.01:
+                reasons.append(f"{name} errors {stats['error_rate']:.1%}")
+        return reasons
+
+
+def format_step(result):
+    lines = [
+        f"N={result['spectators']:<3d} {result['rps']:.1f} req/s over {result['seconds']} s"
+        + (f"  SATURATED: {'; '.join(result['saturated'])}" if result["saturated"] else "")
+    ]
+    lines.append(f"  {'endpoint':22s} {'req/s':>7s} {'err%':>6s} {'p50':>7s} {'p95':>7s} {'p99':>7s} {'max':>7s}")
+    for name, s in result["endpoints"].items():
+        lines.append(
+            f"  {name:22s} {s['rps']:7.2f} {s['error_rate'] * 100:6.2f}"
+            f" {s['p50']:7.1f} {s['p95']:7.1f} {s['p99']:7.1f} {s['max']:7.1f}"
+        )
+    return "\n".join(lines)
+
+
+# Command line: python load_test.py [--url https://127.0.0.1:5000] [--spectators 0,10,20,30] ...
+if __name__ == "__main__":
+    import argparse
+    import sys
+
+    parser = argparse.ArgumentParser(description="Classroom load generator")
+    parser.add_argument("--url", default="https://127.0.0.1:5000")
+    parser.add_argument("--spectators", default="0,5,10,20,30",
+                        help="Comma-separated spectator counts to step through")
+    parser.add_argument("--duration", type=float, default=20.0, help="Seconds measured per step")
+    parser.add_argument("--warmup", type=float, default=3.0, help="Seconds ignored after each step starts")
+    parser.add_argument("--model", default=None, help="Model filename to load first")
+    parser.add_argument("--slo-ms", type=float, default=200.0,
+                        help="/predict_frame p95 above this counts as saturated")
+    parser.add_argument("--json", default=None, help="Also write the results to this file")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--legacy-polling", action="store_true",
+                        help="Spectators poll status endpoints like pages before the live channel")
+    args = parser.parse_args()
+
+    test = LoadTest(args.url, model=args.model, slo_ms=args.slo_ms, seed=args.seed,
+                    legacy_polling=args.legacy_polling)
+    try:
+        results = test.run(
+            [int(n) for n in args.spectators.split(",")], args.duration, args.warmup
+        )
+    except RuntimeError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    saturated = next((r for r in results if r["saturated"]), None)
+    print(f"Saturation point: N={saturated['spectators']}" if saturated
+          else "No saturation up to the last step")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
@@ -0,0 +1,224 @@
+"""
+Log Pipeline
+Moves log I/O off the request threads (QueueHandler/QueueListener) and
+collapses runs of a repeated INFO message, reporting them as "<message> ×25 in last 5 s"
+"""
+
+import atexit
+import logging
+import os
+import queue
+import threading
+import time
+from logging.handlers import QueueHandler, QueueListener
+
+# Seconds per rate-limit window; 0 disables rate limiting (still async)
+RATE_WINDOW = float(os.getenv("GO2_LOG_RATE_WINDOW", "5.0"))
+
+
+class AggregatingQueueHandler(QueueHandler):
+    """Queues records for a QueueListener, collapsing runs of repeats.
+
+    Only consecutive records below WARNING with identical text (same
+    logger, level, format string and arguments) are collapsed: the first
+    `burst` of a run pass, the rest are only counted and reported in one
+    summary record when the run ends, i.e. when a different record
+    arrives or the window runs out. Interleaved messages are never
+    dropped, so state changes such as Forward → Idle → Forward all reach
+    the log, in order.
+    """
+
+    def __init__(self, log_queue, window=RATE_WINDOW, burst=1):
+        super().__init__(log_queue)
+        self.window = window
+        self.burst = burst
+        self.stats = {"queued": 0, "suppressed": 0, "summaries": 0}
+        self._run = None  # [key, run start, passed, suppressed, last suppressed record]
+        self._run_lock = threading.Lock()  # emit() vs. the flusher thread
+
+    def emit(self, record):
+        limited = self.window > 0 and record.levelno < logging.WARNING and not record.exc_info
+        with self._run_lock:
+            run = self._run
+            if limited:
+                key = (record.name, record.levelno, record.msg, record.args)
+                try:
+                    hash(key)
+                except TypeError:  # Unhashable arguments: key on the text
+                    key = (record.name, record.levelno, record.getMessage())
+                if run is not None and run[0] == key and record.created - run[1] < self.window:
+                    if run[2] >= self.burst:
+                        run[3] += 1
+                        run[4] = record
+                        self.stats["suppressed"] += 1
+                        return
+                    run[2] += 1
+                    summary = None
+                else:
+                    summary = self._summary(run, record.created)
+                    self._run = [key, record.created, 1, 0, None]
+            else:
+                # Also ends the run, so its summary comes before this record
+                summary = self._summary(run, record.created)
+                self._run = None
+        if summary:
+            super().emit(summary)
+        self.stats["queued"] += 1
+        super().emit(record)
+
+    def prepare(self, record):
+        # Same-process queue: let the listener thread do the formatting
+        return record
+
+    def _summary(self, run, now):
+        """Summary record for a finished run, or None if nothing was suppressed."""
+        if not run or not run[3]:
+            return None
+        last = run[4]
+        span = min(self.window, now - run[1])
+        summary = logging.makeLogRecord(
+            {
+                "name": last.name,
+                "levelno": last.levelno,
+                "levelname": last.levelname,
+                "msg": "%s ×%d in last %.1f s",
+                "args": (last.getMessage(), run[2] + run[3], span),
+                "created": now,
+                "msecs": (now - int(now)) * 1000,
+                "thread": last.thread,
+                "threadName": last.threadName,
+            }
+        )
+        self.stats["summaries"] += 1
+        return summary
+
+    def flush_expired(self, everything=False):
+        """Report a run whose window ended without a different record."""
+        now = time.time()
+        with self._run_lock:
+            run = self._run
+            if run is None or not (everything or now - run[1] >= self.window):
+                return
+            summary = self._summary(run, now)
+            self._run = None
+        if summary:
+            super().emit(summary)
+
+
+class LogPipeline:
+    """Async logging for one or more loggers, with a flusher for summaries."""
+
+    def __init__(self, window=RATE_WINDOW):
+        self.window = window
+        self._listeners = []
+        self._handlers = []
+        self._stop = threading.Event()
+        self._flusher = None
+
+    def attach(self, logger, rate_limit=True):
+        """Move `logger`'s handlers behind a queue; returns its queue handler."""
+        handlers = list(logger.handlers)
+        for h in handlers:
+            logger.removeHandler(h)
+        listener = QueueListener(queue.SimpleQueue(), *handlers, respect_handler_level=True)
+        handler = AggregatingQueueHandler(listener.queue, self.window if rate_limit else 0)
+        logger.addHandler(handler)
+        listener.start()
+        self._listeners.append(listener)
+        self._handlers.append(handler)
+
+        if rate_limit and self.window > 0 and self._flusher is None:
+            self._flusher = threading.Thread(target=self._flush_loop, name="log-flusher", daemon=True)
+            self._flusher.start()
+        return handler
+
+    def _flush_loop(self):
+        while not self._stop.wait(self.window):
+            for handler in self._handlers:
+                handler.flush_expired()
+
+    def stats(self):
+        totals = {"queued": 0, "suppressed": 0, "summaries": 0}
+        for handler in self._handlers:
+            for k, v in handler.stats.items():
+                totals[k] += v
+        return totals
+
+    def stop(self):
+        """Report pending summaries and drain the queues."""
+        self._stop.set()
+        for handler in self._handlers:
+            handler.flush_expired(everything=True)
+        for listener in self._listeners:
+            listener.stop()
+        self._listeners = []
+
+
+def setup_async_logging(*loggers, window=RATE_WINDOW):
+    """
+    Make the given loggers non-blocking
+
+    Args:
+        loggers: (logger, rate_limit) pairs or plain loggers (rate limited)
+        window: Rate-limit window in seconds
+
+    Returns:
+        LogPipeline (stopped automatically at exit)
+    """
+    pipeline = LogPipeline(window)
+    for item in loggers:
+        logger, rate_limit = item if isinstance(item, tuple) else (item, True)
+        pipeline.attach(logger, rate_limit)
+    atexit.register(pipeline.stop)
+    return pipeline
+
+
+# Benchmark: per-call latency of a hot-path INFO log, synchronous vs. async
+if __name__ == "__main__":
+    import statistics
+    import sys
+    import tempfile
+
+    calls = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    lock = threading.Lock()
+
+    def run(logger):
+        latencies = []
+        for i in range(calls):
+            t0 = time.perf_counter()
+            with lock:  # Like command_lock in GO2Controller
+                logger.info("→ Moving forward at %.2f m/s", 0.5)
+            latencies.append(time.perf_counter() - t0)
+        latencies.sort()
+        return {
+            "mean_us": round(statistics.fmean(latencies) * 1e6, 2),
+            "p50_us": round(latencies[len(latencies) // 2] * 1e6, 2),
+            "p99_us": round(latencies[int(len(latencies) * 0.99)] * 1e6, 2),
+            "max_us": round(latencies[-1] * 1e6, 2),
+        }
+
+    def make_logger(name, directory):
+        logger = logging.getLogger(name)
+        logger.propagate = False
+        logger.setLevel(logging.INFO)
+        fmt = logging.Formatter("%(asctime)s [CONTROL] %(levelname)s: %(message)s")
+        for h in (logging.StreamHandler(sys.stderr),
+                  logging.FileHandler(os.path.join(directory, name + ".log"))):
+            h.setFormatter(fmt)
+            logger.addHandler(h)
+        return logger
+
+    with tempfile.TemporaryDirectory() as tmp:
+        results = {"sync": run(make_logger("bench_sync", tmp))}
+        async_logger = make_logger("bench_async", tmp)
+        pipeline = setup_async_logging((async_logger, False))
+        results["async"] = run(async_logger)
+        pipeline.stop()
+        limited_logger = make_logger("bench_limited", tmp)
+        pipeline = setup_async_logging(limited_logger)
+        results["async_rate_limited"] = run(limited_logger)
+        pipeline.stop()
+
+    print(f"{calls} INFO calls (stdout/stderr + file handlers):", file=sys.__stdout__)
+    for name, r in results.items():
+        print(f"  {name:20s} {r}", file=sys.__stdout__)
@@ -0,0 +1,11 @@
+"""
+GO2 Arrow Control - Server Entry Point
+Starts the server in app.py. Spawned processes (inference worker, evaluation
+pool) re-run the main script as __mp_main__; with nothing but this guard here
+they skip the server's setup (log files, event store, static assets, ...)
+"""
+
+if __name__ == "__main__":
+    import app
+
+    app.main()
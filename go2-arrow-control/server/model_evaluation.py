@@ -0,0 +1,196 @@
+"""
+Model Evaluation
+Runs a labelled image set (one folder per class, as a directory or .zip)
+through a model on a process pool and reports per-class accuracy
+"""
+
+import multiprocessing
+import os
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".bmp"}
+DEFAULT_WORKERS = max(1, min(4, (os.cpu_count() or 2) - 1))
+CHUNK_SIZE = 16  # Images per task sent to a worker
+
+# Per-process state, set up once by _init_worker
+_worker_engine = None
+_worker_source = None
+
+
+def list_labelled_images(source):
+    """
+    List (member, label) pairs without reading any image data
+
+    Args:
+        source: Directory or .zip with one sub-folder per class
+
+    Returns:
+        list of (path or archive member name, class label)
+    """
+    items = []
+    if zipfile.is_zipfile(source):
+        with zipfile.ZipFile(source) as zf:
+            names = zf.namelist()
+    else:
+        names = [
+            os.path.relpath(os.path.join(root, f), source)
+            for root, _dirs, files in os.walk(source)
+            for f in files
+        ]
+
+    for name in sorted(names):
+        parts = [p for p in name.replace("\\", "/").split("/") if p]
+        if len(parts) < 2 or parts[-1].startswith("."):
+            continue
+        if os.path.splitext(parts[-1])[1].lower() not in IMAGE_EXTENSIONS:
+            continue
+        # The class is the folder directly containing the image, so archives
+        # with a single top-level folder work too
+        items.append((name, parts[-2]))
+    return items
+
+
+def _init_worker(model_path, source):
+    global _worker_engine, _worker_source
+    from inference import ModelInference
+
+    _worker_engine = ModelInference()
+    _worker_engine.load_model(model_path)
+    # Dataset images are independent samples: never reuse outputs
+    _worker_engine.duplicate_threshold = 0
+    _worker_source = zipfile.ZipFile(source) if zipfile.is_zipfile(source) else source
+
+
+def _load_image(name):
+    from PIL import Image
+
+    if isinstance(_worker_source, zipfile.ZipFile):
+        with _worker_source.open(name) as f:
+            return np.array(Image.open(f).convert("RGB"))
+    with Image.open(os.path.join(_worker_source, name)) as img:
+        return np.array(img.convert("RGB"))
+
+
+def _evaluate_chunk(chunk):
+    """Decode and classify a list of (name, label); returns (label, predicted) pairs."""
+    results = []
+    for name, label in chunk:
+        try:
+            predicted, _confidence = _worker_engine.predict(_load_image(name))
+        except Exception:
+            predicted = None
+        results.append((label, predicted))
+    return results
+
+
+def evaluate(model_path, source, workers=DEFAULT_WORKERS, classes=None):
+    """
+    Evaluate a model on a labelled dataset
+
+    Yields progress dicts ({"type": "progress", ...}) while running and a
+    final {"type": "result", ...} with accuracy, the confusion matrix and
+    throughput.
+
+    Args:
+        model_path: .tflite model
+        source: Directory or .zip, one folder per class
+        workers: Number of worker processes
+        classes: Model class names (read from the labels file if None)
+    """
+    items = list_labelled_images(source)
+    total = len(items)
+    yield {"type": "progress", "done": 0, "total": total}
+    if total == 0:
+        yield {"type": "error", "error": "No labelled images found (expected one folder per class)"}
+        return
+
+    if classes is None:
+        from inference import ModelInference
+
+        probe = ModelInference()
+        probe._load_labels(model_path)
+        classes = probe.get_classes()
+    labels = list(classes) + sorted({lbl for _, lbl in items} - set(classes))
+    index = {name: i for i, name in enumerate(labels)}
+    confusion = np.zeros((len(labels), len(labels)), dtype=np.int64)
+    failed = 0
+    done = 0
+
+    chunks = [items[i:i + CHUNK_SIZE] for i in range(0, total, CHUNK_SIZE)]
+    started = time.perf_counter()
+    # spawn: forking a threaded Flask server with a live interpreter is unsafe.
+    # Workers re-run only the tiny main script (server/main.py), not app.py's setup
+    ctx = multiprocessing.get_context("spawn")
+    pool = ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=ctx,
+        initializer=_init_worker,
+        initargs=(model_path, source),
+    )
+    try:
+        futures = [pool.submit(_evaluate_chunk, chunk) for chunk in chunks]
+        for future in as_completed(futures):
+            chunk_results = future.result()
+            for label, predicted in chunk_results:
+                if predicted is None:
+                    failed += 1
+                    continue
+                if predicted not in index:
+                    index[predicted] = len(labels)
+                    labels.append(predicted)
+                    confusion = np.pad(confusion, ((0, 1), (0, 1)))
+                confusion[index[label], index[predicted]] += 1
+            done += len(chunk_results)
+            yield {"type": "progress", "done": done, "total": total}
+    except BaseException:
+        # GeneratorExit when the client disconnects mid-stream (or a failed
+        # chunk): drop the queued chunks and let the running ones finish in
+        # the background instead of holding the request thread for them
+        pool.shutdown(wait=False, cancel_futures=True)
+        raise
+    pool.shutdown()
+    elapsed = time.perf_counter() - started
+
+    per_class = {}
+    for i, name in enumerate(labels):
+        support = int(confusion[i].sum())
+        if support:
+            per_class[name] = {
+                "accuracy": round(float(confusion[i, i]) / support, 4),
+                "support": support,
+            }
+    evaluated = int(confusion.sum())
+    yield {
+        "type": "result",
+        "images": evaluated,
+        "failed": failed,
+        "accuracy": round(float(np.trace(confusion)) / evaluated, 4) if evaluated else 0.0,
+        "per_class": per_class,
+        "labels": labels,
+        "confusion_matrix": confusion.tolist(),
+        "seconds": round(elapsed, 2),
+        "images_per_s": round(evaluated / elapsed, 1) if elapsed > 0 else None,
+        "workers": workers,
+    }
+
+
+# Command line: python model_evaluation.py <model.tflite> <dataset dir|zip> [workers]
+if __name__ == "__main__":
+    import json
+    import sys
+
+    if len(sys.argv) < 3:
+        print("Usage: python model_evaluation.py <model.tflite> <dataset dir|zip> [workers]")
+        sys.exit(1)
+
+    n_workers = int(sys.argv[3]) if len(sys.argv) > 3 else DEFAULT_WORKERS
+    for event in evaluate(sys.argv[1], sys.argv[2], workers=n_workers):
+        if event["type"] == "progress":
+            print(f"\r{event['done']}/{event['total']} images", end="", flush=True)
+        else:
+            print()
+            print(json.dumps(event, indent=2))
@@ -0,0 +1,95 @@
+"""
+Model Loader
+Builds inference engines on a background thread and hands them over in one step
+"""
+
+import logging
+import threading
+import time
+
+
+class ModelLoader:
+    """Loads one model at a time in the background.
+
+    A fresh engine is fully built (interpreter, labels, warm-up) before
+    `publish` swaps it in, so predictions keep running on the previous
+    model until then and in-flight ones finish on it.
+    """
+
+    def __init__(self, engine_factory):
+        self.engine_factory = engine_factory
+        self.logger = logging.getLogger("control")
+        self.lock = threading.Lock()
+        self._thread = None
+        # Replaced as a whole on every change, so readers need no lock
+        self._status = {"state": "idle"}
+
+    def start(self, model_path, name, publish):
+        """
+        Start loading a model
+
+        Args:
+            model_path: .tflite file
+            name: Model name reported in the status
+            publish: Called as publish(engine, name) once the engine is ready;
+                its return value (a dict) is merged into the final status
+
+        Returns:
+            bool: False if another load is still running
+        """
+        with self.lock:
+            if self._thread and self._thread.is_alive():
+                return False
+            self._status = {
+                "state": "loading",
+                "model": name,
+                "stage": "starting",
+                "progress": 0.0,
+                "started": time.time(),
+            }
+            self._thread = threading.Thread(
+                target=self._run,
+                args=(model_path, name, publish),
+                name="model-loader",
+                daemon=True,
+            )
+            self._thread.start()
+        return True
+
+    def status(self):
+        """Current load state: idle, loading (with stage/progress), ready or error."""
+        return dict(self._status)
+
+    def busy(self):
+        return self._status["state"] == "loading"
+
+    def _set_status(self, **changes):
+        with self.lock:
+            self._status = {**self._status, **changes}
+
+    def _progress(self, stage, fraction):
+        self._set_status(stage=stage, progress=round(fraction, 2))
+
+    def _run(self, model_path, name, publish):
+        started = self._status["started"]
+        try:
+            engine = self.engine_factory()
+            engine.load_model(model_path, progress=self._progress)
+            self._progress("warmup", 0.8)
+            engine.warm_up()
+            self._progress("publishing", 0.95)
+            extra = publish(engine, name) or {}
+        except Exception as e:
+            self.logger.error("Failed to load model %s: %s", name, e)
+            self._set_status(
+                state="error", error=str(e), seconds=round(time.time() - started, 2)
+            )
+            return
+
+        self._set_status(
+            state="ready",
+            stage="ready",
+            progress=1.0,
+            seconds=round(time.time() - started, 2),
+            **extra,
+        )
@@ -0,0 +1,182 @@
+"""
+Sampling Profiler
+Samples the stacks of every thread in the running server (request handlers,
+inference, robot control loop, ...) for a few seconds and reports where the
+time goes, as collapsed stacks for flame graphs
+"""
+
+import logging
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+
+MAX_SECONDS = 60
+DEFAULT_INTERVAL_MS = 10
+MIN_INTERVAL_MS = 5
+MAX_INTERVAL_MS = 100
+# Sampling may use at most this fraction of wall time; slower samples stretch the interval
+MAX_OVERHEAD = 0.05
+TOP_FUNCTIONS = 25
+TOP_ALLOCATIONS = 25
+
+
+def _location(code):
+    # Last two path components keep stacks short but unambiguous
+    path = code.co_filename
+    short = os.path.join(os.path.basename(os.path.dirname(path)), os.path.basename(path))
+    return f"{code.co_name} ({short}:{code.co_firstlineno})"
+
+
+class SamplingProfiler:
+    """Runs one profiling capture at a time on a background thread.
+
+    Every interval the capture thread reads all other threads' current
+    frames (sys._current_frames()) and counts each stack, so profiled code
+    runs unmodified. Threads that are blocked (waiting on a lock, socket or
+    sleep) are sampled too, which shows where they wait.
+    """
+
+    def __init__(self):
+        self.logger = logging.getLogger("control")
+        self.lock = threading.Lock()
+        self._thread = None
+        # Replaced as a whole on every change, so readers need no lock
+        self._status = {"state": "idle"}
+        self._collapsed = None
+
+    def start(self, seconds, interval_ms=DEFAULT_INTERVAL_MS, allocations=False):
+        """
+        Start a capture
+
+        Args:
+            seconds: Capture length (1 to MAX_SECONDS)
+            interval_ms: Sampling interval (MIN_INTERVAL_MS to MAX_INTERVAL_MS)
+            allocations: Also trace memory allocations (tracemalloc) and
+                report the top allocation sites; slows Python code down while
+                it runs
+
+        Returns:
+            bool: False if another capture is still running
+        """
+        seconds = min(max(float(seconds), 1.0), MAX_SECONDS)
+        interval = min(max(float(interval_ms), MIN_INTERVAL_MS), MAX_INTERVAL_MS) / 1000
+        with self.lock:
+            if self._thread and self._thread.is_alive():
+                return False
+            self._status = {
+                "state": "running",
+                "seconds": seconds,
+                "interval_ms": interval * 1000,
+                "allocations": bool(allocations),
+                "started": time.time(),
+            }
+            self._thread = threading.Thread(
+                target=self._run,
+                args=(seconds, interval, bool(allocations)),
+                name="profiler",
+                daemon=True,
+            )
+            self._thread.start()
+        return True
+
+    def status(self):
+        """Capture state: idle, running, done (with the summary) or error."""
+        return self._status
+
+    def collapsed(self):
+        """
+        Stacks of the last capture in collapsed format, one
+        "thread;outer;...;inner count" line per stack (flamegraph.pl,
+        speedscope); None before the first capture
+        """
+        return self._collapsed
+
+    def _run(self, seconds, interval, allocations):
+        started_tracing = False
+        try:
+            if allocations and not tracemalloc.is_tracing():
+                tracemalloc.start()
+                started_tracing = True
+            self.logger.info("Profiling all threads for %.0fs", seconds)
+            stacks, summary = self._sample(seconds, interval)
+            if allocations:
+                summary["allocations"] = self._top_allocations()
+            self._collapsed = "".join(f"{stack} {count}\n" for stack, count in stacks.most_common())
+            self._status = {**self._status, "state": "done", **summary}
+            self.logger.info(
+                "Profile done: %d samples, %.1f%% overhead",
+                summary["samples"], summary["overhead_pct"],
+            )
+        except Exception as e:
+            self.logger.error("Profiling failed: %s", e)
+            self._status = {**self._status, "state": "error", "error": str(e)}
+        finally:
+            if started_tracing:
+                tracemalloc.stop()
+
+    def _sample(self, seconds, interval):
+        own = threading.get_ident()
+        stacks = Counter()
+        leaves = Counter()
+        threads = Counter()
+        samples = 0
+        busy = 0.0
+        began = time.perf_counter()
+        deadline = began + seconds
+        while True:
+            tick = time.perf_counter()
+            if tick >= deadline:
+                break
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                calls = []
+                while frame is not None:
+                    calls.append(_location(frame.f_code))
+                    frame = frame.f_back
+                name = names.get(ident, f"thread-{ident}")
+                stacks[";".join([name, *reversed(calls)])] += 1
+                leaves[calls[0]] += 1
+                threads[name] += 1
+            samples += 1
+            cost = time.perf_counter() - tick
+            busy += cost
+            # Bounded overhead: a slow sample (many threads, deep stacks) stretches the interval
+            interval = max(interval, cost / MAX_OVERHEAD)
+            time.sleep(max(0.0, min(interval - cost, deadline - time.perf_counter())))
+
+        elapsed = time.perf_counter() - began
+        thread_samples = sum(threads.values()) or 1
+        summary = {
+            "samples": samples,
+            "duration_s": round(elapsed, 2),
+            "effective_hz": round(samples / elapsed, 1) if elapsed else 0.0,
+            "final_interval_ms": round(interval * 1000, 2),
+            "overhead_pct": round(100 * busy / elapsed, 2) if elapsed else 0.0,
+            "stacks": len(stacks),
+            "threads": dict(threads.most_common()),
+            "top_functions": [
+                {"function": leaf, "samples": n, "pct": round(100 * n / thread_samples, 1)}
+                for leaf, n in leaves.most_common(TOP_FUNCTIONS)
+            ],
+        }
+        return stacks, summary
+
+    @staticmethod
+    def _top_allocations():
+        # Blocks allocated since tracing started that are still alive
+        snapshot = tracemalloc.take_snapshot().filter_traces(
+            (tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, __file__))
+        )
+        return [
+            {
+                "location": f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+                "size_kb": round(stat.size / 1024, 1),
+                "count": stat.count,
+            }
+            for stat in snapshot.statistics("lineno")[:TOP_ALLOCATIONS]
+        ]
@@ -0,0 +1,130 @@
+"""
+Request Limits
+Per-session token-bucket rate limits and server-wide overload shedding, so a
+runaway tab or a crowded classroom cannot starve the pilot's control path
+"""
+
+import threading
+import time
+
+BUCKET_IDLE_PRUNE = 300.0  # Seconds before an unused bucket is forgotten
+PRUNE_EVERY = 1000  # Checks between prunes
+
+
+class RateLimiter:
+    """Token buckets per (client, endpoint).
+
+    A bucket is a two-item list [tokens, last refill time] refilled lazily
+    on each check, so a check is one dict lookup and a little arithmetic
+    under a lock. Endpoints without a configured limit are never limited.
+
+    Args:
+        limits: {endpoint: (requests per second, burst)}
+    """
+
+    def __init__(self, limits):
+        self.limits = dict(limits)
+        self._lock = threading.Lock()
+        self._buckets = {}
+        self._checks = 0
+        self.limited = {}  # endpoint -> rejected requests
+
+    def check(self, client, endpoint):
+        """
+        Take one token for `client` on `endpoint`
+
+        Returns:
+            float: 0.0 if allowed, otherwise seconds until a token is available
+        """
+        limit = self.limits.get(endpoint)
+        if limit is None:
+            return 0.0
+        rate, burst = limit
+        now = time.monotonic()
+        key = (client, endpoint)
+        with self._lock:
+            self._checks += 1
+            if self._checks % PRUNE_EVERY == 0:
+                self._prune(now)
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = [float(burst), now]
+            else:
+                bucket[0] = min(burst, bucket[0] + (now - bucket[1]) * rate)
+                bucket[1] = now
+            if bucket[0] >= 1.0:
+                bucket[0] -= 1.0
+                return 0.0
+            self.limited[endpoint] = self.limited.get(endpoint, 0) + 1
+            return (1.0 - bucket[0]) / rate
+
+    def _prune(self, now):
+        # Caller holds self._lock
+        stale = [key for key, (_, last) in self._buckets.items() if now - last > BUCKET_IDLE_PRUNE]
+        for key in stale:
+            del self._buckets[key]
+
+    def status(self):
+        with self._lock:
+            return {"buckets": len(self._buckets), "limited": dict(self.limited)}
+
+
+class LoadShedder:
+    """Decides when the server is overloaded and counts shed requests.
+
+    Overloaded means any of: pilot frames queued behind the one being
+    processed (`queue_depth`), the smoothed per-frame service time, or the
+    number of requests being handled at once passing its threshold. Callers
+    then reject or degrade low-priority traffic (spectators, status polling)
+    and keep serving the pilot.
+
+    Args:
+        frame_load: Callable returning (queue_depth, service_time_s or None)
+        max_queue_depth: Waiting pilot frames that count as overload
+        max_service_ms: Frame service time that counts as overload
+        max_active: Concurrent requests that count as overload
+    """
+
+    def __init__(self, frame_load, max_queue_depth=2, max_service_ms=250.0, max_active=48):
+        self.frame_load = frame_load
+        self.max_queue_depth = max_queue_depth
+        self.max_service_ms = max_service_ms
+        self.max_active = max_active
+        self._lock = threading.Lock()
+        self.active = 0
+        self.shed = {}  # endpoint -> rejected or degraded requests
+
+    def enter(self):
+        with self._lock:
+            self.active += 1
+
+    def leave(self):
+        with self._lock:
+            self.active = max(0, self.active - 1)
+
+    def overload(self):
+        """Why the server is overloaded ("queue", "latency", "requests"), or None."""
+        queue_depth, service_time = self.frame_load()
+        if queue_depth >= self.max_queue_depth:
+            return "queue"
+        if service_time and service_time * 1000 >= self.max_service_ms:
+            return "latency"
+        if self.active >= self.max_active:
+            return "requests"
+        return None
+
+    def count(self, endpoint):
+        with self._lock:
+            self.shed[endpoint] = self.shed.get(endpoint, 0) + 1
+
+    def status(self):
+        return {
+            "overload": self.overload(),
+            "active_requests": self.active,
+            "thresholds": {
+                "queue_depth": self.max_queue_depth,
+                "service_ms": self.max_service_ms,
+                "active_requests": self.max_active,
+            },
+            "shed": dict(self.shed),
+        }
@@ -3,15 +3,56 @@ Unitree GO2 Robot Controller
 Sends commands to the Go2 ZMQ bridge (go2_bridge) instead of using the SDK directly.
 """
 
+import configparser
+import json
 import os
 import time
 import threading
 import logging
+from collections import deque
 
 import zmq
 
 BRIDGE_HOST = os.getenv("GO2_BRIDGE_HOST", "localhost")
 BRIDGE_CMD_PORT = int(os.getenv("GO2_ZMQ_CMD_PORT", "5555"))
+# Re-send an unchanged movement at most this often (seconds) so the
+# bridge-side deadman keeps the robot moving; 0 re-sends every command
+KEEPALIVE_INTERVAL = float(os.getenv("GO2_KEEPALIVE_INTERVAL", "0.5"))
+# A movement target no handler has repeated for this long (seconds) stops
+# being kept alive, so the bridge deadman stops the robot; 0 keeps it forever
+TARGET_TTL = float(os.getenv("GO2_TARGET_TTL", "1.0"))
+# Optional bridge telemetry PUB stream (0 disables the subscription)
+BRIDGE_TELEMETRY_PORT = int(os.getenv("GO2_ZMQ_TELEMETRY_PORT", "0"))
+# Telemetry older than this (seconds) is reported as stale
+TELEMETRY_STALE_AFTER = float(os.getenv("GO2_TELEMETRY_STALE_AFTER", "1.0"))
+
+_config = configparser.ConfigParser(inline_comment_prefixes=("#",))
+_config.read(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "config.ini"))
+
+
+def _safety_limit(name, default):
+    """config.ini [safety] value; GO2_<NAME> in the environment overrides it."""
+    value = os.getenv("GO2_" + name.upper())
+    if value is not None:
+        return float(value)
+    return _config.getfloat("safety", name, fallback=default)
+
+
+# Hard limits: every velocity sent is clamped to these
+MAX_FORWARD_SPEED = _safety_limit("max_forward_speed", 0.5)  # m/s (also sideways)
+MAX_TURN_SPEED = _safety_limit("max_turn_speed", 0.8)  # rad/s
+MAX_LINEAR_ACCELERATION = _safety_limit("max_linear_acceleration", 1.0)  # m/s²
+MAX_YAW_ACCELERATION = _safety_limit("max_yaw_acceleration", 3.0)  # rad/s²
+# Fixed-rate control loop: handlers set a target velocity and the loop ramps
+# toward it at these accelerations (clamped to the limits above); 0 Hz sends
+# every command immediately instead
+CONTROL_RATE_HZ = float(os.getenv("GO2_CONTROL_RATE_HZ", "50"))
+LINEAR_ACCELERATION = float(os.getenv("GO2_LINEAR_ACCELERATION", str(MAX_LINEAR_ACCELERATION)))
+YAW_ACCELERATION = float(os.getenv("GO2_YAW_ACCELERATION", str(MAX_YAW_ACCELERATION)))
+JITTER_WINDOW = 500  # Loop periods kept for the jitter statistics
+ACK_HISTORY = 64  # Target changes remembered for ack_time()
+# Emergency stops waiting longer than this for the bridge's ack are counted as unacknowledged
+ESTOP_ACK_TIMEOUT = 1.0
 
 
 class GO2Controller:
@@ -24,6 +65,52 @@ class GO2Controller:
         self.last_command_time = 0
         self.command_lock = threading.Lock()
 
+        # Delta encoding: identical commands are only re-sent as keepalives
+        self.keepalive_interval = KEEPALIVE_INTERVAL
+        self.stats = {"sent": 0, "keepalive": 0, "suppressed": 0}
+
+        # Latest telemetry sample as one (sample, received_at, count) tuple,
+        # replaced whole by the subscriber thread so readers need no lock
+        self.telemetry_port = BRIDGE_TELEMETRY_PORT
+        self._telemetry = (None, 0.0, 0)
+        self._telemetry_thread = None
+        self._telemetry_running = False
+
+        # Control loop: request threads replace _target (a tuple); the loop
+        # thread owns _velocity, the last ramped velocity it sent
+        self.control_rate = CONTROL_RATE_HZ
+        self.linear_acceleration = min(LINEAR_ACCELERATION, MAX_LINEAR_ACCELERATION)
+        self.yaw_acceleration = min(YAW_ACCELERATION, MAX_YAW_ACCELERATION)
+        self._target = (0.0, 0.0, 0.0)
+        self._target_set = 0.0  # time.monotonic() of the last handler call
+        self.target_ttl = TARGET_TTL
+        self._velocity = (0.0, 0.0, 0.0)
+        self._loop_lock = threading.Lock()  # Serializes a loop step with stop()
+        self._loop_thread = None
+        self._loop_running = False
+        self._lateness = deque(maxlen=JITTER_WINDOW)  # Seconds each tick woke late
+        self.loop_stats = {"ticks": 0, "overruns": 0, "missed_ticks": 0, "expired_targets": 0}
+        # Every target change gets a number; _acks holds (number, perf_counter())
+        # of the bridge's reply to the first command sent for it (latency tracing)
+        self.target_seq = 0
+        self._acked_seq = 0
+        self._acks = deque(maxlen=ACK_HISTORY)
+
+        # Priority e-stop channel: its own DEALER socket, never behind command_lock
+        self._estop_sock = None
+        self._estop_lock = threading.Lock()  # Only serializes e-stops with each other
+        self._estop_pending = deque()  # perf_counter() of sends awaiting an ack
+        self._estops = 0  # Bumped by every e-stop; moves decided before it are dropped
+        self._loop_estops = 0  # E-stops the control loop has seen (it restarts from standstill)
+        self.estop_stats = {
+            "sent": 0,
+            "acked": 0,
+            "unacked": 0,
+            "failed": 0,
+            "last_ack_ms": None,
+            "dropped_moves": 0,  # Moves decided before an e-stop, dropped after it
+        }
+
         # Movement parameters
         self.default_forward_speed = 0.5
         self.default_turn_speed = 0.8
@@ -41,8 +128,8 @@ class GO2Controller:
 
     def idle(self, *_args, **_kwargs):
         """Idle: stand still (no movement)."""
-        self.logger.info("• Idle - standing still")
-        self.stop()
+        if self._set_target(vx=0.0, vy=0.0, vyaw=0.0):
+            self.logger.info("• Idle - standing still")
 
     def connect(self):
         """Connect to the Go2 ZMQ bridge."""
@@ -61,6 +148,8 @@ class GO2Controller:
             self._sock.setsockopt(zmq.RCVTIMEO, 3000)
             self._sock.setsockopt(zmq.SNDTIMEO, 3000)
             self._sock.connect(f"tcp://{BRIDGE_HOST}:{BRIDGE_CMD_PORT}")
+            # Bridge state is unknown after (re)connecting: send the next command
+            self.last_command = None
 
             # Test the connection directly (avoid _bridge_cmd which might hide errors)
             msg = {"cmd": "status"}
@@ -70,6 +159,9 @@ class GO2Controller:
             if resp and resp.get("ok"):
                 self.connected = True
                 self.mock_mode = False
+                self._open_estop_socket()
+                self.start_telemetry()
+                self.start_control_loop()
                 self.logger.info(
                     "Connected to Go2 bridge at %s:%d", BRIDGE_HOST, BRIDGE_CMD_PORT
                 )
@@ -78,13 +170,327 @@ class GO2Controller:
                 self.logger.warning("Bridge responded but status was not ok: %s. Using MOCK mode.", resp)
                 self.connected = True
                 self.mock_mode = True
+                self.start_control_loop()
                 return False
 
         except Exception as e:
             self.logger.warning("Failed to connect to Go2 bridge: %s. Using MOCK mode.", e)
             self.connected = True  # Mark as connected to allow mock operation
             self.mock_mode = True
+            self.start_control_loop()
+            return False
+
+    def start_telemetry(self):
+        """Subscribe to the bridge telemetry stream on a background thread."""
+        if not self.telemetry_port or self._telemetry_running:
+            return
+        if not self._ctx:
+            self._ctx = zmq.Context()
+        self._telemetry_running = True
+        self._telemetry_thread = threading.Thread(
+            target=self._telemetry_loop, name="robot-telemetry", daemon=True
+        )
+        self._telemetry_thread.start()
+
+    def stop_telemetry(self):
+        self._telemetry_running = False
+        if self._telemetry_thread:
+            self._telemetry_thread.join()
+            self._telemetry_thread = None
+
+    def _telemetry_loop(self):
+        sock = self._ctx.socket(zmq.SUB)
+        sock.setsockopt(zmq.LINGER, 0)
+        sock.setsockopt(zmq.RCVTIMEO, 200)  # Lets the loop notice stop_telemetry()
+        # Only the newest sample matters; don't queue up old ones
+        sock.setsockopt(zmq.CONFLATE, 1)
+        sock.setsockopt(zmq.SUBSCRIBE, b"")
+        sock.connect(f"tcp://{BRIDGE_HOST}:{self.telemetry_port}")
+        self.logger.info(
+            "Subscribed to bridge telemetry at %s:%d", BRIDGE_HOST, self.telemetry_port
+        )
+        try:
+            while self._telemetry_running:
+                try:
+                    sample = sock.recv_json()
+                except zmq.Again:
+                    continue
+                except ValueError:
+                    continue  # Not JSON
+                count = self._telemetry[2] + 1
+                self._telemetry = (sample, time.time(), count)
+        finally:
+            sock.close()
+
+    def telemetry(self):
+        """
+        Latest telemetry sample (no bridge round-trip)
+
+        Returns:
+            dict: the bridge's fields (battery, velocity, mode, last_ack, ...)
+            plus available, stale, age (seconds) and samples (count)
+        """
+        sample, received_at, count = self._telemetry
+        if sample is None:
+            return {
+                "available": False,
+                "enabled": bool(self.telemetry_port),
+                "stale": True,
+                "age": None,
+                "samples": 0,
+            }
+        age = time.time() - received_at
+        return {
+            **sample,
+            "available": True,
+            "enabled": True,
+            "stale": age > TELEMETRY_STALE_AFTER,
+            "age": round(age, 3),
+            "samples": count,
+        }
+
+    # --- Priority emergency stop ---
+
+    def _open_estop_socket(self):
+        """
+        Connect the e-stop socket: a DEALER speaks the same envelope as the
+        REQ socket but never waits for a reply, so a stop can go out while a
+        move is still waiting on the command socket
+        """
+        if self._estop_sock:
+            self._estop_sock.close(linger=0)
+        sock = self._ctx.socket(zmq.DEALER)
+        sock.setsockopt(zmq.LINGER, 0)
+        sock.setsockopt(zmq.SNDHWM, 16)
+        sock.connect(f"tcp://{BRIDGE_HOST}:{BRIDGE_CMD_PORT}")
+        self._estop_sock = sock
+
+    def _collect_estop_acks(self):
+        # Caller holds _estop_lock; replies arrive in send order
+        while True:
+            try:
+                self._estop_sock.recv_multipart(zmq.NOBLOCK)
+            except zmq.Again:
+                break
+            if self._estop_pending:
+                sent = self._estop_pending.popleft()
+                self.estop_stats["acked"] += 1
+                self.estop_stats["last_ack_ms"] = round((time.perf_counter() - sent) * 1000, 2)
+        now = time.perf_counter()
+        while self._estop_pending and now - self._estop_pending[0] > ESTOP_ACK_TIMEOUT:
+            self._estop_pending.popleft()
+            self.estop_stats["unacked"] += 1
+
+    def _send_estop(self):
+        """
+        Fire a stop on the priority socket without waiting for the reply
+
+        Returns:
+            bool: True if it was queued for sending
+        """
+        if not self._estop_sock:
             return False
+        with self._estop_lock:
+            self._collect_estop_acks()
+            try:
+                self._estop_sock.send_multipart(
+                    [b"", json.dumps({"cmd": "stop"}).encode()], zmq.NOBLOCK
+                )
+            except zmq.ZMQError as e:
+                self.estop_stats["failed"] += 1
+                self.logger.error("Priority stop could not be sent: %s", e)
+                return False
+            self._estop_pending.append(time.perf_counter())
+            self.estop_stats["sent"] += 1
+            return True
+
+    def _settle_estop(self, priority_sent):
+        """
+        Record an e-stop as the last command, under command_lock
+
+        A move that was already on the command socket when the e-stop fired
+        can reach the bridge after the priority stop, so it is followed by a
+        stop on the command socket (as is an e-stop with no priority channel).
+        """
+        with self.command_lock:
+            if not priority_sent or self.last_command != (0.0, 0.0, 0.0):
+                self._bridge_cmd("stop")
+            self.last_command = (0.0, 0.0, 0.0)
+            self.last_command_time = time.time()
+
+    def estop_channel_stats(self):
+        if not self._estop_sock:
+            return {"connected": False, **self.estop_stats}
+        with self._estop_lock:
+            self._collect_estop_acks()
+            return {"connected": True, "pending": len(self._estop_pending), **self.estop_stats}
+
+    # --- Fixed-rate control loop ---
+
+    def start_control_loop(self):
+        """Run the velocity control loop on a background thread (if enabled)."""
+        if self.control_rate <= 0 or self._loop_running:
+            return
+        self._target = self._velocity = (0.0, 0.0, 0.0)
+        self._loop_running = True
+        self._loop_thread = threading.Thread(
+            target=self._control_loop, name="robot-control", daemon=True
+        )
+        self._loop_thread.start()
+
+    def stop_control_loop(self):
+        self._loop_running = False
+        if self._loop_thread:
+            self._loop_thread.join()
+            self._loop_thread = None
+
+    @staticmethod
+    def _clamp_velocity(vx, vy, vyaw):
+        limit = MAX_FORWARD_SPEED
+        return (
+            max(-limit, min(limit, vx)),
+            max(-limit, min(limit, vy)),
+            max(-MAX_TURN_SPEED, min(MAX_TURN_SPEED, vyaw)),
+        )
+
+    def _set_target(self, vx=0.0, vy=0.0, vyaw=0.0):
+        """
+        Set the velocity the control loop ramps toward (sent directly when
+        the loop is off). Handlers repeat it to keep the robot moving: a
+        target not set again within target_ttl expires.
+
+        Returns:
+            bool: True if the target changed
+        """
+        if not self._loop_running:
+            changed = self._send_command(*self._clamp_velocity(vx, vy, vyaw), estops=self._estops)
+            if changed:
+                self.target_seq += 1
+                self._record_ack(self.target_seq)
+            return changed
+        if not self.connected:
+            self.logger.warning("Robot not connected")
+            return False
+        target = self._clamp_velocity(vx, vy, vyaw)
+        changed = target != self._target
+        self._target_set = time.monotonic()
+        self._target = target
+        if changed:
+            self.target_seq += 1
+        return changed
+
+    def _record_ack(self, seq):
+        if seq != self._acked_seq:
+            self._acked_seq = seq
+            self._acks.append((seq, time.perf_counter()))
+
+    def ack_time(self, seq):
+        """
+        When the bridge answered the first command sent for target change `seq`
+
+        Returns:
+            float: time.perf_counter() of the reply, or None if not (yet) acked
+        """
+        for acked, at in reversed(self._acks):
+            if acked == seq:
+                return at
+        return None
+
+    def _ramp(self, dt):
+        """Next velocity: each axis moves toward the target by at most accel * dt."""
+        steps = (
+            self.linear_acceleration * dt,
+            self.linear_acceleration * dt,
+            self.yaw_acceleration * dt,
+        )
+        return tuple(
+            round(v + max(-step, min(step, t - v)), 3)
+            for v, t, step in zip(self._velocity, self._target, steps)
+        )
+
+    def _target_expired(self, now):
+        """True if the robot is asked to move but no handler has repeated the target within target_ttl."""
+        return (
+            self.target_ttl > 0
+            and self._target != (0.0, 0.0, 0.0)
+            and now - self._target_set > self.target_ttl
+        )
+
+    def _expire_target(self):
+        """
+        Stop keeping a stale target alive (call with _loop_lock held)
+
+        Nothing more is sent: without keepalives the bridge deadman stops
+        the robot, exactly as if this server had died. Target, velocity and
+        last_command are all reset to standstill, so the next movement
+        ramps up from zero instead of resuming the old speed.
+        """
+        self._target = self._velocity = (0.0, 0.0, 0.0)
+        self.target_seq += 1
+        with self.command_lock:
+            self.last_command = (0.0, 0.0, 0.0)
+        self.loop_stats["expired_targets"] += 1
+        self.logger.warning(
+            "No movement command for %.1f s; leaving the stop to the bridge deadman", self.target_ttl
+        )
+
+    def _control_loop(self):
+        period = 1.0 / self.control_rate
+        next_tick = time.monotonic() + period
+        last_tick = time.monotonic()
+        while self._loop_running:
+            delay = next_tick - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            now = time.monotonic()
+            estops = self._estops
+            lateness = now - next_tick
+            self._lateness.append(lateness)
+            self.loop_stats["ticks"] += 1
+            if lateness > period:
+                # The previous step (a slow bridge round-trip) ran into this one:
+                # skip the missed ticks instead of bursting to catch up
+                self.loop_stats["overruns"] += 1
+                missed = int(lateness // period)
+                self.loop_stats["missed_ticks"] += missed
+                next_tick += missed * period
+            next_tick += period
+
+            with self._loop_lock:
+                if estops != self._loop_estops:
+                    # E-stopped since the last step: ramp up again from standstill
+                    self._loop_estops = estops
+                    self._velocity = (0.0, 0.0, 0.0)
+                if self._target_expired(now):
+                    self._expire_target()
+                seq = self.target_seq
+                self._velocity = self._ramp(now - last_tick)
+                # Dropped under command_lock if an e-stop fires before it goes out
+                self._send_command(*self._velocity, estops=estops)
+                self._record_ack(seq)
+            last_tick = now
+
+    def control_loop_stats(self):
+        """Loop rate, period jitter and overruns, plus target and current velocity."""
+        lateness = sorted(self._lateness)
+        jitter = None
+        if lateness:
+            jitter = {
+                "mean_ms": round(sum(lateness) / len(lateness) * 1000, 3),
+                "p99_ms": round(lateness[min(len(lateness) - 1, int(len(lateness) * 0.99))] * 1000, 3),
+                "max_ms": round(lateness[-1] * 1000, 3),
+            }
+        return {
+            "running": self._loop_running,
+            "rate_hz": self.control_rate,
+            "target_ttl": self.target_ttl,
+            "linear_acceleration": self.linear_acceleration,
+            "yaw_acceleration": self.yaw_acceleration,
+            **self.loop_stats,
+            "jitter": jitter,
+            "target": list(self._target),
+            "velocity": list(self._velocity),
+        }
 
     def _bridge_cmd(self, cmd, params=None):
         """Send a command to the bridge and return the JSON response."""
@@ -115,61 +521,115 @@ class GO2Controller:
         except Exception as e:
             self.logger.error("Reconnect failed: %s", e)
 
-    def _send_command(self, vx=0.0, vy=0.0, vyaw=0.0):
+    def _send_command(self, vx=0.0, vy=0.0, vyaw=0.0, force=False, estops=None):
         """
         Send movement command to robot via bridge.
 
+        Only changes in velocity are sent. An unchanged movement is re-sent
+        as a keepalive once keepalive_interval has passed; an unchanged stop
+        is never repeated (unless forced).
+
         Args:
             vx: Forward/backward velocity (m/s) - positive is forward
             vy: Left/right velocity (m/s) - positive is left
             vyaw: Yaw angular velocity (rad/s) - positive is counter-clockwise
+            force: Send even if the velocity is unchanged
+            estops: E-stop count when the move was decided; a move is dropped
+                if an e-stop has happened since
+
+        Returns:
+            bool: True if a new command was sent (False for keepalives,
+            suppressed duplicates and moves dropped after an e-stop)
         """
+        velocity = (vx, vy, vyaw)
+        moving = velocity != (0.0, 0.0, 0.0)
         with self.command_lock:
             if not self.connected:
                 self.logger.warning("Robot not connected")
-                return
+                return False
+            if moving and estops is not None and estops != self._estops:
+                self.estop_stats["dropped_moves"] += 1
+                return False
 
-            if vx == 0.0 and vy == 0.0 and vyaw == 0.0:
-                self._bridge_cmd("stop")
+            now = time.time()
+            changed = force or velocity != self.last_command
+            if not changed:
+                if not moving or now - self.last_command_time < self.keepalive_interval:
+                    self.stats["suppressed"] += 1
+                    return False
+                self.stats["keepalive"] += 1
             else:
+                self.stats["sent"] += 1
+
+            if moving:
                 self._bridge_cmd("move", {"vx": vx, "vy": vy, "vyaw": vyaw})
+            else:
+                self._bridge_cmd("stop")
 
-            self.last_command = (vx, vy, vyaw)
-            self.last_command_time = time.time()
+            self.last_command = velocity
+            self.last_command_time = now
+            return changed
+
+    def get_stats(self):
+        """Counts of new, keepalive and suppressed commands."""
+        with self.command_lock:
+            stats = dict(self.stats)
+        total = sum(stats.values())
+        stats["suppressed_ratio"] = round(stats["suppressed"] / total, 3) if total else 0.0
+        stats["keepalive_interval"] = self.keepalive_interval
+        stats["control_loop"] = self.control_loop_stats()
+        stats["estop_channel"] = self.estop_channel_stats()
+        return stats
 
     def move_forward(self, speed=None):
         """Move forward"""
-        self.logger.info("→ Moving forward at %.2f m/s", self.default_forward_speed)
-        self._send_command(vx=self.default_forward_speed, vy=0.0, vyaw=0.0)
+        if self._set_target(vx=self.default_forward_speed, vy=0.0, vyaw=0.0):
+            self.logger.info("→ Moving forward at %.2f m/s", self.default_forward_speed)
 
     def turn_right(self, speed=None):
         """Turn right (rotate clockwise)"""
-        self.logger.info("↻ Turning right at %.2f rad/s", self.default_turn_speed)
-        self._send_command(vx=0.0, vy=0.0, vyaw=-self.default_turn_speed)
+        if self._set_target(vx=0.0, vy=0.0, vyaw=-self.default_turn_speed):
+            self.logger.info("↻ Turning right at %.2f rad/s", self.default_turn_speed)
 
     def turn_left(self, speed=None):
         """Turn left (rotate counter-clockwise)"""
-        self.logger.info("↺ Turning left at %.2f rad/s", self.default_turn_speed)
-        self._send_command(vx=0.0, vy=0.0, vyaw=self.default_turn_speed)
+        if self._set_target(vx=0.0, vy=0.0, vyaw=self.default_turn_speed):
+            self.logger.info("↺ Turning left at %.2f rad/s", self.default_turn_speed)
 
     def move_backwards(self, speed=None):
         """Move backwards."""
         if speed is None:
             speed = self.default_forward_speed
 
-        self.logger.info("↓ Moving backwards at %.2f m/s", self.default_reverse_speed)
-        self._send_command(vx=-self.default_reverse_speed, vy=0.0, vyaw=0.0)
+        if self._set_target(vx=-self.default_reverse_speed, vy=0.0, vyaw=0.0):
+            self.logger.info("↓ Moving backwards at %.2f m/s", self.default_reverse_speed)
 
     def stop(self):
-        """Stop all movement"""
+        """Stop all movement at once, without ramping (always sent, even if already stopped)"""
         self.logger.info("■ Stopping")
-        self._send_command(vx=0.0, vy=0.0, vyaw=0.0)
+        with self._loop_lock:
+            self._target = self._velocity = (0.0, 0.0, 0.0)
+            self.target_seq += 1
+            self._send_command(vx=0.0, vy=0.0, vyaw=0.0, force=True)
+            self._record_ack(self.target_seq)
 
     def emergency_stop(self):
-        """Emergency stop - immediately halt all movement"""
+        """
+        Emergency stop - immediately halt all movement
+
+        Goes out on the priority socket and returns without waiting: it never
+        queues behind command_lock, where a move may be stuck on a slow
+        bridge for up to the 3 s receive timeout. Bumping _estops first makes
+        every move that has not reached the bridge yet drop out; last_command
+        is updated under command_lock off this thread (_settle_estop).
+        """
+        self._estops += 1
+        self._target = (0.0, 0.0, 0.0)
+        priority_sent = self._send_estop()
+        threading.Thread(
+            target=self._settle_estop, args=(priority_sent,), name="estop", daemon=True
+        ).start()
         self.logger.critical("!!! EMERGENCY STOP !!!")
-        with self.command_lock:
-            self._bridge_cmd("stop")
 
     def execute_command(self, command_name, speed=None):
         """
@@ -194,11 +654,16 @@ class GO2Controller:
     def disconnect(self):
         """Disconnect from bridge"""
         if self.connected:
+            self.stop_control_loop()
             self.stop()
             time.sleep(0.1)
             self.connected = False
+            self.stop_telemetry()
             if self._sock:
                 self._sock.close(linger=0)
+            if self._estop_sock:
+                self._estop_sock.close(linger=0)
+                self._estop_sock = None
             if self._ctx:
                 self._ctx.term()
             self.logger.info("Disconnected from Go2 bridge")
@@ -245,6 +710,7 @@ if __name__ == "__main__":
         time.sleep(2)
         controller.stop()
 
+        logger.info("Control loop: %s", controller.control_loop_stats())
         logger.info("\n✓ Test complete")
         controller.disconnect()
     else:
@@ -0,0 +1,356 @@
+"""
+Session Recorder
+Append-only binary log of pilot frames, predictions and robot commands,
+plus an offline replay tool
+
+Layout of a recording directory:
+    meta.json         classes, model and settings at recording start
+    seg-00000.bin     records, appended back to back
+    seg-00000.idx     fixed-size index entries (offset, arrival time)
+
+Record layout (little-endian):
+    header  RECORD_HEADER (magic, jpeg_len, arrival_ts, capture_ts,
+            n_scores, command, flags, vx, vy, vyaw)
+    scores  n_scores float32
+    jpeg    jpeg_len bytes
+"""
+
+import json
+import logging
+import mmap
+import os
+import queue
+import struct
+import threading
+import time
+from collections import namedtuple
+
+import numpy as np
+
+SEGMENT_MAX_BYTES = 64 * 1024 * 1024
+RECORD_MAGIC = b"G2R1"
+RECORD_HEADER = struct.Struct("<4sIddHBBfff")
+INDEX_DTYPE = np.dtype([("offset", "<u8"), ("arrival_ts", "<f8")])
+NO_COMMAND = 255
+FLAG_EXECUTED = 0x01
+
+Record = namedtuple(
+    "Record", "arrival_ts capture_ts scores command executed velocity jpeg"
+)
+
+
+def _create_recording_dir(root):
+    """
+    Create a new, empty recording directory named after the current time
+
+    Two recorders started in the same millisecond get "-1", "-2", ...
+    suffixes; an existing directory is never reused.
+    """
+    os.makedirs(root, exist_ok=True)
+    now = time.time()
+    stamp = time.strftime("%Y%m%d_%H%M%S", time.localtime(now)) + f"_{int(now % 1 * 1000):03d}"
+    for attempt in range(100):
+        path = os.path.join(root, stamp if attempt == 0 else f"{stamp}-{attempt}")
+        try:
+            os.mkdir(path)
+            return path
+        except FileExistsError:
+            continue
+    raise FileExistsError(f"No free recording directory for {stamp} in {root}")
+
+
+class SessionRecorder:
+    """Writes records on a background thread so the request path only enqueues."""
+
+    def __init__(self, root, classes, model_name=None, settings=None, max_queue=256):
+        self.logger = logging.getLogger("control")
+        self.path = _create_recording_dir(root)
+        self.classes = list(classes)
+        self._command_codes = {name: i for i, name in enumerate(self.classes)}
+
+        with open(os.path.join(self.path, "meta.json"), "w") as f:
+            json.dump(
+                {
+                    "version": 1,
+                    "started": time.time(),
+                    "classes": self.classes,
+                    "model": model_name,
+                    "settings": dict(settings or {}),
+                },
+                f,
+                indent=2,
+            )
+
+        self.recorded = 0
+        self.dropped = 0
+        self._segment = -1
+        self._seg_file = None
+        self._idx_file = None
+        self._seg_bytes = 0
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._thread = threading.Thread(
+            target=self._run, name="session-recorder", daemon=True
+        )
+        self._thread.start()
+        self.logger.info("Recording session to %s", self.path)
+
+    def record(self, jpeg_bytes, arrival_ts, capture_ts, scores, command,
+               executed, velocity=None):
+        """Queue one frame; never blocks (drops the record if the writer is behind)."""
+        try:
+            self._queue.put_nowait(
+                (jpeg_bytes, arrival_ts, capture_ts, scores, command, executed, velocity)
+            )
+        except queue.Full:
+            self.dropped += 1
+
+    def status(self):
+        return {"path": self.path, "recorded": self.recorded, "dropped": self.dropped}
+
+    def close(self):
+        """Flush pending records and close the files."""
+        self._queue.put(None)
+        self._thread.join()
+        self.logger.info(
+            "Recording closed: %d frames (%d dropped) in %s",
+            self.recorded,
+            self.dropped,
+            self.path,
+        )
+
+    def _open_segment(self):
+        if self._seg_file:
+            self._seg_file.close()
+            self._idx_file.close()
+        self._segment += 1
+        base = os.path.join(self.path, f"seg-{self._segment:05d}")
+        # "x": offsets in the index start at 0, so a segment must never be appended to
+        self._seg_file = open(base + ".bin", "xb")
+        self._idx_file = open(base + ".idx", "xb")
+        self._seg_bytes = 0
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            try:
+                self._write(*item)
+            except Exception as e:
+                self.logger.error("Recorder write failed: %s", e)
+            if self._queue.empty() and self._seg_file:
+                self._seg_file.flush()
+                self._idx_file.flush()
+
+        if self._seg_file:
+            self._seg_file.close()
+            self._idx_file.close()
+
+    def _write(self, jpeg_bytes, arrival_ts, capture_ts, scores, command,
+               executed, velocity):
+        scores = np.asarray(scores if scores is not None else [], dtype="<f4").ravel()
+        vx, vy, vyaw = velocity or (0.0, 0.0, 0.0)
+        header = RECORD_HEADER.pack(
+            RECORD_MAGIC,
+            len(jpeg_bytes),
+            arrival_ts,
+            capture_ts or 0.0,
+            len(scores),
+            self._command_codes.get(command, NO_COMMAND),
+            FLAG_EXECUTED if executed else 0,
+            vx,
+            vy,
+            vyaw,
+        )
+        size = len(header) + scores.nbytes + len(jpeg_bytes)
+
+        if self._seg_file is None or (
+            self._seg_bytes and self._seg_bytes + size > SEGMENT_MAX_BYTES
+        ):
+            self._open_segment()
+
+        offset = self._seg_bytes
+        self._seg_file.write(header)
+        self._seg_file.write(scores.tobytes())
+        self._seg_file.write(jpeg_bytes)
+        self._idx_file.write(np.array([(offset, arrival_ts)], dtype=INDEX_DTYPE).tobytes())
+        self._seg_bytes += size
+        self.recorded += 1
+
+
+class SessionReader:
+    """Random access to a recording through memory-mapped segments and indexes."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, "meta.json")) as f:
+            self.meta = json.load(f)
+        self.classes = self.meta.get("classes", [])
+
+        self._segments = []  # (mmap, index array)
+        names = sorted(n for n in os.listdir(path) if n.endswith(".idx"))
+        for name in names:
+            base = os.path.join(path, name[:-4])
+            if os.path.getsize(base + ".idx") == 0:
+                continue
+            seg_map = self._map(base + ".bin")
+            idx_map = self._map(base + ".idx")
+            # Ignore a trailing partial entry (e.g. recorder killed mid-write)
+            count = len(idx_map) // INDEX_DTYPE.itemsize
+            index = np.frombuffer(idx_map, dtype=INDEX_DTYPE, count=count)
+            self._segments.append((seg_map, idx_map, index))
+
+        self._starts = np.cumsum([0] + [len(s[2]) for s in self._segments])
+
+    @staticmethod
+    def _map(filename):
+        with open(filename, "rb") as f:
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def __len__(self):
+        return int(self._starts[-1])
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        seg = int(np.searchsorted(self._starts, i, side="right")) - 1
+        seg_map, _, index = self._segments[seg]
+        offset = int(index[i - self._starts[seg]]["offset"])
+
+        (magic, jpeg_len, arrival_ts, capture_ts, n_scores, command, flags,
+         vx, vy, vyaw) = RECORD_HEADER.unpack_from(seg_map, offset)
+        if magic != RECORD_MAGIC:
+            raise ValueError(f"Corrupt record {i} at offset {offset}")
+
+        pos = offset + RECORD_HEADER.size
+        scores = np.frombuffer(seg_map, dtype="<f4", count=n_scores, offset=pos)
+        pos += n_scores * 4
+        jpeg = memoryview(seg_map)[pos:pos + jpeg_len]
+
+        if command < len(self.classes):
+            command_name = self.classes[command]
+        else:
+            command_name = None
+
+        return Record(
+            arrival_ts,
+            capture_ts,
+            scores,
+            command_name,
+            bool(flags & FLAG_EXECUTED),
+            (vx, vy, vyaw),
+            jpeg,
+        )
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def arrival_times(self):
+        """All arrival timestamps, straight from the memory-mapped indexes."""
+        if not self._segments:
+            return np.empty(0)
+        return np.concatenate([s[2]["arrival_ts"] for s in self._segments])
+
+
+def replay(path, model_path, settings=None):
+    """
+    Feed a recording through ModelInference and the consensus logic
+
+    Frames are processed as fast as possible; rate limiting uses the
+    recorded arrival times, so decisions match a real-time run.
+
+    Returns:
+        dict: frame count, speedup, latency percentiles, decision mismatches
+    """
+    from io import BytesIO
+    from collections import deque
+
+    from PIL import Image
+
+    from inference import ModelInference
+    from consensus import decide_command
+
+    reader = SessionReader(path)
+    cfg = dict(reader.meta.get("settings") or {})
+    cfg.update(settings or {})
+    buffer_size = int(cfg.get("buffer_size", 3))
+    consensus_required = int(cfg.get("consensus_required", 2))
+    threshold = float(cfg.get("confidence_threshold", 0.65))
+    interval = float(cfg.get("command_interval", 0.2))
+
+    engine = ModelInference()
+    engine.load_model(model_path)
+
+    buffer = deque(maxlen=buffer_size)
+    last_sent = 0.0
+    latencies = []
+    prediction_mismatches = 0
+    command_mismatches = 0
+
+    started = time.perf_counter()
+    for rec in reader:
+        t0 = time.perf_counter()
+        image = np.array(Image.open(BytesIO(rec.jpeg)))
+        scores = engine.predict_scores(image)
+        latencies.append((time.perf_counter() - t0) * 1000)
+
+        prediction, confidence = engine.classify(scores)
+        if len(rec.scores) and reader.classes:
+            recorded = reader.classes[int(np.argmax(rec.scores))]
+            prediction_mismatches += recorded != prediction
+
+        buffer.append(prediction)
+        command, _, _ = decide_command(list(buffer), buffer_size, consensus_required)
+        executed = False
+        if command != "Idle" and confidence >= threshold:
+            if rec.arrival_ts - last_sent >= interval:
+                executed = True
+                last_sent = rec.arrival_ts
+        if rec.command is not None:
+            command_mismatches += (command, executed) != (rec.command, rec.executed)
+    elapsed = time.perf_counter() - started
+
+    arrivals = reader.arrival_times()
+    recorded_span = float(arrivals[-1] - arrivals[0]) if len(arrivals) > 1 else 0.0
+    lat = np.array(latencies) if latencies else np.zeros(1)
+    return {
+        "frames": len(reader),
+        "replay_seconds": round(elapsed, 3),
+        "recorded_seconds": round(recorded_span, 3),
+        "speedup": round(recorded_span / elapsed, 1) if elapsed > 0 else None,
+        "latency_ms": {
+            "p50": round(float(np.percentile(lat, 50)), 2),
+            "p95": round(float(np.percentile(lat, 95)), 2),
+            "p99": round(float(np.percentile(lat, 99)), 2),
+            "max": round(float(lat.max()), 2),
+        },
+        "prediction_mismatches": int(prediction_mismatches),
+        "command_mismatches": int(command_mismatches),
+    }
+
+
+# Command line: inspect or replay a recording
+if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) < 3 or sys.argv[1] not in ("info", "replay"):
+        print("Usage: python session_recorder.py info <recording_dir>")
+        print("       python session_recorder.py replay <recording_dir> <model.tflite>")
+        sys.exit(1)
+
+    if sys.argv[1] == "info":
+        reader = SessionReader(sys.argv[2])
+        arrivals = reader.arrival_times()
+        print(json.dumps(reader.meta, indent=2))
+        print(f"{len(reader)} frames", end="")
+        if len(arrivals) > 1:
+            print(f" over {arrivals[-1] - arrivals[0]:.1f}s", end="")
+        print()
+    else:
+        if len(sys.argv) < 4:
+            print("replay needs a model path")
+            sys.exit(1)
+        print(json.dumps(replay(sys.argv[2], sys.argv[3]), indent=2))
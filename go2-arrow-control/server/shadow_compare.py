@@ -0,0 +1,181 @@
+"""
+Shadow Model Comparison
+Runs a second ("shadow") model on the pilot's frames next to the active one
+and tracks latency, agreement and confidence for both; only the active model
+ever drives the robot
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+LATENCY_WINDOW = 300  # Latency samples kept per model for percentiles
+AGREEMENT_WINDOW = 100  # Frames in the "recent" agreement rate
+CONFIDENCE_BINS = 10  # Histogram bins over [0, 1]
+
+
+class ModelTrack:
+    """Latency, confidence and class statistics of one model."""
+
+    def __init__(self, name):
+        self.name = name
+        self.frames = 0
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+        self.confidence_hist = [0] * CONFIDENCE_BINS
+        self.classes = {}
+
+    def add(self, prediction, confidence, ms):
+        self.frames += 1
+        self.latencies.append(ms)
+        self.confidence_hist[min(int(confidence * CONFIDENCE_BINS), CONFIDENCE_BINS - 1)] += 1
+        self.classes[prediction] = self.classes.get(prediction, 0) + 1
+
+    def summary(self):
+        latency = None
+        if self.latencies:
+            ms = np.asarray(self.latencies)
+            latency = {
+                "mean": round(float(ms.mean()), 2),
+                "p50": round(float(np.percentile(ms, 50)), 2),
+                "p95": round(float(np.percentile(ms, 95)), 2),
+                "max": round(float(ms.max()), 2),
+            }
+        return {
+            "model": self.name,
+            "frames": self.frames,
+            "latency_ms": latency,
+            "confidence_hist": list(self.confidence_hist),
+            "classes": dict(self.classes),
+        }
+
+
+class ShadowComparison:
+    """Compares a shadow engine against the active one, off the command path.
+
+    submit() only hands the frame to a worker thread through a one-slot
+    mailbox: if the shadow model is still busy, the waiting frame is
+    replaced by the newer one (counted as skipped), so a slow shadow model
+    sees fewer frames instead of delaying the pilot.
+
+    Args:
+        engine: Loaded shadow engine (ModelInference)
+        name: Shadow model filename
+        active_name: Active model filename
+    """
+
+    def __init__(self, engine, name, active_name):
+        self.engine = engine
+        self.name = name
+        self.logger = logging.getLogger("control")
+        self.started = time.time()
+        self.skipped = 0
+        self._lock = threading.Lock()  # Guards the statistics
+        self._reset_stats(active_name)
+
+        self._pending = None
+        self._wakeup = threading.Condition()
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="shadow-model", daemon=True)
+        self._thread.start()
+
+    def _reset_stats(self, active_name):
+        self.active = ModelTrack(active_name)
+        self.shadow = ModelTrack(self.name)
+        self.compared = 0
+        self.agreed = 0
+        self.errors = 0
+        self.shared_input = None
+        self.recent = deque(maxlen=AGREEMENT_WINDOW)
+
+    def reset(self, active_name):
+        """Start over, e.g. after the active model changed."""
+        with self._lock:
+            self._reset_stats(active_name)
+
+    def submit(self, image, prepared, input_spec, prediction, confidence, active_ms):
+        """
+        Queue one frame the active model has already classified (non-blocking)
+
+        Args:
+            image: Decoded RGB frame
+            prepared: The active engine's (input_data, fingerprint) for it,
+                reused when the shadow model takes the same input
+            input_spec: The active engine's input_spec()
+            prediction, confidence: The active model's result
+            active_ms: The active model's inference time
+        """
+        with self._wakeup:
+            if self._pending is not None:
+                self.skipped += 1
+            self._pending = (image, prepared, input_spec, prediction, confidence, active_ms)
+            self._wakeup.notify()
+
+    def _run(self):
+        while True:
+            with self._wakeup:
+                while self._running and self._pending is None:
+                    self._wakeup.wait()
+                if not self._running:
+                    return
+                frame, self._pending = self._pending, None
+            self._compare(*frame)
+
+    def _compare(self, image, prepared, input_spec, prediction, confidence, active_ms):
+        shared = input_spec == self.engine.input_spec()
+        try:
+            started = time.perf_counter()
+            if shared:
+                scores = self.engine.predict_scores(image, prepared=prepared)
+            else:
+                scores = self.engine.predict_scores(image)
+            shadow_ms = (time.perf_counter() - started) * 1000
+            shadow_prediction, shadow_confidence = self.engine.classify(scores)
+        except Exception as e:
+            with self._lock:
+                self.errors += 1
+            self.logger.warning("Shadow model %s failed: %s", self.name, e)
+            return
+
+        agree = shadow_prediction == prediction
+        with self._lock:
+            self.active.add(prediction, confidence, active_ms)
+            self.shadow.add(shadow_prediction, shadow_confidence, shadow_ms)
+            self.compared += 1
+            self.agreed += agree
+            self.recent.append(agree)
+            self.shared_input = shared
+
+    def summary(self):
+        """Comparison statistics for the UI."""
+        with self._lock:
+            return {
+                "shadow_model": self.name,
+                "active_model": self.active.name,
+                "running_s": round(time.time() - self.started, 1),
+                "compared": self.compared,
+                "skipped": self.skipped,
+                "errors": self.errors,
+                "shared_preprocessing": self.shared_input,
+                "agreement": round(self.agreed / self.compared, 3) if self.compared else None,
+                "recent_agreement": (
+                    round(sum(self.recent) / len(self.recent), 3) if self.recent else None
+                ),
+                "active": self.active.summary(),
+                "shadow": self.shadow.summary(),
+            }
+
+    def close(self):
+        """Stop the worker thread and release the shadow engine."""
+        with self._wakeup:
+            self._running = False
+            self._pending = None
+            self._wakeup.notify()
+        self._thread.join(timeout=5)
+        close = getattr(self.engine, "close", None)
+        if close:
+            close()
+        else:
+            self.engine.unload_model()
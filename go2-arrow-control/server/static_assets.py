@@ -0,0 +1,220 @@
+"""
+Static Assets
+Fingerprints the css/js files once at startup (compressing each on its
+first request) and keeps the HTML pages in memory with their asset URLs
+filled in, so serving a page or an asset is a dict lookup instead of a
+template render or a file read
+"""
+
+import gzip
+import hashlib
+import logging
+import mimetypes
+import os
+import re
+import threading
+
+from flask import Response
+
+try:
+    import brotli
+except ImportError:  # Optional: without it assets are served gzip or plain
+    brotli = None
+
+ASSET_DIRS = ("css", "js")  # Subdirectories of static/ that are fingerprinted
+# Left to /static/: the minified TF.js runtime (fetched by setup.sh) is large,
+# barely compressible further and only loaded by pages that run models locally
+SKIP_DIRS = ("js/vendor",)
+GZIP_LEVEL = 9
+# 11 (the maximum) is many times slower for a few percent; 5 still beats gzip -9
+BROTLI_QUALITY = int(os.getenv("GO2_BROTLI_QUALITY", "5"))
+ASSET_MAX_AGE = 31536000  # One year; a changed file gets a new URL
+# Encodings in order of preference (smallest first)
+ENCODINGS = ("br", "gzip")
+# The only template construct static pages use; anything else keeps a page on render_template
+STATIC_URL = re.compile(r"""\{\{\s*url_for\(\s*['"]static['"]\s*,\s*filename\s*=\s*['"]([^'"]+)['"]\s*\)\s*\}\}""")
+TEMPLATE_SYNTAX = re.compile(r"\{\{|\{%")
+
+
+def compress(body):
+    """
+    Precompressed variants of `body` that are smaller than it
+
+    Returns:
+        dict: {encoding: bytes}, always including "identity"
+    """
+    variants = {"identity": body}
+    candidates = {"gzip": gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)}
+    if brotli is not None:
+        candidates["br"] = brotli.compress(body, quality=BROTLI_QUALITY)
+    for encoding, data in candidates.items():
+        if len(data) < len(body):
+            variants[encoding] = data
+    return variants
+
+
+class StaticAssets:
+    """In-memory css/js assets and HTML pages.
+
+    Each asset under ASSET_DIRS (except SKIP_DIRS) is served at
+    `<prefix>/<dir>/<name>.<hash>.<ext>`, where the hash is of its content,
+    so it can be cached forever. Pages are the HTML files in static/ with
+    their `{{ url_for('static', filename=...) }}` references replaced by
+    those URLs; they change whenever an asset does, so browsers revalidate
+    them (ETag) on every load. Pages with any other template syntax are
+    left to render_template. Startup only reads and hashes the files; each
+    one is compressed when it is first requested.
+
+    Args:
+        static_dir: The static/ directory
+        prefix: URL path the fingerprinted assets are served under
+        reload: Rebuild when a file changes (for editing the front end
+            without restarting the server); costs a stat of every file per page
+    """
+
+    def __init__(self, static_dir, prefix="/assets", reload=False):
+        self.logger = logging.getLogger("control")
+        self.static_dir = os.path.abspath(static_dir)
+        self.prefix = prefix.rstrip("/")
+        self.reload = reload
+        self._lock = threading.Lock()
+        self._mtimes = None
+        # Replaced as a whole by build(), so readers need no lock
+        self._assets = {}  # fingerprinted name -> entry
+        self._urls = {}  # static filename -> fingerprinted URL
+        self._pages = {}  # page filename -> entry
+        self.build()
+
+    def _scan(self):
+        mtimes = {}
+        for root, _, files in os.walk(self.static_dir):
+            for name in files:
+                path = os.path.join(root, name)
+                mtimes[path] = os.stat(path).st_mtime_ns
+        return mtimes
+
+    def build(self):
+        """Read and fingerprint every asset and page."""
+        with self._lock:
+            mtimes = self._scan()
+            assets, urls = {}, {}
+            for subdir in ASSET_DIRS:
+                top = os.path.join(self.static_dir, subdir)
+                for root, dirs, files in os.walk(top):
+                    dirs[:] = [
+                        d for d in dirs
+                        if os.path.relpath(os.path.join(root, d), self.static_dir).replace(os.sep, "/")
+                        not in SKIP_DIRS
+                    ]
+                    for name in sorted(files):
+                        path = os.path.join(root, name)
+                        filename = os.path.relpath(path, self.static_dir).replace(os.sep, "/")
+                        with open(path, "rb") as f:
+                            body = f.read()
+                        digest = hashlib.sha256(body).hexdigest()[:12]
+                        stem, ext = os.path.splitext(filename)
+                        fingerprinted = f"{stem}.{digest}{ext}"
+                        assets[fingerprinted] = _entry(body, digest, filename)
+                        urls[filename] = f"{self.prefix}/{fingerprinted}"
+
+            pages = {}
+            for name in sorted(os.listdir(self.static_dir)):
+                if not name.endswith(".html"):
+                    continue
+                with open(os.path.join(self.static_dir, name), encoding="utf-8") as f:
+                    source = f.read()
+                html = STATIC_URL.sub(lambda m: urls.get(m.group(1), f"/static/{m.group(1)}"), source)
+                if TEMPLATE_SYNTAX.search(html):
+                    continue
+                body = html.encode("utf-8")
+                pages[name] = _entry(body, hashlib.sha256(body).hexdigest()[:16], name)
+
+            self._assets, self._urls, self._pages = assets, urls, pages
+            self._mtimes = mtimes
+        self.logger.info(
+            "Static assets: %d assets, %d pages (%.0f kB, compressed on first request, brotli %s)",
+            len(assets),
+            len(pages),
+            sum(len(a["body"]) for a in assets.values()) / 1024,
+            f"quality {BROTLI_QUALITY}" if brotli is not None else "off",
+        )
+
+    def _check(self):
+        if self.reload and self._scan() != self._mtimes:
+            self.build()
+
+    def url(self, filename):
+        """Fingerprinted URL of a static file (its /static/ URL if it is not fingerprinted)."""
+        self._check()
+        return self._urls.get(filename, f"/static/{filename}")
+
+    def asset_response(self, request, fingerprinted):
+        """
+        Response for a fingerprinted asset
+
+        Returns:
+            Response, or None if there is no such asset (or its content has
+            changed since the URL was handed out)
+        """
+        self._check()
+        entry = self._assets.get(fingerprinted)
+        if entry is None:
+            return None
+        return _respond(request, entry, f"public, max-age={ASSET_MAX_AGE}, immutable")
+
+    def page_response(self, request, name):
+        """
+        Response for an HTML page, served from memory
+
+        Returns:
+            Response, or None if the page needs render_template
+        """
+        self._check()
+        entry = self._pages.get(name)
+        if entry is None:
+            return None
+        return _respond(request, entry, "no-cache")
+
+    def status(self):
+        return {
+            "brotli": brotli is not None,
+            "brotli_quality": BROTLI_QUALITY,
+            "reload": self.reload,
+            "assets": {name: _sizes(entry) for name, entry in self._assets.items()},
+            "pages": sorted(self._pages),
+        }
+
+
+def _entry(body, digest, filename):
+    mimetype = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+    if mimetype.startswith("text/") or mimetype.endswith("javascript"):
+        mimetype += "; charset=utf-8"
+    # variants is filled in by the first request (two racing requests both
+    # compressing is harmless: the result is the same)
+    return {"body": body, "variants": None, "digest": digest, "mimetype": mimetype}
+
+
+def _sizes(entry):
+    """Size of each variant (only the identity until the first request)."""
+    variants = entry["variants"] or {"identity": entry["body"]}
+    return {encoding: len(data) for encoding, data in variants.items()}
+
+
+def _respond(request, entry, cache_control):
+    variants = entry["variants"]
+    if variants is None:
+        variants = entry["variants"] = compress(entry["body"])
+    encoding = "identity"
+    for candidate in ENCODINGS:
+        if candidate in variants and request.accept_encodings[candidate]:
+            encoding = candidate
+            break
+    response = Response(variants[encoding], content_type=entry["mimetype"])
+    if encoding != "identity":
+        response.headers["Content-Encoding"] = encoding
+    if len(variants) > 1:
+        response.vary.add("Accept-Encoding")
+    response.headers["Cache-Control"] = cache_control
+    # Each encoding is a different representation, so it gets its own strong ETag
+    response.set_etag(entry["digest"] if encoding == "identity" else f"{entry['digest']}-{encoding}")
+    return response.make_conditional(request)
@@ -17,6 +17,26 @@ mkdir -p static/js
 echo "✓ Directories created"
 echo ""
 
+# In-browser inference runtime, served by the Jetson itself (the hotspot has no internet)
+echo "Fetching in-browser inference runtime..."
+TFJS_CDN="https://cdn.jsdelivr.net/npm/@tensorflow"
+TFLITE_DIST="$TFJS_CDN/tfjs-tflite@0.0.1-alpha.10/dist"
+mkdir -p static/js/vendor static/vendor/tfjs-tflite
+fetch() {
+    [ -s "$2" ] || curl -fsSL -o "$2" "$1" || { rm -f "$2"; echo "⚠ Could not fetch $1"; }
+}
+fetch "$TFJS_CDN/tfjs-core@4.22.0/dist/tf-core.min.js" static/js/vendor/tf-core.min.js
+fetch "$TFJS_CDN/tfjs-backend-cpu@4.22.0/dist/tf-backend-cpu.min.js" static/js/vendor/tf-backend-cpu.min.js
+fetch "$TFLITE_DIST/tf-tflite.min.js" static/js/vendor/tf-tflite.min.js
+# Loaded by tf-tflite at runtime by name, so served unfingerprinted from /static/vendor
+for f in tflite_web_api_client.js \
+         tflite_web_api_cc.js tflite_web_api_cc.wasm \
+         tflite_web_api_cc_simd.js tflite_web_api_cc_simd.wasm; do
+    fetch "$TFLITE_DIST/$f" "static/vendor/tfjs-tflite/$f"
+done
+echo "✓ Runtime in static/js/vendor and static/vendor/tfjs-tflite"
+echo ""
+
 # Ensure conda environment exists and is activated (if conda is available)
 echo "Checking for Conda..."
 if command -v conda >/dev/null 2>&1; then
@@ -5,12 +5,32 @@ let currentState = {
     inferenceActive: false,
     modelLoaded: false,
     isPilot: false,
-    viewMode: 'local' // 'local' or 'pilot'
+    viewMode: 'local', // 'local' or 'pilot'
+    modelInput: null // Input size/preprocessing of the loaded model (from the server)
 };
 
 let inferenceInterval = null;
 let pilotFeedInterval = null;
-const INFERENCE_FPS = 10;
+const INFERENCE_FPS = 10; // Starting rate; the server adjusts it via pacing hints
+
+// Backpressure hints from the server, refreshed by every prediction response
+let pacing = { fps: INFERENCE_FPS, jpeg_quality: 0.8, capture_width: 640 };
+let spectatorFps = INFERENCE_FPS;
+let frameCanvas = null; // Offscreen canvas frames are scaled into before encoding
+
+// In-browser inference (optional, needs the tfjs-tflite scripts, which are
+// only injected once the pilot turns it on)
+let localModel = null;
+let localModelUrl = null;
+let tfliteRuntime = null; // Promise of the loaded runtime scripts
+let frameSeq = 0;
+// Previous round trip (browser send/receive, server receive/reply), echoed with
+// the next frame so the server can estimate the clock offset for latency tracing
+let lastClock = null;
+let lastThumbnailAt = 0;
+const THUMBNAIL_INTERVAL_MS = 1000; // Spectator preview rate in local mode
+const THUMBNAIL_WIDTH = 160;
+const MODEL_LOAD_POLL_MS = 250; // Background model load progress polling
 
 document.addEventListener('DOMContentLoaded', () => {
     initializeWebcam();
@@ -18,7 +38,7 @@ document.addEventListener('DOMContentLoaded', () => {
     initializeUploadForm();
     loadModelsList();
     loadSettings();
-    startStatusPolling();
+    startLiveChannel();
 });
 
 // --- Initialization ---
@@ -44,6 +64,11 @@ function initializeControls() {
     document.getElementById('stop-btn').addEventListener('click', stopInference);
     document.getElementById('emergency-btn').addEventListener('click', emergencyStop);
     document.getElementById('save-settings-btn').addEventListener('click', saveSettings);
+    document.getElementById('compare-start-btn').addEventListener('click', startComparison);
+    document.getElementById('compare-stop-btn').addEventListener('click', stopComparison);
+    document.getElementById('local-inference-toggle').addEventListener('change', e => {
+        if (e.target.checked && !localModel) enableLocalInference();
+    });
     
     document.getElementById('take-control-btn').addEventListener('click', takeControl);
     document.getElementById('relinquish-btn').addEventListener('click', relinquishControl);
@@ -127,7 +152,7 @@ function setViewMode(mode) {
         
         // Start polling pilot feed
         if (!pilotFeedInterval) {
-            pilotFeedInterval = setInterval(fetchPilotFrame, 1000 / INFERENCE_FPS);
+            pilotFeedInterval = setInterval(fetchPilotFrame, 1000 / spectatorFps);
         }
     }
 }
@@ -145,6 +170,13 @@ async function fetchPilotFrame() {
         if (data.image) {
             document.getElementById('pilot-feed').src = data.image;
         }
+
+        // Follow the pilot's frame rate instead of polling faster than it sends
+        if (data.fps && data.fps !== spectatorFps && pilotFeedInterval) {
+            spectatorFps = data.fps;
+            clearInterval(pilotFeedInterval);
+            pilotFeedInterval = setInterval(fetchPilotFrame, 1000 / spectatorFps);
+        }
         
         // Update prediction display if in pilot mode
         if (data.prediction && currentState.viewMode === 'pilot') {
@@ -239,6 +271,12 @@ async function loadModelsList() {
                 select.appendChild(opt);
             });
             
+            // Same choices for the shadow model
+            const compareSelect = document.getElementById('compare-select');
+            const chosen = compareSelect.value;
+            compareSelect.innerHTML = select.innerHTML;
+            compareSelect.value = chosen;
+
             // If check existing current model
             if (data.current) {
                 select.value = data.current;
@@ -274,11 +312,20 @@ async function loadSelectedModel() {
         });
         
         if (res.ok) {
-            showToast('Model loaded successfully', 'success');
-            currentState.modelLoaded = true;
-            document.getElementById('model-status').textContent = filename.split('_')[0];
-            updateDisplay('Model Ready - Press Start', 'success');
-            updateButtons();
+            // The server builds the model in the background; the previous
+            // model keeps serving predictions until it is swapped in
+            const data = await waitForModelLoad((await res.json()).status_url, btn);
+            if (data.state === 'ready') {
+                showToast('Model loaded successfully', 'success');
+                currentState.modelLoaded = true;
+                currentState.modelInput = data.model_input || null;
+                loadLocalModel(data.model_url);
+                document.getElementById('model-status').textContent = filename.split('_')[0];
+                updateDisplay('Model Ready - Press Start', 'success');
+                updateButtons();
+            } else {
+                showToast(`Error: ${data.error}`, 'error');
+            }
         } else {
             const err = await res.json();
             showToast(`Error: ${err.error}`, 'error');
@@ -291,6 +338,71 @@ async function loadSelectedModel() {
     }
 }
 
+async function waitForModelLoad(statusUrl, btn) {
+    while (true) {
+        await new Promise(resolve => setTimeout(resolve, MODEL_LOAD_POLL_MS));
+        const data = await (await fetch(statusUrl)).json();
+        if (data.state !== 'loading') return data;
+        btn.textContent = `Loading... ${Math.round(data.progress * 100)}%`;
+    }
+}
+
+// --- Shadow Model Comparison ---
+
+async function startComparison() {
+    const model = document.getElementById('compare-select').value;
+    if (!model) {
+        showToast('Please select a model to compare with', 'warning');
+        return;
+    }
+    const res = await fetch('/api/compare', {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ model })
+    });
+    const data = await res.json();
+    if (!res.ok) {
+        showToast(`Error: ${data.error}`, 'error');
+        return;
+    }
+    showToast('Loading comparison model...', 'info');
+}
+
+async function stopComparison() {
+    await fetch('/api/compare/stop', { method: 'POST' });
+}
+
+// Load progress and statistics arrive on the live channel ("compare")
+function renderComparison(data) {
+    const el = document.getElementById('compare-stats');
+    if (data.load.state === 'loading') {
+        el.textContent = `Loading ${data.load.model}... ${Math.round(data.load.progress * 100)}%`;
+    } else if (data.comparison) {
+        el.textContent = formatComparison(data.comparison);
+    } else {
+        el.textContent = data.load.state === 'error' ? `Error: ${data.load.error}` : '';
+    }
+}
+
+function formatComparison(c) {
+    const pct = v => (v === null ? '-' : `${Math.round(v * 100)}%`);
+    const bars = hist => {
+        const max = Math.max(1, ...hist);
+        return hist.map(n => ' ▁▂▃▄▅▆▇█'[Math.round(n / max * 8)]).join('');
+    };
+    const track = (label, t) => {
+        const ms = t.latency_ms ? `${t.latency_ms.p50} / ${t.latency_ms.p95} ms` : '-';
+        return `${label} ${(t.model || '-').split('_')[0]}\n  p50/p95 ${ms}  confidence 0|${bars(t.confidence_hist)}|1`;
+    };
+    return [
+        `Agreement ${pct(c.agreement)} (recent ${pct(c.recent_agreement)})`,
+        `${c.compared} frames compared, ${c.skipped} skipped` +
+            (c.shared_preprocessing === false ? ', separate preprocessing' : ''),
+        track('Active:', c.active),
+        track('Shadow:', c.shadow),
+    ].join('\n');
+}
+
 // --- Inference Logic ---
 
 async function startInference() {
@@ -315,8 +427,11 @@ async function startInference() {
         }
 
         currentState.inferenceActive = true;
-        if (inferenceInterval) clearInterval(inferenceInterval);
-        inferenceInterval = setInterval(sendFrame, 1000 / INFERENCE_FPS);
+        frameSeq = 0;
+        lastClock = null;
+        lastThumbnailAt = 0;
+        if (inferenceInterval) clearTimeout(inferenceInterval);
+        scheduleNextFrame(0);
         updateDisplay('Running...', 'success');
         showToast('Control started', 'success');
     } catch (e) {
@@ -330,7 +445,8 @@ async function startInference() {
 
 function stopInference(notifyServer = true) {
     currentState.inferenceActive = false;
-    if (inferenceInterval) clearInterval(inferenceInterval);
+    if (inferenceInterval) clearTimeout(inferenceInterval);
+    inferenceInterval = null;
     updateButtons();
     updateDisplay('Stopped', 'warning');
     
@@ -346,51 +462,216 @@ async function emergencyStop() {
     showToast('EMERGENCY STOP TRIGGERED', 'error');
 }
 
+// Send one frame at a time: the next one is scheduled only after the server
+// answered, at the rate it asked for, so requests never pile up.
+function scheduleNextFrame(delay) {
+    inferenceInterval = setTimeout(async () => {
+        const start = Date.now();
+        await sendFrame();
+        if (!currentState.inferenceActive) return;
+        scheduleNextFrame(Math.max(0, 1000 / pacing.fps - (Date.now() - start)));
+    }, delay);
+}
+
+// Capture size: the model's own input size when known (the server then
+// skips its resize), otherwise the pacing width at the camera's aspect ratio
+function captureSize(video) {
+    const input = currentState.modelInput;
+    if (input && input.width && input.height) {
+        return { width: input.width, height: input.height };
+    }
+    const scale = Math.min(1, pacing.capture_width / video.videoWidth);
+    return {
+        width: Math.round(video.videoWidth * scale),
+        height: Math.round(video.videoHeight * scale)
+    };
+}
+
+function captureFrame(video) {
+    if (!frameCanvas) frameCanvas = document.createElement('canvas');
+    const { width, height } = captureSize(video);
+    // Resizing a canvas reallocates it, so only do it when the size changes
+    if (frameCanvas.width !== width || frameCanvas.height !== height) {
+        frameCanvas.width = width;
+        frameCanvas.height = height;
+    }
+    // The model stretches to its input size, so stretch here too
+    frameCanvas.getContext('2d').drawImage(video, 0, 0, width, height);
+    return frameCanvas.toDataURL('image/jpeg', pacing.jpeg_quality);
+}
+
+function applyPacing(hints) {
+    if (!hints) return;
+    pacing = {
+        fps: hints.fps || pacing.fps,
+        jpeg_quality: hints.jpeg_quality || pacing.jpeg_quality,
+        capture_width: hints.capture_width || pacing.capture_width
+    };
+}
+
 async function sendFrame() {
     if (!currentState.isPilot) {
         stopInference(false);
         return;
     }
 
+    if (useLocalInference()) {
+        return sendLocalResult();
+    }
+
     const video = document.getElementById('webcam');
-    const canvas = document.getElementById('canvas');
-    const ctx = canvas.getContext('2d');
-    
-    canvas.width = video.videoWidth;
-    canvas.height = video.videoHeight;
-    ctx.drawImage(video, 0, 0);
-    
-    const image = canvas.toDataURL('image/jpeg', 0.8);
-    const start = Date.now();
-    
+    if (!video.videoWidth) return;
+
+    const seq = ++frameSeq;
+    const timestamp = Date.now(); // Capture time
+    const image = captureFrame(video);
+    const sentTs = Date.now();
+
     try {
         const res = await fetch('/predict_frame', {
             method: 'POST',
             headers: {'Content-Type': 'application/json'},
-            body: JSON.stringify({ image })
+            body: JSON.stringify({ image, seq, timestamp, sent_ts: sentTs, clock: lastClock })
         });
-        
+
         const data = await res.json();
-        const latency = Date.now() - start;
-        document.getElementById('latency-val').textContent = latency;
-        
-        if (res.ok) {
-            const conf = (data.confidence * 100).toFixed(0);
-            const cmd = data.command_to_execute;
-            
-            let text = `${data.prediction} (${conf}%)`;
-            if (cmd && cmd !== 'Idle') {
-                text += ` -> EXECUTE: ${cmd}`;
-                document.getElementById('last-cmd').textContent = cmd;
-            }
-            
-            updateDisplay(text, cmd !== 'Idle' ? 'success' : 'info');
-        }
+        const receivedTs = Date.now();
+        document.getElementById('latency-val').textContent = receivedTs - sentTs;
+        rememberClock(data.clock, sentTs, receivedTs);
+
+        applyPacing(data.hints);
+        if (res.ok) showPrediction(data);
     } catch (e) {
         console.error(e);
     }
 }
 
+// --- In-Browser Inference ---
+
+function loadScript(src) {
+    return new Promise((resolve, reject) => {
+        const script = document.createElement('script');
+        script.src = src;
+        script.onload = resolve;
+        script.onerror = () => reject(new Error(`Could not load ${src}`));
+        document.head.appendChild(script);
+    });
+}
+
+function loadTfliteRuntime() {
+    if (!tfliteRuntime) {
+        const toggle = document.getElementById('local-inference-toggle');
+        const scripts = toggle.dataset.runtime.split(/\s+/).filter(Boolean);
+        // One after another: each script needs the ones before it
+        tfliteRuntime = scripts
+            .reduce((loaded, src) => loaded.then(() => loadScript(src)), Promise.resolve())
+            .then(() => tflite.setWasmPath(toggle.dataset.wasmPath));
+        tfliteRuntime.catch(() => { tfliteRuntime = null; }); // Retry on the next attempt
+    }
+    return tfliteRuntime;
+}
+
+function loadLocalModel(modelUrl) {
+    const toggle = document.getElementById('local-inference-toggle');
+    localModel = null;
+    localModelUrl = modelUrl || null;
+    if (!toggle) return;
+    toggle.disabled = !localModelUrl;
+    if (localModelUrl && toggle.checked) enableLocalInference();
+}
+
+async function enableLocalInference() {
+    const toggle = document.getElementById('local-inference-toggle');
+    const modelUrl = localModelUrl;
+    if (!modelUrl) return;
+
+    try {
+        await loadTfliteRuntime();
+        const model = await tflite.loadTFLiteModel(modelUrl);
+        if (modelUrl === localModelUrl) localModel = model; // Not replaced meanwhile
+    } catch (e) {
+        console.warn('In-browser model unavailable, uploading frames instead', e);
+        toggle.checked = false;
+        showToast('In-browser inference unavailable, uploading frames instead', 'error');
+    }
+}
+
+function useLocalInference() {
+    const toggle = document.getElementById('local-inference-toggle');
+    return localModel !== null && toggle && toggle.checked;
+}
+
+function runLocalModel(video) {
+    // Mirror ModelInference.preprocess_image: resize, then /255 for float models
+    const input = localModel.inputs[0];
+    const [, height, width] = input.shape;
+    return tf.tidy(() => {
+        let img = tf.image.resizeBilinear(tf.browser.fromPixels(video), [height, width]);
+        img = input.dtype === 'float32' ? img.div(255) : img.toInt();
+        const output = localModel.predict(img.expandDims(0));
+        return Array.from(output.dataSync());
+    });
+}
+
+function captureThumbnail(video) {
+    const canvas = document.getElementById('canvas');
+    canvas.width = THUMBNAIL_WIDTH;
+    canvas.height = Math.round(THUMBNAIL_WIDTH * video.videoHeight / video.videoWidth) || THUMBNAIL_WIDTH;
+    canvas.getContext('2d').drawImage(video, 0, 0, canvas.width, canvas.height);
+    return canvas.toDataURL('image/jpeg', 0.6);
+}
+
+async function sendLocalResult() {
+    const video = document.getElementById('webcam');
+    if (!video.videoWidth) return;
+
+    const seq = ++frameSeq;
+    const timestamp = Date.now();
+    const payload = { probabilities: runLocalModel(video), seq, timestamp, clock: lastClock };
+
+    // Occasional small preview so spectators still see the pilot's view
+    if (timestamp - lastThumbnailAt >= THUMBNAIL_INTERVAL_MS) {
+        payload.thumbnail = captureThumbnail(video);
+        lastThumbnailAt = timestamp;
+    }
+
+    try {
+        payload.sent_ts = Date.now();
+        const res = await fetch('/predict_result', {
+            method: 'POST',
+            headers: {'Content-Type': 'application/json'},
+            body: JSON.stringify(payload)
+        });
+
+        const data = await res.json();
+        const receivedTs = Date.now();
+        document.getElementById('latency-val').textContent = receivedTs - timestamp;
+        rememberClock(data.clock, payload.sent_ts, receivedTs);
+
+        applyPacing(data.hints);
+        if (res.ok) showPrediction(data);
+    } catch (e) {
+        console.error(e);
+    }
+}
+
+function rememberClock(clock, sentTs, receivedTs) {
+    if (clock) lastClock = { t0: sentTs, t1: clock.t1, t2: clock.t2, t3: receivedTs };
+}
+
+function showPrediction(data) {
+    const conf = (data.confidence * 100).toFixed(0);
+    const cmd = data.command_to_execute;
+
+    let text = `${data.prediction} (${conf}%)`;
+    if (cmd && cmd !== 'Idle') {
+        text += ` -> EXECUTE: ${cmd}`;
+        document.getElementById('last-cmd').textContent = cmd;
+    }
+
+    updateDisplay(text, cmd !== 'Idle' ? 'success' : 'info');
+}
+
 // --- Settings ---
 
 function loadSettings() {
@@ -472,32 +753,34 @@ function saveSettings() {
     });
 }
 
-// --- Status Polling ---
+// --- Live Status (pushed by the server, see live.js) ---
+
+function startLiveChannel() {
+    openLiveChannel({
+        onState(data, changed, userId) {
+            if (changed.includes('model_input')) currentState.modelInput = data.model_input;
+            if (changed.includes('compare')) renderComparison(data.compare);
 
-function startStatusPolling() {
-    setInterval(async () => {
-        try {
-            const res = await fetch('/status');
-            const data = await res.json();
-            
             const rStatus = document.getElementById('robot-status');
             if (rStatus) {
                 rStatus.textContent = data.robot_connected ? 'Connected' : 'Disconnected';
                 rStatus.className = 'status-value ' + (data.robot_connected ? 'connected' : 'disconnected');
             }
-            
+
+            if (changed.some(k => k === 'current_pilot' || k === 'system_locked')) {
+                renderPilotStatus({
+                    current_pilot: data.current_pilot,
+                    is_pilot: data.current_pilot !== null && data.current_pilot === userId,
+                    system_locked: data.system_locked
+                });
+            }
+
             // Sync local state if changed externally
-            if (data.inference_enabled !== currentState.inferenceActive) {
-                if (data.inference_enabled && currentState.isPilot) {
-                    // Only start if we are pilot and it was enabled elsewhere? 
-                    // Unlikely but keep it safe.
-                } else if (!data.inference_enabled) {
-                    stopInference(false); // Stop local loop, don't tell server back
-                }
+            if (!data.inference_enabled && currentState.inferenceActive) {
+                stopInference(false); // Stop local loop, don't tell server back
             }
-            
-        } catch (e) {}
-    }, 2000);
+        }
+    });
 }
 
 // --- Helpers ---
@@ -543,51 +826,54 @@ function showToast(msg, type='info') {
 
 // --- Pilot Management ---
 
+// Immediate refresh after our own take/relinquish (the live channel follows)
 async function pollPilotStatus() {
     try {
         const res = await fetch('/api/control_status');
-        const data = await res.json();
-        
-        currentState.isPilot = data.is_pilot;
-        
-        const pilotStatus = document.getElementById('pilot-status');
-        const takeBtn = document.getElementById('take-control-btn');
-        const relBtn = document.getElementById('relinquish-btn');
-        const pilotMsg = document.getElementById('pilot-message');
-        
-        if (data.system_locked) {
-            pilotStatus.textContent = 'SYSTEM LOCKED';
-            pilotStatus.className = 'status-value error';
+        renderPilotStatus(await res.json());
+    } catch (e) {
+        console.error('Pilot poll failed', e);
+    }
+}
+
+function renderPilotStatus(data) {
+    currentState.isPilot = data.is_pilot;
+    
+    const pilotStatus = document.getElementById('pilot-status');
+    const takeBtn = document.getElementById('take-control-btn');
+    const relBtn = document.getElementById('relinquish-btn');
+    const pilotMsg = document.getElementById('pilot-message');
+    
+    if (data.system_locked) {
+        pilotStatus.textContent = 'SYSTEM LOCKED';
+        pilotStatus.className = 'status-value error';
+        takeBtn.style.display = 'none';
+        relBtn.style.display = 'none';
+        pilotMsg.textContent = 'The teacher has locked the system.';
+        currentState.isPilot = false; // Force false if locked
+    } else if (data.current_pilot) {
+        if (data.is_pilot) {
+            pilotStatus.textContent = 'YOU';
+            pilotStatus.className = 'status-value connected';
             takeBtn.style.display = 'none';
-            relBtn.style.display = 'none';
-            pilotMsg.textContent = 'The teacher has locked the system.';
-            currentState.isPilot = false; // Force false if locked
-        } else if (data.current_pilot) {
-            if (data.is_pilot) {
-                pilotStatus.textContent = 'YOU';
-                pilotStatus.className = 'status-value connected';
-                takeBtn.style.display = 'none';
-                relBtn.style.display = 'inline-block';
-                pilotMsg.textContent = 'You have control of the robot.';
-            } else {
-                pilotStatus.textContent = 'Another Student';
-                pilotStatus.className = 'status-value warning';
-                takeBtn.style.display = 'none';
-                relBtn.style.display = 'none';
-                pilotMsg.textContent = 'Someone else is driving.';
-            }
+            relBtn.style.display = 'inline-block';
+            pilotMsg.textContent = 'You have control of the robot.';
         } else {
-            pilotStatus.textContent = 'Available';
-            pilotStatus.className = 'status-value disconnected';
-            takeBtn.style.display = 'inline-block';
+            pilotStatus.textContent = 'Another Student';
+            pilotStatus.className = 'status-value warning';
+            takeBtn.style.display = 'none';
             relBtn.style.display = 'none';
-            pilotMsg.textContent = 'Nobody is driving. Take control to start!';
+            pilotMsg.textContent = 'Someone else is driving.';
         }
-        
-        updateButtons();
-    } catch (e) {
-        console.error('Pilot poll failed', e);
+    } else {
+        pilotStatus.textContent = 'Available';
+        pilotStatus.className = 'status-value disconnected';
+        takeBtn.style.display = 'inline-block';
+        relBtn.style.display = 'none';
+        pilotMsg.textContent = 'Nobody is driving. Take control to start!';
     }
+    
+    updateButtons();
 }
 
 async function takeControl() {
@@ -613,6 +899,3 @@ async function relinquishControl() {
     } catch (e) {}
 }
 
-// Start polling
-setInterval(pollPilotStatus, 2000);
-pollPilotStatus();
@@ -0,0 +1,57 @@
+// Live channel (/api/stream): one server-sent event stream per page that
+// carries state changes and activity log lines, replacing status polling.
+//
+//   openLiveChannel({
+//       onState(state, changedKeys, userId) {...},  // merged state after each change
+//       onLogs(lines, replace) {...}                 // new log lines (replace: full backlog)
+//   });
+//
+// The browser reconnects by itself after a dropped connection; a refused one
+// (429/503, server restarting) closes the stream for good, so it is reopened
+// here with backoff. Every (re)connect starts with a full snapshot.
+
+const LIVE_RETRY_MIN_MS = 1000;
+const LIVE_RETRY_MAX_MS = 30000;
+
+function openLiveChannel({ onState, onLogs }) {
+    const state = {};
+    let userId = null;
+    let retryMs = LIVE_RETRY_MIN_MS;
+
+    function connect() {
+        const source = new EventSource('/api/stream');
+
+        source.addEventListener('hello', e => {
+            userId = JSON.parse(e.data).user_id;
+            retryMs = LIVE_RETRY_MIN_MS;
+        });
+
+        source.addEventListener('snapshot', e => {
+            const data = JSON.parse(e.data);
+            Object.keys(state).forEach(k => delete state[k]);
+            Object.assign(state, data.state);
+            if (onState) onState(state, Object.keys(data.state), userId);
+            if (onLogs) onLogs(data.logs, true);
+        });
+
+        source.addEventListener('state', e => {
+            const changes = JSON.parse(e.data);
+            Object.assign(state, changes);
+            if (onState) onState(state, Object.keys(changes), userId);
+        });
+
+        source.addEventListener('log', e => {
+            if (onLogs) onLogs([JSON.parse(e.data).line], false);
+        });
+
+        source.onerror = () => {
+            if (source.readyState !== EventSource.CLOSED) return;  // The browser is retrying
+            // Jittered, so a classroom of pages does not come back at once
+            const delay = retryMs * (0.5 + Math.random() / 2);
+            retryMs = Math.min(retryMs * 2, LIVE_RETRY_MAX_MS);
+            setTimeout(connect, delay);
+        };
+    }
+
+    connect();
+}
@@ -13,7 +13,8 @@ let webcamStream = null;
 let videoElement = null;
 let canvasElement = null;
 let inferenceInterval = null;
-const INFERENCE_FPS = 2; // Send frames for inference 2 times per second (reduced)
+const INFERENCE_FPS = 2; // Starting rate; the server adjusts it via pacing hints
+let pacing = { fps: INFERENCE_FPS, jpeg_quality: 0.8, capture_width: 640 };
 
 // Initialize on page load
 document.addEventListener('DOMContentLoaded', () => {
@@ -57,14 +58,15 @@ function captureFrame() {
     if (!videoElement || !canvasElement) return null;
     
     const context = canvasElement.getContext('2d');
-    canvasElement.width = videoElement.videoWidth;
-    canvasElement.height = videoElement.videoHeight;
+    const scale = Math.min(1, pacing.capture_width / videoElement.videoWidth);
+    canvasElement.width = Math.round(videoElement.videoWidth * scale);
+    canvasElement.height = Math.round(videoElement.videoHeight * scale);
     
     // Draw the video frame to canvas
     context.drawImage(videoElement, 0, 0, canvasElement.width, canvasElement.height);
     
     // Get base64 encoded image
-    return canvasElement.toDataURL('image/jpeg', 0.8);
+    return canvasElement.toDataURL('image/jpeg', pacing.jpeg_quality);
 }
 
 // Send frame for inference
@@ -84,6 +86,7 @@ async function sendFrameForInference() {
         });
         
         const data = await response.json();
+        applyPacing(data.hints);
         
         if (response.ok) {
             // Update prediction display
@@ -111,6 +114,21 @@ async function sendFrameForInference() {
     }
 }
 
+// Follow the server's backpressure hints (frame rate, JPEG quality, capture size)
+function applyPacing(hints) {
+    if (!hints) return;
+    const oldFps = pacing.fps;
+    pacing = {
+        fps: hints.fps || pacing.fps,
+        jpeg_quality: hints.jpeg_quality || pacing.jpeg_quality,
+        capture_width: hints.capture_width || pacing.capture_width
+    };
+    if (pacing.fps !== oldFps && inferenceInterval) {
+        clearInterval(inferenceInterval);
+        inferenceInterval = setInterval(sendFrameForInference, 1000 / pacing.fps);
+    }
+}
+
 // Update prediction display
 function updatePredictionDisplay(text, type = 'info') {
     const display = document.getElementById('prediction-display');
@@ -320,7 +338,7 @@ async function startInference() {
             if (inferenceInterval) {
                 clearInterval(inferenceInterval);
             }
-            inferenceInterval = setInterval(sendFrameForInference, 1000 / INFERENCE_FPS);
+            inferenceInterval = setInterval(sendFrameForInference, 1000 / pacing.fps);
             
         } else {
             showToast(`Error: ${data.error}`, 'error');
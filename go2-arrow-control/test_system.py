@@ -18,6 +18,18 @@ def print_status(test_name, passed, message=""):
     if message:
         print(f"       {message}")
 
+def run_test(test):
+    """Run a test that asserts instead of returning a result; True if it passed"""
+    try:
+        test()
+        return True
+    except AssertionError as e:
+        print_status(test.__doc__.splitlines()[0], False, str(e))
+        return False
+    except Exception as e:
+        print_status(test.__doc__.splitlines()[0], False, f"{type(e).__name__}: {e}")
+        return False
+
 def test_imports():
     """Test if all required Python packages are available"""
     print_header("Testing Python Dependencies")
@@ -163,6 +175,175 @@ def test_robot_controller():
         print_status("Robot Controller", False, str(e))
         return False
 
+def test_estop_latency(trials=10, bridge_latency_ms=500, budget_ms=50, serial=False):
+    """Test that an emergency stop overtakes a move stuck on a slow bridge
+
+    Relies on the bridge answering the e-stop socket while a move on the
+    command socket is still outstanding, as the simulator's ROUTER socket
+    does. A bridge on a REP socket (serial=True) handles one request at a
+    time, so there the e-stop waits for the move in flight and may take up
+    to one more bridge round-trip; the moves queued behind it are dropped.
+    """
+    print_header("Testing Emergency Stop Latency" + (" (REP Bridge)" if serial else ""))
+
+    import random
+    import time
+    sys.path.insert(0, 'server')
+    import robot_controller
+    from bridge_simulator import BridgeSimulator
+
+    # Local stand-in that answers every request late, on its own port
+    port = random.randint(20000, 30000)
+    robot_controller.BRIDGE_CMD_PORT = port
+    bridge = BridgeSimulator(port=port, latency=f"fixed:{bridge_latency_ms}", telemetry_port=0, serial=serial)
+    bridge.start()
+    controller = robot_controller.GO2Controller()
+    if serial:
+        budget_ms += bridge_latency_ms
+    latencies = []
+    try:
+        assert controller.connect(), "Simulator did not answer"
+
+        for _ in range(trials):
+            controller.move_forward()
+            # Wait until a move is in flight and holds the command lock
+            deadline = time.monotonic() + 2
+            while not controller.command_lock.locked() and time.monotonic() < deadline:
+                time.sleep(0.001)
+            time.sleep(random.uniform(0, bridge_latency_ms / 5000))
+
+            stops = bridge.stats["commands"].get("stop", 0)
+            started = time.perf_counter()
+            controller.emergency_stop()
+            while bridge.stats["commands"].get("stop", 0) == stops:
+                if time.perf_counter() - started > 5:
+                    break
+                time.sleep(0.0005)
+            latencies.append((time.perf_counter() - started) * 1000)
+
+            # Start the next trial on an idle bridge (the e-stop is followed by a
+            # stop on the command socket, which a serial bridge answers last)
+            while controller.command_lock.locked() or bridge.stats["replies"] < bridge.stats["requests"]:
+                time.sleep(0.01)
+    finally:
+        controller.disconnect()
+        bridge.stop()
+
+    worst = max(latencies)
+    message = (
+        f"{worst:.1f} ms over {trials} stops (mean {sum(latencies) / trials:.1f} ms, "
+        f"budget {budget_ms} ms, bridge replies after {bridge_latency_ms} ms)"
+    )
+    assert worst <= budget_ms, message
+    print_status("E-stop Worst-Case Latency", True, message)
+
+def test_estop_latency_rep_bridge():
+    """Test the emergency stop against a bridge that handles one request at a time"""
+    test_estop_latency(serial=True)
+
+def test_estop_during_ramp(trials=20, bridge_latency_ms=10, settle_s=0.3):
+    """Test that no move is sent to the robot after an emergency stop fired mid-ramp"""
+    print_header("Testing Emergency Stop During a Ramp")
+
+    import random
+    import time
+    sys.path.insert(0, 'server')
+    import robot_controller
+    from bridge_simulator import BridgeSimulator
+
+    port = random.randint(20000, 30000)
+    robot_controller.BRIDGE_CMD_PORT = port
+    bridge = BridgeSimulator(port=port, latency=f"fixed:{bridge_latency_ms}", telemetry_port=0)
+    bridge.start()
+    controller = robot_controller.GO2Controller()
+
+    # Every command put on the command socket, with the time it went out
+    sent = []
+    bridge_cmd = controller._bridge_cmd
+
+    def recording_bridge_cmd(cmd, params=None):
+        sent.append((time.perf_counter(), cmd))
+        return bridge_cmd(cmd, params)
+
+    send = controller._send_command
+
+    def preempted_send(*args, **kwargs):
+        # Widens the race: the loop thread is preempted between deciding a step and sending it
+        time.sleep(0.005)
+        return send(*args, **kwargs)
+
+    controller._bridge_cmd = recording_bridge_cmd
+    controller._send_command = preempted_send
+    failures = []
+    try:
+        assert controller.connect(), "Simulator did not answer"
+        assert controller.control_loop_stats()["running"], "Control loop is off"
+
+        for trial in range(trials):
+            controller.move_forward()
+            # Somewhere in the ramp up to full speed
+            time.sleep(random.uniform(0.02, 0.3))
+            fired = time.perf_counter()
+            controller.emergency_stop()
+            time.sleep(settle_s)
+
+            late_moves = sum(1 for at, cmd in sent if at >= fired and cmd == "move")
+            velocity = bridge.robot.state()["velocity"]
+            if late_moves or any(velocity):
+                failures.append(f"trial {trial}: {late_moves} moves after the e-stop, robot at {velocity}")
+    finally:
+        controller.disconnect()
+        bridge.stop()
+
+    assert not failures, f"{len(failures)} of {trials} stops failed, e.g. {failures[0]}"
+    print_status(
+        "No Moves After E-stop", True,
+        f"{trials} stops mid-ramp, {controller.estop_stats['dropped_moves']} stale moves dropped",
+    )
+
+def test_target_expiry(settle_s=2.5):
+    """Test that a single movement command is not kept alive forever"""
+    print_header("Testing Movement Target Expiry")
+
+    import random
+    import time
+    sys.path.insert(0, 'server')
+    import robot_controller
+    from bridge_simulator import BridgeSimulator
+
+    port = random.randint(20000, 30000)
+    robot_controller.BRIDGE_CMD_PORT = port
+    bridge = BridgeSimulator(port=port, telemetry_port=0)
+    bridge.start()
+    controller = robot_controller.GO2Controller()
+    try:
+        assert controller.connect(), "Simulator did not answer"
+        assert controller.control_loop_stats()["running"], "Control loop is off"
+
+        # One command, never repeated (the pilot's page closed right after it)
+        controller.move_forward()
+        time.sleep(0.2)
+        assert any(bridge.robot.state()["velocity"]), "Robot did not start moving"
+        # Ramp, target TTL and bridge deadman all run out well within settle_s
+        time.sleep(settle_s)
+        moves = bridge.stats["commands"].get("move", 0)
+        time.sleep(2 * controller.keepalive_interval)
+        state = bridge.robot.state()
+        keepalives_after = bridge.stats["commands"].get("move", 0) - moves
+        expired = controller.loop_stats["expired_targets"]
+    finally:
+        controller.disconnect()
+        bridge.stop()
+
+    assert state["deadman_stops"] == 1, f"Bridge deadman tripped {state['deadman_stops']} times, expected once"
+    assert not any(state["velocity"]), f"Robot still moving at {state['velocity']}"
+    assert keepalives_after == 0, f"{keepalives_after} keepalives sent after the target expired"
+    assert expired == 1, f"{expired} targets expired, expected 1"
+    print_status(
+        "Deadman After Single Command", True,
+        f"target TTL {controller.target_ttl} s, bridge deadman {bridge.robot.deadman_timeout} s",
+    )
+
 def test_inference():
     """Test inference engine initialization"""
     print_header("Testing Inference Engine")
@@ -241,6 +422,10 @@ def main():
     results['directories'] = test_directories()
     results['files'] = test_files()
     results['robot'] = test_robot_controller()
+    results['estop_latency'] = run_test(test_estop_latency)
+    results['estop_latency_rep_bridge'] = run_test(test_estop_latency_rep_bridge)
+    results['estop_ramp'] = run_test(test_estop_during_ramp)
+    results['target_expiry'] = run_test(test_target_expiry)
     results['inference'] = test_inference()
     results['network'] = test_network()
     # Skip flask_app test as it may cause issues with imports